@@ -1,8 +1,14 @@
 # run.py
+#
+# Local development server only. Production runs gunicorn with
+# gunicorn.conf.py (see docs/production-serving.md).
+
+import os
 
 from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5053, debug=True)  # Specify port=5050
\ No newline at end of file
+    debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+    app.run(host='0.0.0.0', port=int(os.getenv("PORT", "5053")), debug=debug_mode)
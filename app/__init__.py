@@ -1,3 +1,4 @@
+import click
 from flask import Flask, g, make_response, request
 from flask_cors import CORS
 from controllers.user_controller import user_blueprint
@@ -9,6 +10,8 @@ from controllers.community_tournament_controller import community_tournament_bp
 from db.extensions import db, migrate, mail
 from .config import Config
 from services.firebase_service import init_firebase
+from services.metrics import init_metrics
+from services.query_stats import init_query_stats, request_query_stats, shorten_statement
 import logging
 import os
 import time
@@ -62,6 +65,9 @@ def create_app():
         )
         g.request_id = incoming_request_id or str(uuid.uuid4())
 
+    init_metrics(app)
+    init_query_stats(app)
+
     # Set up Firebase inside app context
     with app.app_context():
         init_firebase()
@@ -83,15 +89,23 @@ def create_app():
             if start_ts is not None:
                 elapsed_ms = (time.perf_counter() - start_ts) * 1000.0
                 response.headers["X-Response-Time-Ms"] = f"{elapsed_ms:.2f}"
+                db_stats = request_query_stats()
+                response.headers["X-DB-Queries"] = str(db_stats["count"])
+                response.headers["X-DB-Time-Ms"] = f"{db_stats['total_ms']:.2f}"
                 slow_ms = int(app.config.get("API_SLOW_REQUEST_MS", 120) or 120)
                 if elapsed_ms >= slow_ms:
                     app.logger.warning(
-                        "slow_request request_id=%s method=%s path=%s status=%s elapsed_ms=%.2f",
+                        "slow_request request_id=%s method=%s path=%s status=%s elapsed_ms=%.2f "
+                        "db_queries=%s db_time_ms=%.2f slowest_query_ms=%.2f slowest_query=%s",
                         getattr(g, "request_id", "-"),
                         request.method,
                         request.path,
                         response.status_code,
                         elapsed_ms,
+                        db_stats["count"],
+                        db_stats["total_ms"],
+                        db_stats["slowest_ms"],
+                        shorten_statement(db_stats["slowest_statement"]) or "-",
                     )
 
         if "Cache-Control" not in response.headers and request.method == "GET" and response.status_code == 200:
@@ -115,4 +129,38 @@ def create_app():
         response.headers["Access-Control-Max-Age"] = "86400"
         return response
 
+    @app.cli.command("community-standings-rebuild")
+    @click.option("--tournament-id", type=click.UUID, default=None, help="Rebuild one tournament only.")
+    def rebuild_community_standings_command(tournament_id):
+        """Recompute community leaderboard standings from completed matches."""
+        from services.community_tournament_control_service import rebuild_tournament_standings
+
+        rebuilt = rebuild_tournament_standings(tournament_id)
+        click.echo(f"rebuilt standings for {rebuilt} tournament(s)")
+
+    @app.cli.command("community-payment-webhook-worker")
+    @click.option("--concurrency", type=int, default=None, help="Drain threads (default COMMUNITY_PAYMENT_WEBHOOK_WORKER_CONCURRENCY).")
+    @click.option("--batch-size", type=int, default=None, help="Events claimed per batch (default COMMUNITY_PAYMENT_WEBHOOK_WORKER_BATCH_SIZE).")
+    @click.option("--poll-interval", type=float, default=None, help="Seconds to sleep when the queue is empty.")
+    @click.option("--once", is_flag=True, help="Exit once no events are ready, e.g. when run from a scheduler.")
+    def community_payment_webhook_worker_command(concurrency, batch_size, poll_interval, once):
+        """Reconcile stored Razorpay webhook events for community registrations."""
+        import signal
+        import threading
+
+        from job.community_payment_webhooks import run_webhook_worker
+
+        stop_event = threading.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: stop_event.set())
+        totals = run_webhook_worker(
+            app,
+            concurrency=concurrency or app.config["COMMUNITY_PAYMENT_WEBHOOK_WORKER_CONCURRENCY"],
+            batch_size=batch_size or app.config["COMMUNITY_PAYMENT_WEBHOOK_WORKER_BATCH_SIZE"],
+            poll_interval_sec=poll_interval or app.config["COMMUNITY_PAYMENT_WEBHOOK_WORKER_POLL_INTERVAL_SEC"],
+            stop_event=stop_event,
+            once=once,
+        )
+        click.echo(" ".join(f"{key}={value}" for key, value in totals.items()))
+
     return app
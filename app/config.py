@@ -38,21 +38,30 @@ class Config:
     # Encryption keys
     ENCRYPT_PRIVATE_KEY = load_key_from_file(os.getenv("ENCRYPT_PRIVATE_KEY_PATH"))
     ENCRYPT_PUBLIC_KEY = load_key_from_file(os.getenv("ENCRYPT_PUBLIC_KEY_PATH"))
+    # Symmetric token subjects: "kid:base64url-key,..." plus the kid new tokens
+    # are sealed with. Keep old kids listed until their tokens have expired.
+    SUBJECT_ENCRYPTION_KEYS = os.getenv("SUBJECT_ENCRYPTION_KEYS", "")
+    SUBJECT_ENCRYPTION_KEY_ID = os.getenv("SUBJECT_ENCRYPTION_KEY_ID", "")
+    SUBJECT_ENCRYPTION_ACCEPT_RSA = os.getenv("SUBJECT_ENCRYPTION_ACCEPT_RSA", "true").lower() in ("true", "1", "t", "yes", "y")
 
     # API performance / observability knobs
     API_ENABLE_TIMING_HEADERS = os.getenv("API_ENABLE_TIMING_HEADERS", "true").lower() in ("true", "1", "t", "yes", "y")
     API_SLOW_REQUEST_MS = int(os.getenv("API_SLOW_REQUEST_MS", "120") or 120)
+    # Log statements repeated DB_QUERY_REPEAT_THRESHOLD+ times in one request (N+1 loops).
+    DB_QUERY_STRICT_MODE = os.getenv("DB_QUERY_STRICT_MODE", "false").lower() in ("true", "1", "t", "yes", "y")
+    DB_QUERY_REPEAT_THRESHOLD = int(os.getenv("DB_QUERY_REPEAT_THRESHOLD", "5") or 5)
     API_PUBLIC_CACHE_CONTROL = os.getenv("API_PUBLIC_CACHE_CONTROL", "public, max-age=15, stale-while-revalidate=30")
     API_PRIVATE_CACHE_CONTROL = os.getenv("API_PRIVATE_CACHE_CONTROL", "no-store")
+    # GET /metrics (Prometheus text format) is disabled while this is unset.
+    METRICS_AUTH_TOKEN = os.getenv("METRICS_AUTH_TOKEN", "")
 
     # Endpoint-level microcache profiles
     API_MICROCACHE_MAX_ITEMS = int(os.getenv("API_MICROCACHE_MAX_ITEMS", "50000") or 50000)
+    COMMUNITY_PUBLIC_CACHE_MAX_BYTES = int(os.getenv("COMMUNITY_PUBLIC_CACHE_MAX_BYTES", str(128 * 1024 * 1024)) or 0)
     API_CACHE_USERS_VOUCHER_TTL_SEC = int(os.getenv("API_CACHE_USERS_VOUCHER_TTL_SEC", "20") or 20)
     API_CACHE_USERS_HASH_COINS_TTL_SEC = int(os.getenv("API_CACHE_USERS_HASH_COINS_TTL_SEC", "10") or 10)
     API_CACHE_USERS_WALLET_TTL_SEC = int(os.getenv("API_CACHE_USERS_WALLET_TTL_SEC", "20") or 20)
     API_CACHE_USERS_TRANSACTIONS_TTL_SEC = int(os.getenv("API_CACHE_USERS_TRANSACTIONS_TTL_SEC", "15") or 15)
-    API_CACHE_USER_AVAILABLE_PASSES_TTL_SEC = int(os.getenv("API_CACHE_USER_AVAILABLE_PASSES_TTL_SEC", "20") or 20)
-    API_CACHE_USER_ALL_PASSES_TTL_SEC = int(os.getenv("API_CACHE_USER_ALL_PASSES_TTL_SEC", "20") or 20)
     API_CACHE_USER_PASSES_TTL_SEC = int(os.getenv("API_CACHE_USER_PASSES_TTL_SEC", "10") or 10)
     API_CACHE_USER_PASSES_HISTORY_TTL_SEC = int(os.getenv("API_CACHE_USER_PASSES_HISTORY_TTL_SEC", "15") or 15)
     API_CACHE_PASS_DETAILS_TTL_SEC = int(os.getenv("API_CACHE_PASS_DETAILS_TTL_SEC", "30") or 30)
@@ -60,6 +69,7 @@ class Config:
     API_CACHE_USERS_NOTIFICATIONS_TTL_SEC = int(os.getenv("API_CACHE_USERS_NOTIFICATIONS_TTL_SEC", "20") or 20)
     COMMUNITY_PUBLIC_CACHE_TTL_SEC = int(os.getenv("COMMUNITY_PUBLIC_CACHE_TTL_SEC", "5") or 5)
     COMMUNITY_PUBLIC_STATUS_CACHE_TTL_SEC = int(os.getenv("COMMUNITY_PUBLIC_STATUS_CACHE_TTL_SEC", "5") or 5)
+    COMMUNITY_PUBLIC_LIST_STALE_TTL_SEC = int(os.getenv("COMMUNITY_PUBLIC_LIST_STALE_TTL_SEC", "30") or 0)
     USER_FID_AUTH_RESPONSE_CACHE_TTL_SEC = int(os.getenv("USER_FID_AUTH_RESPONSE_CACHE_TTL_SEC", "20") or 20)
     USER_FID_AUTH_TOKEN_TTL_HOURS = int(os.getenv("USER_FID_AUTH_TOKEN_TTL_HOURS", "2") or 2)
     USER_CREATE_TIMING_LOGS = os.getenv("USER_CREATE_TIMING_LOGS", "true").lower() in ("true", "1", "t", "yes", "y")
@@ -69,7 +79,13 @@ class Config:
     USER_DELETION_COOLDOWN_DAYS = int(os.getenv("USER_DELETION_COOLDOWN_DAYS", "7") or 7)
     USER_DELETION_RETENTION_DAYS = int(os.getenv("USER_DELETION_RETENTION_DAYS", "7") or 7)
     USER_DELETION_CRON_TOKEN = os.getenv("USER_DELETION_CRON_TOKEN", "")
-    AUTH_USER_STATUS_CACHE_TTL_SEC = int(os.getenv("AUTH_USER_STATUS_CACHE_TTL_SEC", "5") or 5)
+    # Other workers' deletes and restores reach this worker's deleted-user set
+    # within AUTH_DELETED_USERS_REFRESH_SEC; the full set is reread every RELOAD.
+    AUTH_DELETED_USERS_REFRESH_SEC = int(os.getenv("AUTH_DELETED_USERS_REFRESH_SEC", "5") or 5)
+    AUTH_DELETED_USERS_RELOAD_SEC = int(os.getenv("AUTH_DELETED_USERS_RELOAD_SEC", "600") or 600)
+    # The shared active-pass catalog rereads catalog_versions at most this often
+    # and reloads when the version moved.
+    PASS_CATALOG_CHECK_SEC = int(os.getenv("PASS_CATALOG_CHECK_SEC", "5") or 5)
 
     # Server-to-server authorization for wallet credits. There is deliberately
     # no development default: an unset token disables the credit endpoint.
@@ -91,6 +107,10 @@ class Config:
     COMMUNITY_EVIDENCE_RETENTION_DAYS = int(os.getenv("COMMUNITY_EVIDENCE_RETENTION_DAYS", "7") or 7)
     COMMUNITY_PAYMENT_ATTEMPT_TTL_MINUTES = int(os.getenv("COMMUNITY_PAYMENT_ATTEMPT_TTL_MINUTES", "30") or 30)
     COMMUNITY_PAYMENT_RECONCILIATION_MAX_ATTEMPTS = int(os.getenv("COMMUNITY_PAYMENT_RECONCILIATION_MAX_ATTEMPTS", "12") or 12)
+    COMMUNITY_PAYMENT_PASS_BUDGET_SEC = float(os.getenv("COMMUNITY_PAYMENT_PASS_BUDGET_SEC", "12") or 12)
+    COMMUNITY_PAYMENT_WEBHOOK_WORKER_CONCURRENCY = int(os.getenv("COMMUNITY_PAYMENT_WEBHOOK_WORKER_CONCURRENCY", "4") or 4)
+    COMMUNITY_PAYMENT_WEBHOOK_WORKER_BATCH_SIZE = int(os.getenv("COMMUNITY_PAYMENT_WEBHOOK_WORKER_BATCH_SIZE", "10") or 10)
+    COMMUNITY_PAYMENT_WEBHOOK_WORKER_POLL_INTERVAL_SEC = float(os.getenv("COMMUNITY_PAYMENT_WEBHOOK_WORKER_POLL_INTERVAL_SEC", "1") or 1)
     RAZORPAY_AUTO_CAPTURE_AUTHORIZED = os.getenv("RAZORPAY_AUTO_CAPTURE_AUTHORIZED", "false").lower() in ("true", "1", "t", "yes", "y")
 
     # Auth performance + logging controls
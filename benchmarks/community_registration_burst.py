@@ -0,0 +1,234 @@
+"""Burst of simultaneous registrations for one free community tournament.
+
+500 players (``--registrants``) register for a tournament with 100 seats
+(``--seats``) at the same moment, each from its own thread and app context.
+The script reports throughput and latency. It fails if more players were
+confirmed than there are seats, or if the stored count disagrees with the
+confirmed registrations.
+
+"after" is ``register_for_tournament``: checks on a plain read, then one
+conditional ``UPDATE .. RETURNING`` claims the seat just before commit.
+"before" replays the previous flow, which held ``SELECT .. FOR UPDATE`` on
+the tournament row for the whole registration, including the audit and
+notification inserts. SQLite has no row locks, so "before" only runs against
+PostgreSQL.
+
+Runs against a throwaway SQLite file by default. Pass ``--database-url`` for a
+scratch PostgreSQL database; the script creates and drops the users, community
+tournament, registration, audit and notification tables there, so never point
+it at production.
+
+    python benchmarks/community_registration_burst.py [--registrants 500] [--seats 100] [--pool-size 50]
+"""
+
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+from db.extensions import db  # noqa: E402
+from models.communityTournament import (  # noqa: E402
+    CommunityTournament,
+    CommunityTournamentRegistration,
+    CommunityTournamentRegistrationStatus,
+    CommunityTournamentStatus,
+)
+from models.communityTournamentOperations import CommunityAuditLog  # noqa: E402
+from models.notification import Notification  # noqa: E402
+from models.user import User  # noqa: E402
+import services.community_tournament_service as community  # noqa: E402
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+import controllers.user_controller  # noqa: F401,E402
+
+HOST_ID = 1
+MODELS = (User, CommunityTournament, CommunityTournamentRegistration, CommunityAuditLog, Notification)
+
+
+def _register_with_row_lock(user_id, tournament_id):
+    """The previous flow for a free tournament: the row stays locked until commit."""
+    tournament = CommunityTournament.query.filter_by(id=tournament_id).with_for_update().first()
+    community.sync_tournament_status(tournament)
+    if tournament.status != CommunityTournamentStatus.REGISTRATION_OPEN:
+        raise community.CommunityConflictError("registration is not open")
+    if tournament.registered_players_count >= tournament.max_players:
+        raise community.CommunityConflictError("tournament is full")
+    db.session.query(User.id).filter_by(id=int(user_id)).scalar()
+    CommunityTournamentRegistration.query.filter_by(
+        tournament_id=tournament.id, user_id=int(user_id)
+    ).with_for_update().first()
+    reg = CommunityTournamentRegistration(
+        tournament_id=tournament.id,
+        user_id=int(user_id),
+        status=CommunityTournamentRegistrationStatus.CONFIRMED,
+        payment_status="not_required",
+        amount_paid=Decimal("0.00"),
+        confirmed_at=community._now(),
+    )
+    db.session.add(reg)
+    db.session.flush()
+    tournament.registered_players_count += 1
+    community._recalculate_prize_pool(tournament)
+    if tournament.registered_players_count >= tournament.max_players:
+        tournament.status = CommunityTournamentStatus.REGISTRATION_CLOSED
+    community._audit("registration_created", "community_tournament_registration", reg.id, user_id)
+    community._notify(user_id, "community_registration_success", "Registration received", "You registered.", tournament.id)
+    db.session.commit()
+    return reg
+
+
+def _seed(registrants, seats):
+    tables = [model.__table__ for model in MODELS]
+    db.metadata.drop_all(db.engine, tables=tables)
+    db.metadata.create_all(db.engine, tables=tables)
+    now = community._now()
+    db.session.add_all(
+        User(
+            id=user_id, fid=f"fid-{user_id}", name=f"Player {user_id}", game_username=f"player{user_id}",
+            created_at=now, updated_at=now,
+        )
+        for user_id in range(1, registrants + 2)
+    )
+    tournament = CommunityTournament(
+        host_user_id=HOST_ID,
+        title="Burst Cup",
+        game="bgmi",
+        max_players=seats,
+        min_entries=2,
+        status=CommunityTournamentStatus.REGISTRATION_OPEN,
+        registration_start_at=now - timedelta(hours=1),
+        registration_end_at=now + timedelta(days=1),
+        tournament_start_at=now + timedelta(days=2),
+    )
+    db.session.add(tournament)
+    db.session.commit()
+    return tournament.id
+
+
+def _run(app, register, registrants, tournament_id):
+    start = threading.Barrier(registrants)
+    latencies, outcomes, lock = [], {}, threading.Lock()
+
+    def player(user_id):
+        with app.app_context():
+            start.wait()
+            began = time.perf_counter()
+            try:
+                register(user_id, tournament_id)
+                outcome = "confirmed"
+            except community.CommunityConflictError as exc:
+                db.session.rollback()
+                outcome = str(exc)
+            except Exception as exc:  # noqa: BLE001 - reported, not raised
+                db.session.rollback()
+                outcome = f"error: {type(exc).__name__}"
+            finally:
+                db.session.remove()
+            elapsed = time.perf_counter() - began
+            with lock:
+                latencies.append(elapsed)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+
+    threads = [threading.Thread(target=player, args=(user_id,)) for user_id in range(2, registrants + 2)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - began, sorted(latencies), outcomes
+
+
+def _check(tournament_id, seats, registrants):
+    db.session.expire_all()
+    stored = int(db.session.get(CommunityTournament, tournament_id).registered_players_count)
+    confirmed = CommunityTournamentRegistration.query.filter_by(
+        tournament_id=tournament_id, status=CommunityTournamentRegistrationStatus.CONFIRMED
+    ).count()
+    problems = []
+    if confirmed > seats or stored > seats:
+        problems.append(f"cap exceeded: confirmed={confirmed} stored={stored} seats={seats}")
+    if confirmed != stored:
+        problems.append(f"count drift: confirmed={confirmed} stored={stored}")
+    if confirmed != min(seats, registrants):
+        problems.append(f"seats left unfilled: confirmed={confirmed} expected={min(seats, registrants)}")
+    return confirmed, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--registrants", type=int, default=500)
+    parser.add_argument("--seats", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=50, help="DB connections shared by the registrant threads")
+    parser.add_argument("--database-url", default=None, help="scratch database; default is a temp SQLite file")
+    args = parser.parse_args()
+
+    scratch = None
+    url = args.database_url
+    if not url:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        url = f"sqlite:///{scratch.name}"
+    sqlite = url.startswith("sqlite")
+    options = {"pool_size": args.pool_size, "max_overflow": 0, "pool_timeout": 120}
+    if sqlite:
+        options["connect_args"] = {"timeout": 120, "check_same_thread": False}
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=url, SQLALCHEMY_ENGINE_OPTIONS=options)
+    db.init_app(app)
+    if sqlite:
+        # Let readers run while one registration holds the write lock.
+        with app.app_context(), db.engine.connect() as connection:
+            connection.exec_driver_sql("PRAGMA journal_mode=WAL")
+
+    modes = [("after", community.register_for_tournament)]
+    if not sqlite:
+        modes.insert(0, ("before", _register_with_row_lock))
+    # SQLite hands back naive datetimes; compare them with a naive clock.
+    clock = patch.object(
+        community, "_now", lambda: datetime.now(timezone.utc).replace(tzinfo=None)
+    ) if sqlite else contextlib.nullcontext()
+
+    failed = False
+    try:
+        with clock:
+            for label, register in modes:
+                with app.app_context():
+                    tournament_id = _seed(args.registrants, args.seats)
+                elapsed, latencies, outcomes = _run(app, register, args.registrants, tournament_id)
+                with app.app_context():
+                    confirmed, problems = _check(tournament_id, args.seats, args.registrants)
+                p95 = latencies[int(len(latencies) * 0.95) - 1]
+                print(
+                    f"{label:<7} registrants={args.registrants} seats={args.seats} confirmed={confirmed} "
+                    f"total={elapsed:.2f}s rate={args.registrants / elapsed:.0f}/s "
+                    f"p50={statistics.median(latencies) * 1000:.0f}ms p95={p95 * 1000:.0f}ms "
+                    f"max={latencies[-1] * 1000:.0f}ms"
+                )
+                print(f"        outcomes={dict(sorted(outcomes.items()))}")
+                for problem in problems:
+                    print(f"        FAIL {problem}")
+                    failed = True
+        with app.app_context():
+            db.metadata.drop_all(db.engine, tables=[model.__table__ for model in MODELS])
+    finally:
+        if scratch:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(scratch.name + suffix):
+                    os.unlink(scratch.name + suffix)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
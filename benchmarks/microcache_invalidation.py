@@ -0,0 +1,84 @@
+"""Invalidation latency of the API microcache at 50k entries.
+
+Compares the previous full-scan invalidation (substring + prefix match over
+every key while holding the cache lock) with the tag-indexed path used by
+``_invalidate_user_microcache``.
+
+    python benchmarks/microcache_invalidation.py [--entries 50000] [--rounds 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.cache import TTLCache  # noqa: E402
+
+
+NAMESPACES = (
+    "users-wallet", "users-hash-coins", "users-notifications",
+    "users-transactions", "users-voucher", "user-passes",
+)
+INVALIDATED = ("users-wallet", "users-transactions")
+
+
+def _fill(cache, entries):
+    for index in range(entries):
+        uid = index // len(NAMESPACES)
+        namespace = NAMESPACES[index % len(NAMESPACES)]
+        key = f"{namespace}|u:{uid}|q:"
+        cache.set(key, {"uid": uid}, 3600, tags=(f"{namespace}|u:{uid}",))
+
+
+def _scan_invalidate(cache, uid):
+    prefixes = tuple(f"{namespace}|" for namespace in INVALIDATED)
+    with cache._lock:
+        stale_keys = [
+            key for key in cache._entries
+            if f"|u:{uid}|" in key and any(key.startswith(prefix) for prefix in prefixes)
+        ]
+        for key in stale_keys:
+            cache._remove(key)
+
+
+def _tag_invalidate(cache, uid):
+    cache.invalidate_tags(*(f"{namespace}|u:{uid}" for namespace in INVALIDATED))
+
+
+def _measure(invalidate, entries, rounds):
+    cache = TTLCache("bench", max_items=entries * 2)
+    _fill(cache, entries)
+    users = entries // len(NAMESPACES)
+    samples = []
+    for round_index in range(rounds):
+        uid = (round_index * 7919) % users
+        started = time.perf_counter()
+        invalidate(cache, uid)
+        samples.append((time.perf_counter() - started) * 1000.0)
+    samples.sort()
+    return {
+        "p50_ms": statistics.median(samples),
+        "p99_ms": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "max_ms": samples[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    for label, invalidate in (("scan (before)", _scan_invalidate), ("tag index (after)", _tag_invalidate)):
+        result = _measure(invalidate, args.entries, args.rounds)
+        print(
+            f"{label:<18} entries={args.entries} "
+            f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms max={result['max_ms']:.3f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
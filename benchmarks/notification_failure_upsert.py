@@ -0,0 +1,122 @@
+"""Cost of recording notification dispatch failures at 50k failed sends.
+
+Compares the previous bookkeeping (SELECT by token, then UPDATE or INSERT for
+every failure, committed once at the end) with ``_flush_notification_failures``,
+which writes each FCM batch of failures with one executemany
+``INSERT .. ON CONFLICT (token) DO UPDATE``. Half of the failing tokens already have a failure row, so both
+the insert and the update paths are exercised.
+
+Runs against a throwaway SQLite file by default. Pass ``--database-url`` for a
+scratch PostgreSQL database; the script creates and drops
+``notification_dispatch_failures`` there, so never point it at production.
+
+    python benchmarks/notification_failure_upsert.py [--failures 50000] [--batch 500]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from firebase_admin import messaging  # noqa: E402
+from flask import Flask  # noqa: E402
+
+from controllers.user_controller import _flush_notification_failures  # noqa: E402
+from db.extensions import db  # noqa: E402
+from models.notificationDispatch import NotificationDispatchFailure  # noqa: E402
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+
+JOB_ID = 1
+
+
+def _row_by_row(failures, job_id):
+    for token, exc in failures:
+        row = NotificationDispatchFailure.query.filter_by(token=token).first()
+        if row:
+            row.failure_count = int(row.failure_count or 0) + 1
+            row.error_type = type(exc).__name__
+            row.error_message = str(exc)
+            row.last_failed_at = datetime.utcnow()
+            row.last_job_id = int(job_id)
+            row.is_blocked = True
+        else:
+            db.session.add(NotificationDispatchFailure(
+                token=token,
+                error_type=type(exc).__name__,
+                error_message=str(exc),
+                failure_count=1,
+                is_blocked=True,
+                last_job_id=int(job_id),
+            ))
+        # The old job autoflushed before every SELECT; flush to match.
+        db.session.flush()
+
+
+def _bulk(failures, job_id, batch):
+    for start in range(0, len(failures), batch):
+        _flush_notification_failures(failures[start:start + batch], job_id)
+
+
+def _measure(record, failures):
+    table = NotificationDispatchFailure.__table__
+    table.drop(db.engine, checkfirst=True)
+    table.create(db.engine)
+    existing = failures[::2]
+    _bulk(existing, 0, 1000)
+    db.session.commit()
+    db.session.expunge_all()
+
+    started = time.perf_counter()
+    record(failures)
+    db.session.commit()
+    elapsed = time.perf_counter() - started
+
+    counts = db.session.query(db.func.sum(NotificationDispatchFailure.failure_count)).scalar()
+    assert int(counts) == len(failures) + len(existing), "unexpected failure totals"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--failures", type=int, default=50000)
+    parser.add_argument("--batch", type=int, default=500, help="failures per flush (one FCM batch)")
+    parser.add_argument("--database-url", default=None, help="scratch database; default is a temp SQLite file")
+    args = parser.parse_args()
+
+    scratch = None
+    url = args.database_url
+    if not url:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        url = f"sqlite:///{scratch.name}"
+    app = Flask(__name__)
+    app.config.update(SQLALCHEMY_DATABASE_URI=url, SQLALCHEMY_ENGINE_OPTIONS={})
+    db.init_app(app)
+
+    error = messaging.UnregisteredError("Requested entity was not found.")
+    failures = [(f"token-{index:06d}", error) for index in range(args.failures)]
+    try:
+        with app.app_context():
+            for label, record in (
+                ("row by row (before)", lambda rows: _row_by_row(rows, JOB_ID)),
+                ("bulk upsert (after)", lambda rows: _bulk(rows, JOB_ID, args.batch)),
+            ):
+                elapsed = _measure(record, failures)
+                print(
+                    f"{label:<20} failures={len(failures)} "
+                    f"total={elapsed:.2f}s per_failure={elapsed / len(failures) * 1e6:.1f}us"
+                )
+            NotificationDispatchFailure.__table__.drop(db.engine, checkfirst=True)
+    finally:
+        if scratch:
+            os.unlink(scratch.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""DB query count per cache expiry on the public tournament list.
+
+Drives ``GET /api/v1/community/tournaments`` through the Flask test client
+with many concurrent clients across several TTL expiries. ``list_tournaments``
+is replaced by a stand-in that sleeps like a database round-trip and counts
+calls, so the script needs no Postgres.
+
+"before" replays the previous read path (check cache, on miss every caller
+runs the producer); "after" uses the single-flight ``get_or_load``.
+
+    python benchmarks/single_flight_load.py [--clients 64] [--expiries 5]
+"""
+
+import argparse
+import contextlib
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask  # noqa: E402
+
+import controllers.community_tournament_controller as community  # noqa: E402
+from services.cache import MISSING  # noqa: E402
+
+
+def _naive_get_or_load(cache):
+    def get_or_load(key, loader, ttl_sec=None, tags=(), stale_ttl_sec=0, wait_timeout_sec=10.0):
+        value, fresh = cache.lookup(key)
+        if fresh and value is not MISSING:
+            return value
+        value = loader()
+        cache.set(key, value, ttl_sec, tags=tags)
+        return value
+    return get_or_load
+
+
+def _run(mode, clients, expiries, query_ms, ttl_sec):
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        COMMUNITY_PUBLIC_CACHE_TTL_SEC=ttl_sec,
+        COMMUNITY_PUBLIC_LIST_STALE_TTL_SEC=0,
+    )
+    app.register_blueprint(community.community_tournament_bp)
+    cache = community._COMMUNITY_PUBLIC_CACHE
+    cache.clear()
+
+    query_count = [0]
+    count_lock = threading.Lock()
+
+    def fake_list_tournaments(_filters):
+        with count_lock:
+            query_count[0] += 1
+        time.sleep(query_ms / 1000.0)
+        return {"items": [], "pagination": {"page": 1, "per_page": 20, "total": 0, "pages": 0}}
+
+    per_expiry = []
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(patch.object(community, "list_tournaments", fake_list_tournaments))
+        if mode == "before":
+            stack.enter_context(patch.object(cache, "get_or_load", _naive_get_or_load(cache)))
+        for _ in range(expiries):
+            cache.clear()  # simulate the TTL lapsing for every client at once
+            before = query_count[0]
+            barrier = threading.Barrier(clients)
+
+            def client():
+                with app.test_client() as http:
+                    barrier.wait()
+                    response = http.get("/api/v1/community/tournaments")
+                    assert response.status_code == 200, response.status_code
+
+            threads = [threading.Thread(target=client) for _ in range(clients)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            per_expiry.append(query_count[0] - before)
+    cache.clear()
+    return per_expiry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--expiries", type=int, default=5)
+    parser.add_argument("--query-ms", type=float, default=40.0)
+    parser.add_argument("--ttl-sec", type=int, default=5)
+    args = parser.parse_args()
+
+    for mode in ("before", "after"):
+        per_expiry = _run(mode, args.clients, args.expiries, args.query_ms, args.ttl_sec)
+        print(
+            f"{mode:<6} clients={args.clients} queries_per_expiry={per_expiry} "
+            f"avg={sum(per_expiry) / len(per_expiry):.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
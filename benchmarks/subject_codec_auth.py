@@ -0,0 +1,102 @@
+"""Auth decorator throughput for RSA-OAEP versus AES-GCM token subjects.
+
+Every request carries a token for a different user, and the decrypted-subject
+cache is cleared before each one, so every call pays the full subject decrypt,
+the same as a cache miss in production. ``auth_required(decrypt_user=True)``
+runs through the Flask test client against a route that does no other work.
+The RSA keypair and the AES key are generated for the run; no database or key
+files are needed.
+
+    python benchmarks/subject_codec_auth.py [--requests 2000] [--rsa-bits 2048]
+"""
+
+import argparse
+import base64
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jwt  # noqa: E402
+from cryptography.hazmat.primitives import serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import rsa  # noqa: E402
+from flask import Flask, g, jsonify  # noqa: E402
+
+import services.security as security  # noqa: E402
+
+JWT_SECRET = "benchmark-jwt-secret-at-least-32-bytes"
+
+
+def _rsa_pems(bits):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=bits)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    ).decode()
+    return private_pem, public_pem
+
+
+def _app(private_pem, public_pem, key_id):
+    app = Flask(__name__)
+    app.config.update(
+        TESTING=True,
+        JWT_SECRET_KEY=JWT_SECRET,
+        ENCRYPT_PRIVATE_KEY=private_pem,
+        ENCRYPT_PUBLIC_KEY=public_pem,
+        SUBJECT_ENCRYPTION_KEYS=f"k1:{base64.urlsafe_b64encode(os.urandom(32)).decode()}",
+        SUBJECT_ENCRYPTION_KEY_ID=key_id,
+    )
+
+    @app.route("/whoami")
+    @security.auth_required_self(decrypt_user=True, allow_deleted=True)
+    def whoami():
+        return jsonify({"user_id": g.auth_user_id})
+
+    return app
+
+
+def _tokens(app, count):
+    now = datetime.utcnow()
+    with app.app_context():
+        subjects = [security.encode_subject(user_id) for user_id in range(1, count + 1)]
+    return [
+        jwt.encode({"uuid": subject, "iat": now, "exp": now + timedelta(hours=2)}, JWT_SECRET, algorithm="HS256")
+        for subject in subjects
+    ]
+
+
+def _run(label, app, requests):
+    tokens = _tokens(app, requests)
+    client = app.test_client()
+    started = time.perf_counter()
+    for user_id, token in enumerate(tokens, start=1):
+        security._DECRYPTED_SUBJECT_CACHE.clear()
+        response = client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+        assert response.get_json() == {"user_id": user_id}, response.get_data(as_text=True)
+    elapsed = time.perf_counter() - started
+    print(
+        f"{label:<8} requests={requests} jwt_payload_len={len(tokens[0].split('.')[1])} "
+        f"req/s={requests / elapsed:.0f} per_request={elapsed / requests * 1e6:.0f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rsa-bits", type=int, default=2048)
+    args = parser.parse_args()
+
+    private_pem, public_pem = _rsa_pems(args.rsa_bits)
+    _run("rsa", _app(private_pem, public_pem, key_id=""), args.requests)
+    _run("aes-gcm", _app(private_pem, public_pem, key_id="k1"), args.requests)
+
+
+if __name__ == "__main__":
+    main()
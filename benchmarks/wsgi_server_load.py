@@ -0,0 +1,97 @@
+"""Throughput and tail latency of the serving stack on two hot read endpoints.
+
+Drives ``GET /api/users/fid/<fid>`` and ``GET /api/v1/community/tournaments``
+with concurrent keep-alive clients against one or more running servers and
+prints requests/second, p50 and p99 per endpoint. Start the servers to compare
+first (see docs/production-serving.md), e.g. the development server on :5053
+and gunicorn on :5054, then:
+
+    python benchmarks/wsgi_server_load.py --fid <existing-fid> \\
+        --target dev=http://127.0.0.1:5053 --target gunicorn=http://127.0.0.1:5054 \\
+        [--clients 64] [--duration 20]
+"""
+
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def _drive(url, clients, duration_sec, warmup_sec):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = [0.0]
+    start = threading.Barrier(clients + 1)
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_errors = 0
+        start.wait()
+        warm_until = time.perf_counter() + warmup_sec
+        while time.perf_counter() < deadline[0]:
+            began = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            elapsed_ms = (time.perf_counter() - began) * 1000.0
+            if began < warm_until:
+                continue
+            if ok:
+                local_latencies.append(elapsed_ms)
+            else:
+                local_errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client, daemon=True) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    deadline[0] = time.perf_counter() + warmup_sec + duration_sec
+    start.wait()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / duration_sec,
+        "p50_ms": statistics.median(latencies) if latencies else 0.0,
+        "p99_ms": _percentile(latencies, 0.99) if latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", action="append", required=True, metavar="NAME=URL",
+                        help="server to measure; repeat to compare several")
+    parser.add_argument("--fid", required=True, help="firebase uid of an existing user")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds per endpoint")
+    parser.add_argument("--warmup", type=float, default=3.0, help="unmeasured seconds before each run")
+    args = parser.parse_args()
+
+    paths = (f"/api/users/fid/{args.fid}", "/api/v1/community/tournaments")
+    for target in args.target:
+        name, _, base_url = target.partition("=")
+        for path in paths:
+            result = _drive(base_url.rstrip("/") + path, args.clients, args.duration, args.warmup)
+            print(
+                f"{name:<10} {path:<40} clients={args.clients} "
+                f"req/s={result['rps']:.1f} p50={result['p50_ms']:.2f}ms "
+                f"p99={result['p99_ms']:.2f}ms errors={result['errors']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,5 @@
 from functools import wraps
 import hmac
-from threading import Lock
-import time
 
 from flask import Blueprint, current_app, g, jsonify, request
 from sqlalchemy.exc import SQLAlchemyError
@@ -14,6 +12,7 @@ from services.community_tournament_service import (
     cancel_registration,
     cancel_tournament,
     close_registration,
+    community_payment_webhook_queue_metrics,
     create_dispute,
     create_file_asset,
     create_community_payment_attempt,
@@ -70,6 +69,7 @@ from services.community_tournament_control_service import (
     replace_team_roster,
     public_host_profile,
     process_operational_deadlines,
+    rebuild_tournament_standings,
     rule_template,
     respond_team_invitation,
     accept_result_proposal,
@@ -79,18 +79,91 @@ from services.community_tournament_control_service import (
     tournament_readiness,
 )
 from services.security import auth_required_self
+from services.cache import get_cache
 from models.communityTournament import CommunityHostVerification
 from services.community_dispute_chat_service import CommunityDisputeChatError, mint_dispute_chat_token
 
 
 community_tournament_bp = Blueprint("community_tournaments", __name__, url_prefix="/api/v1/community")
 
-_COMMUNITY_PUBLIC_CACHE = {}
-_COMMUNITY_PUBLIC_CACHE_LOCK = Lock()
+
+
+def _community_public_cache():
+    """The community read cache, created on first use with the app's budgets."""
+    return get_cache(
+        "community-public",
+        max_items=int(current_app.config.get("API_MICROCACHE_MAX_ITEMS", 50000) or 50000),
+        max_bytes=int(current_app.config.get("COMMUNITY_PUBLIC_CACHE_MAX_BYTES", 128 * 1024 * 1024) or 0),
+    )
+
+
+_COMMUNITY_LIST_NAMESPACE = "tournaments"
+_COMMUNITY_TOURNAMENT_CACHE_KINDS = (
+    "tournament", "tournament-status", "teams", "matches", "private-matches", "leaderboard",
+)
+_DETAIL_KINDS = ("tournament", "tournament-status")
+_TEAM_KINDS = ("teams", "private-matches")
+_MATCH_KINDS = ("matches", "private-matches", "leaderboard")
+
+# Cached read namespaces each write endpoint can change: (kinds, refresh_list).
+# Kinds are evicted for the request's tournament_id, or for every tournament
+# when the route has none. refresh_list marks the public list stale so it is
+# revalidated by the next reader instead of being dropped. Endpoints missing
+# from this map evict everything for their tournament.
+_COMMUNITY_WRITE_INVALIDATION = {
+    "submit_host_verification_request": ((), False),
+    "admin_review_host_verification": (("tournament",), True),
+    "create_community_tournament": ((), True),
+    "update_community_tournament": (_COMMUNITY_TOURNAMENT_CACHE_KINDS, True),
+    "cancel_community_tournament": (_COMMUNITY_TOURNAMENT_CACHE_KINDS, True),
+    "register_community_tournament": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "cancel_my_community_registration": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "close_community_tournament_registration": (_DETAIL_KINDS, True),
+    "start_community_tournament": (_COMMUNITY_TOURNAMENT_CACHE_KINDS, True),
+    "process_pending_community_payment_queue": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "purge_expired_community_evidence_assets": ((), False),
+    "manage_community_registration": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "submit_community_result": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "verify_community_result": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "submit_community_winners": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "create_community_dispute": (_MATCH_KINDS, False),
+    "create_community_dispute_chat_token": ((), False),
+    "admin_review_community_dispute": (_MATCH_KINDS, False),
+    "admin_resolve_community_match_result": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "admin_review_community_payout": ((), False),
+    "admin_rebuild_community_standings": (("leaderboard",), False),
+    "create_community_file_asset": ((), False),
+    "create_community_evidence_upload_signature": ((), False),
+    "upload_community_evidence": ((), False),
+    "create_community_team": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "replace_community_team_roster": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "invite_community_team_member": (_TEAM_KINDS, False),
+    "respond_community_team_invitation": (_TEAM_KINDS, False),
+    "manage_community_team": (_DETAIL_KINDS + _TEAM_KINDS, True),
+    "generate_community_matches": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "create_manual_community_match": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "manage_community_match": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "create_community_result_proposal": (("matches", "private-matches"), False),
+    "accept_community_result_proposal": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "dispute_community_result_proposal": (("matches", "private-matches"), False),
+    "submit_community_captain_result": (_DETAIL_KINDS + _MATCH_KINDS, True),
+    "create_community_announcement": ((), False),
+    "create_community_tournament_review": ((), False),
+    "process_community_operational_deadlines": (_COMMUNITY_TOURNAMENT_CACHE_KINDS, True),
+}
+
+
+def _community_cache_tags(namespace):
+    kind = namespace.partition(":")[0]
+    return (namespace, f"kind:{kind}")
 
 
 def _community_cache_response(namespace, producer, ttl_sec=None, authenticated_user_id=None):
-    """Cache public or user-scoped read payloads briefly; writes invalidate it."""
+    """Cache public or user-scoped read payloads briefly.
+
+    Writes invalidate by tag, and concurrent misses for one key share a single
+    producer call instead of all querying the database.
+    """
     if request.args.get("invite_code"):
         return jsonify(producer())
     if request.headers.get("Authorization") and authenticated_user_id is None:
@@ -103,16 +176,16 @@ def _community_cache_response(namespace, producer, ttl_sec=None, authenticated_u
         return jsonify(producer())
     scope = f"user:{int(authenticated_user_id)}" if authenticated_user_id is not None else "public"
     key = f"{scope}:{namespace}:{request.full_path}"
-    now = time.monotonic()
-    with _COMMUNITY_PUBLIC_CACHE_LOCK:
-        cached = _COMMUNITY_PUBLIC_CACHE.get(key)
-        if cached and cached["expires_at"] > now:
-            return jsonify(cached["payload"])
-    payload = producer()
-    with _COMMUNITY_PUBLIC_CACHE_LOCK:
-        if len(_COMMUNITY_PUBLIC_CACHE) >= int(current_app.config.get("API_MICROCACHE_MAX_ITEMS", 50000)):
-            _COMMUNITY_PUBLIC_CACHE.pop(next(iter(_COMMUNITY_PUBLIC_CACHE)), None)
-        _COMMUNITY_PUBLIC_CACHE[key] = {"payload": payload, "expires_at": now + ttl}
+    stale_ttl = 0
+    if namespace == _COMMUNITY_LIST_NAMESPACE:
+        stale_ttl = int(current_app.config.get("COMMUNITY_PUBLIC_LIST_STALE_TTL_SEC", 30) or 0)
+    payload = _community_public_cache().get_or_load(
+        key,
+        producer,
+        ttl,
+        tags=_community_cache_tags(namespace),
+        stale_ttl_sec=stale_ttl,
+    )
     return jsonify(payload)
 
 
@@ -120,11 +193,28 @@ def _community_public_cache_response(namespace, producer, ttl_sec=None):
     return _community_cache_response(namespace, producer, ttl_sec)
 
 
+def _invalidate_community_cache_for_write(endpoint, tournament_id=None):
+    name = str(endpoint or "").rsplit(".", 1)[-1]
+    kinds, refresh_list = _COMMUNITY_WRITE_INVALIDATION.get(
+        name, (_COMMUNITY_TOURNAMENT_CACHE_KINDS, True)
+    )
+    if tournament_id is not None:
+        tags = [f"{kind}:{tournament_id}" for kind in kinds]
+    else:
+        tags = [f"kind:{kind}" for kind in kinds]
+    if tags:
+        _community_public_cache().invalidate_tags(*tags)
+    if refresh_list:
+        _community_public_cache().mark_stale(_COMMUNITY_LIST_NAMESPACE)
+
+
 @community_tournament_bp.after_request
 def _invalidate_community_public_cache_after_write(response):
-    if request.method != "GET" and response.status_code < 400:
-        with _COMMUNITY_PUBLIC_CACHE_LOCK:
-            _COMMUNITY_PUBLIC_CACHE.clear()
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        _invalidate_community_cache_for_write(
+            request.endpoint,
+            (request.view_args or {}).get("tournament_id"),
+        )
     return response
 
 
@@ -193,7 +283,7 @@ def get_host_program():
 @community_tournament_bp.get("/tournaments")
 def list_community_tournaments():
     try:
-        return _community_public_cache_response("tournaments", lambda: list_tournaments(request.args)), 200
+        return _community_public_cache_response(_COMMUNITY_LIST_NAMESPACE, lambda: list_tournaments(request.args)), 200
     except Exception as exc:
         return _handle_service_error(exc)
 
@@ -412,6 +502,15 @@ def process_pending_community_payment_queue():
         return _handle_service_error(exc)
 
 
+@community_tournament_bp.get("/internal/payments/webhooks/metrics")
+@_payment_cron_required
+def community_payment_webhook_queue_status():
+    try:
+        return jsonify(community_payment_webhook_queue_metrics()), 200
+    except Exception as exc:
+        return _handle_service_error(exc)
+
+
 @community_tournament_bp.post("/internal/evidence/purge-expired")
 @_payment_cron_required
 def purge_expired_community_evidence_assets():
@@ -545,6 +644,16 @@ def admin_resolve_community_match_result(tournament_id, match_id):
         return _handle_service_error(exc)
 
 
+@community_tournament_bp.post("/admin/tournaments/<uuid:tournament_id>/standings/rebuild")
+@_admin_required
+def admin_rebuild_community_standings(tournament_id):
+    try:
+        rebuilt = rebuild_tournament_standings(tournament_id)
+        return jsonify({"tournament_id": str(tournament_id), "rebuilt": rebuilt}), 200
+    except Exception as exc:
+        return _handle_service_error(exc)
+
+
 @community_tournament_bp.get("/admin/tournaments/<uuid:tournament_id>/payouts")
 @_admin_required
 def admin_list_community_payouts(tournament_id):
@@ -602,7 +711,7 @@ def upload_community_evidence(tournament_id):
 @auth_required_self(decrypt_user=True)
 def get_community_host_dashboard():
     try:
-        return jsonify(host_dashboard(g.auth_user_id)), 200
+        return jsonify(host_dashboard(g.auth_user_id, request.args)), 200
     except Exception as exc:
         return _handle_service_error(exc)
 
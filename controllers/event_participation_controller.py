@@ -7,7 +7,6 @@ from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import json
 import os
-import time
 import uuid
 from db.extensions import db
 from models.event import Event
@@ -24,13 +23,11 @@ from models.communityTournament import (
     CommunityTournamentRegistrationStatus,
     CommunityTournamentStatus,
 )
-from models.communityTournamentOperations import CommunityPaymentAttempt
 from services.community_tournament_service import (
     CommunityConflictError,
     CommunityValidationError,
     create_community_payment_attempt,
     enqueue_community_payment_webhook,
-    process_pending_community_payment_webhooks,
     record_community_registration_payment,
     register_for_tournament,
     settle_community_registration_payment,
@@ -43,13 +40,16 @@ from services.payment_service import (
     verify_webhook,
 )
 from services.firebase_service import send_notification
+from services.cache import get_cache
+from services.metrics import register_executor
 
 
 event_participation_bp = Blueprint("event_participation", __name__, url_prefix="/api")
 IST = ZoneInfo("Asia/Kolkata")
-_PUSH_EXECUTOR = ThreadPoolExecutor(max_workers=int(os.getenv("FCM_PUSH_WORKERS", "16")))
-_EVENT_PARTICIPATION_CACHE = {}
-_EVENT_PARTICIPATION_CACHE_MAX_SIZE = 5000
+_PUSH_EXECUTOR = register_executor(
+    "fcm-push", ThreadPoolExecutor(max_workers=int(os.getenv("FCM_PUSH_WORKERS", "16")))
+)
+_EVENT_PARTICIPATION_CACHE = get_cache("event-participation", max_items=5000)
 
 
 def _uuid_or_none(value):
@@ -181,9 +181,7 @@ def _invalidate_participation_cache(event_id=None, team_id=None):
     if event_id:
         prefixes.append(f"user-tournaments:")
         prefixes.append(f"user-teams:")
-    for key in list(_EVENT_PARTICIPATION_CACHE.keys()):
-        if any(key.startswith(prefix) for prefix in prefixes):
-            _EVENT_PARTICIPATION_CACHE.pop(key, None)
+    _EVENT_PARTICIPATION_CACHE.invalidate_prefixes(*prefixes)
 
 
 def _push_notification_for_user(user_id, title, message, data):
@@ -810,7 +808,9 @@ def payment_webhook():
         return jsonify({"ok": True, "registration_id": str(reg.id), "payment_status": reg.payment_status, "status": reg.status, "source": "cafe"}), 200
 
     # Razorpay may redeliver events and can send a capture before the app has
-    # completed its registration request. Persist it before responding either way.
+    # completed its registration request. Persist it and acknowledge; the
+    # webhook worker (job/community_payment_webhooks.py) reconciles it against
+    # Razorpay so a slow provider call never holds the webhook response open.
     try:
         event_payload = json.loads(payload.decode("utf-8"))
     except (TypeError, ValueError):
@@ -822,43 +822,28 @@ def payment_webhook():
         or event_payload.get("id")
         or hashlib.sha256(payload).hexdigest()
     )
+    webhook_event = None
     if webhook_details:
-        enqueue_community_payment_webhook(
+        webhook_event, _ = enqueue_community_payment_webhook(
             provider_event_id,
             webhook_details.get("event_type"),
             webhook_details,
             event_payload,
         )
 
-    community_registration = None
-    community_registration_id = _uuid_or_none(reg_id)
-    if community_registration_id:
-        community_registration = CommunityTournamentRegistration.query.filter_by(id=community_registration_id).first()
-    if not community_registration and webhook_details:
-        payment_id = webhook_details.get("payment_id")
-        order_id = webhook_details.get("order_id")
-        community_registration = CommunityTournamentRegistration.query.filter(
-            (CommunityTournamentRegistration.razorpay_order_id == order_id)
-            | (CommunityTournamentRegistration.razorpay_payment_id == payment_id)
-            | (CommunityTournamentRegistration.payment_reference == payment_id)
-        ).first()
-        if not community_registration:
-            attempt = CommunityPaymentAttempt.query.filter(
-                (CommunityPaymentAttempt.provider_order_id == order_id)
-                | (CommunityPaymentAttempt.provider_payment_id == payment_id)
-            ).first()
-            community_registration = CommunityTournamentRegistration.query.filter_by(
-                id=attempt.registration_id
-            ).first() if attempt else None
+    community_registration_id = (
+        webhook_event.registration_id if webhook_event and webhook_event.registration_id
+        else _uuid_or_none(reg_id)
+    )
+    community_registration = (
+        CommunityTournamentRegistration.query.filter_by(id=community_registration_id).first()
+        if community_registration_id else None
+    )
     if not community_registration:
-        if webhook_details:
-            process_pending_community_payment_webhooks(10)
         return jsonify({"ok": True, "queued": True, "message": "Webhook received before its community registration mapping"}), 202
-    process_pending_community_payment_webhooks(10)
-    db.session.expire_all()
-    community_registration = CommunityTournamentRegistration.query.filter_by(id=community_registration.id).first()
     return jsonify({
         "ok": True,
+        "queued": bool(webhook_event),
         "registration_id": str(community_registration.id),
         "payment_status": community_registration.payment_status,
         "status": community_registration.status,
@@ -946,10 +931,9 @@ def verify_payment():
 def get_team_members(event_id, team_id):
     cache_ttl_sec = 20
     cache_key = f"members:{event_id}:{team_id}"
-    now_ts = time.time()
     cached = _EVENT_PARTICIPATION_CACHE.get(cache_key)
-    if cached and cached["expires_at"] > now_ts:
-        return jsonify(cached["payload"]), 200
+    if cached is not None:
+        return jsonify(cached), 200
 
     row = db.session.execute(text("""
         SELECT
@@ -1044,9 +1028,7 @@ def get_team_members(event_id, team_id):
                 "joined_at": registration.created_at.isoformat() if registration.created_at else None,
             }],
         }
-        if len(_EVENT_PARTICIPATION_CACHE) >= _EVENT_PARTICIPATION_CACHE_MAX_SIZE:
-            _EVENT_PARTICIPATION_CACHE.pop(next(iter(_EVENT_PARTICIPATION_CACHE)))
-        _EVENT_PARTICIPATION_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
+        _EVENT_PARTICIPATION_CACHE.set(cache_key, payload, cache_ttl_sec)
         return jsonify(payload), 200
 
     payload = {
@@ -1068,9 +1050,7 @@ def get_team_members(event_id, team_id):
             for m in (row["members"] or [])
         ],
     }
-    if len(_EVENT_PARTICIPATION_CACHE) >= _EVENT_PARTICIPATION_CACHE_MAX_SIZE:
-        _EVENT_PARTICIPATION_CACHE.pop(next(iter(_EVENT_PARTICIPATION_CACHE)))
-    _EVENT_PARTICIPATION_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
+    _EVENT_PARTICIPATION_CACHE.set(cache_key, payload, cache_ttl_sec)
     return jsonify(payload), 200
 
 
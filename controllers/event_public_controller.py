@@ -5,16 +5,15 @@ from zoneinfo import ZoneInfo
 from db.extensions import db
 from models.event import Event
 from models.team import Team
-from services.security import decode_user, extract_bearer_token
+from services.security import decode_subject, extract_bearer_token
+from services.cache import get_cache
 import jwt
-import time
 
 
 event_public_bp = Blueprint("event_public", __name__, url_prefix="/api")
 
 IST = ZoneInfo("Asia/Kolkata")
-_EVENT_PUBLIC_CACHE = {}
-_EVENT_PUBLIC_CACHE_MAX_SIZE = 5000
+_EVENT_PUBLIC_CACHE = get_cache("event-public", max_items=5000)
 
 
 def _optional_request_user_id():
@@ -30,7 +29,7 @@ def _optional_request_user_id():
             algorithms=["HS256"],
             options={"require": ["exp", "iat", "uuid"]},
         )
-        user_id = decode_user(claims["uuid"], current_app.config["ENCRYPT_PRIVATE_KEY"])
+        user_id = decode_subject(claims["uuid"])
         return int(user_id)
     except (KeyError, TypeError, ValueError, jwt.InvalidTokenError):
         return None
@@ -79,11 +78,15 @@ def list_public_events():
     viewer_user_id = _optional_request_user_id()
     cache_ttl_sec = 60
     cache_key = f"public:{vendor_id}:{flag_filter}:{limit}:viewer:{viewer_user_id or 'anonymous'}"
-    now_ts = time.time()
-    cached = _EVENT_PUBLIC_CACHE.get(cache_key)
-    if cached and cached["expires_at"] > now_ts:
-        return jsonify(cached["payload"]), 200
+    payload = _EVENT_PUBLIC_CACHE.get_or_load(
+        cache_key,
+        lambda: _public_events_payload(vendor_id, flag_filter, limit, viewer_user_id),
+        cache_ttl_sec,
+    )
+    return jsonify(payload), 200
+
 
+def _public_events_payload(vendor_id, flag_filter, limit, viewer_user_id):
     cafe_sql = """
         SELECT
             'cafe' AS source,
@@ -225,11 +228,7 @@ def list_public_events():
         for r in rows
     ]
 
-    if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-        _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-    _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
-
-    return jsonify(payload), 200
+    return payload
 
 
 @event_public_bp.get("/gamers/<int:user_id>/profile")
@@ -316,10 +315,9 @@ def get_event(event_id):
     viewer_user_id = _optional_request_user_id()
     cache_ttl_sec = 60
     cache_key = f"event:{event_id}:viewer:{viewer_user_id or 'anonymous'}"
-    now_ts = time.time()
     cached = _EVENT_PUBLIC_CACHE.get(cache_key)
-    if cached and cached["expires_at"] > now_ts:
-        return jsonify(cached["payload"]), 200
+    if cached is not None:
+        return jsonify(cached), 200
 
     row = db.session.execute(text("""
         SELECT
@@ -462,9 +460,7 @@ def get_event(event_id):
         "banner_image_url": row["banner_image_url"],
         "flag": row["flag"],
     }
-    if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-        _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-    _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
+    _EVENT_PUBLIC_CACHE.set(cache_key, payload, cache_ttl_sec)
     return jsonify(payload), 200
 
 
@@ -484,11 +480,15 @@ def get_event_leaderboard(event_id):
 
     cache_ttl_sec = 60
     cache_key = f"leaderboard:{event_id}:{stage}"
-    now_ts = time.time()
-    cached = _EVENT_PUBLIC_CACHE.get(cache_key)
-    if cached and cached["expires_at"] > now_ts:
-        return jsonify(cached["payload"]), 200
+    payload = _EVENT_PUBLIC_CACHE.get_or_load(
+        cache_key,
+        lambda: _event_leaderboard_payload(event_id, stage),
+        cache_ttl_sec,
+    )
+    return jsonify(payload), 200
+
 
+def _event_leaderboard_payload(event_id, stage):
     e = Event.query.filter_by(id=event_id, visibility=True).first()
     if not e:
         community_tournament = db.session.execute(
@@ -511,10 +511,7 @@ def get_event_leaderboard(event_id):
                 "availability": "not_available_yet",
                 "leaderboard": [],
             }
-            if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-                _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-            _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
-            return jsonify(payload), 200
+            return payload
 
         def _fetch_community_winners():
             return db.session.execute(
@@ -613,10 +610,7 @@ def get_event_leaderboard(event_id):
             "availability": "available" if leaderboard else "not_available_yet",
             "leaderboard": leaderboard,
         }
-        if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-            _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-        _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
-        return jsonify(payload), 200
+        return payload
 
     def _fetch_rows(table_name, rank_column):
         sql = text(f"""
@@ -662,10 +656,7 @@ def get_event_leaderboard(event_id):
             for r in rows
         ]
     }
-    if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-        _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-    _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
-    return jsonify(payload), 200
+    return payload
 
 
 @event_public_bp.get("/events/<uuid:event_id>/results/provisional")
@@ -676,10 +667,9 @@ def get_event_provisional_results(event_id):
     """
     cache_ttl_sec = 60
     cache_key = f"provisional:{event_id}"
-    now_ts = time.time()
     cached = _EVENT_PUBLIC_CACHE.get(cache_key)
-    if cached and cached["expires_at"] > now_ts:
-        return jsonify(cached["payload"]), 200
+    if cached is not None:
+        return jsonify(cached), 200
 
     e = Event.query.filter_by(id=event_id, visibility=True).first()
     if not e:
@@ -744,9 +734,7 @@ def get_event_provisional_results(event_id):
                 for r in rows
             ]
         }
-        if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-            _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-        _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
+        _EVENT_PUBLIC_CACHE.set(cache_key, payload, cache_ttl_sec)
         return jsonify(payload), 200
 
     rows = db.session.execute(
@@ -785,7 +773,5 @@ def get_event_provisional_results(event_id):
             for r in rows
         ]
     }
-    if len(_EVENT_PUBLIC_CACHE) >= _EVENT_PUBLIC_CACHE_MAX_SIZE:
-        _EVENT_PUBLIC_CACHE.pop(next(iter(_EVENT_PUBLIC_CACHE)))
-    _EVENT_PUBLIC_CACHE[cache_key] = {"payload": payload, "expires_at": now_ts + cache_ttl_sec}
+    _EVENT_PUBLIC_CACHE.set(cache_key, payload, cache_ttl_sec)
     return jsonify(payload), 200
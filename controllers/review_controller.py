@@ -8,31 +8,20 @@ from db.extensions import db
 from models.cafeReview import CafeReview
 from models.user import User
 from services.security import auth_required_self
+from services.cache import get_cache
 
 review_blueprint = Blueprint("reviews", __name__)
 
 EDIT_WINDOW_HOURS = 24
-_REVIEW_CACHE = {}
-_REVIEW_CACHE_MAX_SIZE = 20000
+_REVIEW_CACHE = get_cache("reviews", max_items=20000)
 
 
 def _review_cache_get(cache_key):
-    item = _REVIEW_CACHE.get(cache_key)
-    if not item:
-        return None
-    if item["expires_at"] <= datetime.now(timezone.utc).timestamp():
-        _REVIEW_CACHE.pop(cache_key, None)
-        return None
-    return item["payload"]
+    return _REVIEW_CACHE.get(cache_key)
 
 
 def _review_cache_set(cache_key, payload, ttl_sec):
-    if len(_REVIEW_CACHE) >= _REVIEW_CACHE_MAX_SIZE:
-        _REVIEW_CACHE.pop(next(iter(_REVIEW_CACHE)), None)
-    _REVIEW_CACHE[cache_key] = {
-        "payload": payload,
-        "expires_at": datetime.now(timezone.utc).timestamp() + max(int(ttl_sec or 0), 1),
-    }
+    _REVIEW_CACHE.set(cache_key, payload, max(int(ttl_sec or 0), 1))
 
 
 def _internal_authorized() -> bool:
@@ -1,16 +1,22 @@
-from flask import request, jsonify, Blueprint, current_app, g
-from sqlalchemy import text, func
+from flask import request, jsonify, Blueprint, current_app, g, Response, abort, stream_with_context
+from sqlalchemy import DateTime, Float, String, and_, cast, func, literal, or_, select, text, tuple_, type_coerce, union_all
 from services.user_service import UserService
 from models.userHashCoin import UserHashCoin
 from services.referral_service import create_voucher_if_eligible
 from services.firebase_service import notify_user_all_tokens
+from db.dialect import insert_for_dialect
 from db.extensions import db
 from models.hashWallet import HashWallet
 from models.fcmToken import FCMToken
 from models.user import User
 from models.userDeletionArchive import UserDeletionArchive
 from models.hashWalletTransaction import HashWalletTransaction
-from services.firebase_service import send_notification, send_notification_with_result
+from services.firebase_service import (
+    FCM_MULTICAST_LIMIT,
+    is_permanent_token_error,
+    send_multicast_with_results,
+    send_notification,
+)
 from models.vendor import Vendor
 from models.cafePass import CafePass
 from models.passType import PassType
@@ -32,10 +38,16 @@ from models.notificationDispatch import NotificationDispatchJob, NotificationDis
 
 from models.voucher import Voucher
 
-from services.security import encode_user, auth_required_self, invalidate_user_auth_status
+from services.security import encode_subject, auth_required_self, invalidate_user_auth_status
+from services.cache import cache_stats, get_cache
+from services.pass_catalog import available_passes, available_passes_for_user
+from services.metrics import register_executor
 
 import jwt
 import hmac
+import base64
+import binascii
+import json
 import hashlib
 
 from datetime import datetime, timedelta
@@ -43,71 +55,77 @@ import time
 import uuid
 import re
 from threading import Lock
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 import os
 
 from job.daily_notifier import generate_notification, is_within_time_window
 
 user_blueprint = Blueprint('user', __name__)
-_USER_FID_CACHE = {}
-_USER_FID_CACHE_MAX_SIZE = 10000
-_USER_CACHE = {}
-_USER_CACHE_MAX_SIZE = 10000
-_USER_SEARCH_CACHE = {}
-_USER_SEARCH_CACHE_MAX_SIZE = 20000
-_USER_PHONE_CACHE = {}
-_USER_PHONE_CACHE_MAX_SIZE = 20000
-_USER_FID_AUTH_CACHE = {}
-_USER_FID_AUTH_CACHE_MAX_SIZE = 20000
-_USER_FID_MISS_CACHE = {}
-_USER_FID_MISS_CACHE_MAX_SIZE = 20000
-_USER_FID_CACHE_LOCK = Lock()
-_USER_FID_AUTH_CACHE_LOCK = Lock()
-_API_MICROCACHE = {}
-_API_MICROCACHE_LOCK = Lock()
+_USER_FID_CACHE = get_cache("user-fid", max_items=10000)
+_USER_CACHE = get_cache("user", max_items=10000)
+_USER_SEARCH_CACHE = get_cache("user-search", max_items=20000)
+_USER_PHONE_CACHE = get_cache("user-phone", max_items=20000)
+_USER_FID_AUTH_CACHE = get_cache("user-fid-auth", max_items=20000)
+_USER_FID_MISS_CACHE = get_cache("user-fid-miss", max_items=20000)
+_API_MICROCACHE = get_cache(
+    "api-microcache",
+    max_items=int(os.getenv("API_MICROCACHE_MAX_ITEMS", "50000") or 50000),
+    max_bytes=int(os.getenv("API_MICROCACHE_MAX_BYTES", str(256 * 1024 * 1024)) or 0),
+)
 
 _GAME_USERNAME_RE = re.compile(r"^[A-Za-z0-9_.-]{3,32}$")
 _EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
 _FID_RE = re.compile(r"^[A-Za-z0-9:_\-]{6,255}$")
-_NOTIFICATION_JOB_EXECUTOR = ThreadPoolExecutor(
+_NOTIFICATION_JOB_EXECUTOR = register_executor("notification-dispatch", ThreadPoolExecutor(
     max_workers=int(os.getenv("NOTIFICATION_JOB_WORKERS", "2")),
     thread_name_prefix="notif-dispatch",
+))
+# One FCM multicast call carries up to FCM_MULTICAST_LIMIT tokens; each job
+# keeps at most NOTIFICATION_FCM_BATCH_CONCURRENCY of them in flight.
+_NOTIFICATION_FCM_BATCH_SIZE = min(
+    FCM_MULTICAST_LIMIT, max(1, int(os.getenv("NOTIFICATION_FCM_BATCH_SIZE", "500") or 500))
 )
+_NOTIFICATION_FCM_BATCH_CONCURRENCY = max(1, int(os.getenv("NOTIFICATION_FCM_BATCH_CONCURRENCY", "4") or 4))
+# A running job commits a checkpoint after every batch; one that has not
+# written for this long is assumed dead and may be resumed.
+_NOTIFICATION_JOB_STALE_AFTER = timedelta(minutes=10)
 _NOTIF_TABLES_READY = False
 _NOTIF_TABLES_LOCK = Lock()
 
 
+def _microcache_user_tag(namespace, user_id):
+    return f"{namespace}|u:{int(user_id)}"
+
+
+def _microcache_key_tags(cache_key):
+    """Keys look like ``<namespace>|u:<user_id>|q:<query>``; tag them by namespace and user."""
+    namespace, _, rest = str(cache_key).partition("|")
+    if not rest.startswith("u:"):
+        return ()
+    user_part = rest[2:].split("|", 1)[0]
+    return (f"{namespace}|u:{user_part}",)
+
+
 def _microcache_get(cache_key):
-    now_ts = time.time()
-    with _API_MICROCACHE_LOCK:
-        item = _API_MICROCACHE.get(cache_key)
-        if not item:
-            return None
-        if item["expires_at"] <= now_ts:
-            _API_MICROCACHE.pop(cache_key, None)
-            return None
-        return item["payload"]
+    return _API_MICROCACHE.get(cache_key)
 
 
 def _microcache_set(cache_key, payload, ttl_sec):
-    now_ts = time.time()
-    max_items = int(current_app.config.get("API_MICROCACHE_MAX_ITEMS", 50000))
-    ttl = max(int(ttl_sec or 0), 1)
-    with _API_MICROCACHE_LOCK:
-        if len(_API_MICROCACHE) >= max_items:
-            _API_MICROCACHE.pop(next(iter(_API_MICROCACHE)), None)
-        _API_MICROCACHE[cache_key] = {"payload": payload, "expires_at": now_ts + ttl}
+    _API_MICROCACHE.set(
+        cache_key,
+        payload,
+        max(int(ttl_sec or 0), 1),
+        tags=_microcache_key_tags(cache_key),
+    )
 
 
 def _invalidate_user_microcache(user_id, prefixes):
-    uid = int(user_id)
-    with _API_MICROCACHE_LOCK:
-        stale_keys = [
-            key for key in _API_MICROCACHE.keys()
-            if f"|u:{uid}|" in key and any(key.startswith(prefix) for prefix in prefixes)
-        ]
-        for key in stale_keys:
-            _API_MICROCACHE.pop(key, None)
+    """Drop the user's entries in each namespace; ``prefixes`` name namespaces, "|" optional."""
+    _API_MICROCACHE.invalidate_tags(*(
+        _microcache_user_tag(str(prefix).rstrip("|"), user_id)
+        for prefix in prefixes
+    ))
 
 
 def _ensure_hash_wallet_row(user_id: int):
@@ -305,29 +323,19 @@ def _build_auth_response_for_fid(user_fid: str, user_payload: dict = None):
     if not fid:
         return None, None, "user_fid is required"
 
-    now_ts = time.time()
     if user_payload is None:
         user_payload = UserService.get_user_auth_payload_by_fid(fid)
         if not user_payload:
             return None, None, "User not found"
 
     cache_ttl_sec = int(current_app.config.get("USER_FID_CACHE_TTL_SEC", 30))
-    with _USER_FID_CACHE_LOCK:
-        if len(_USER_FID_CACHE) >= _USER_FID_CACHE_MAX_SIZE:
-            _USER_FID_CACHE.pop(next(iter(_USER_FID_CACHE)))
-        _USER_FID_CACHE[fid] = {
-            "payload": user_payload,
-            "expires_at": now_ts + cache_ttl_sec,
-        }
-        _USER_FID_MISS_CACHE.pop(fid, None)
+    _USER_FID_CACHE.set(fid, user_payload, cache_ttl_sec)
+    _USER_FID_MISS_CACHE.pop(fid, None)
 
     token_ttl_hours = int(current_app.config.get("USER_FID_AUTH_TOKEN_TTL_HOURS", 2))
     token_ttl_hours = max(1, min(token_ttl_hours, 24))
     now_utc = datetime.utcnow()
-    encoded_user_id = encode_user(
-        user_payload["id"],
-        current_app.config['ENCRYPT_PUBLIC_KEY']
-    )
+    encoded_user_id = encode_subject(user_payload["id"])
     token_payload = {
         "uid": encoded_user_id,
         "uuid": encoded_user_id,
@@ -351,14 +359,11 @@ def _build_auth_response_for_fid(user_fid: str, user_payload: dict = None):
     response_payload = {"user": user_payload, "token": custom_jwt}
 
     auth_cache_ttl_sec = int(current_app.config.get("USER_FID_AUTH_RESPONSE_CACHE_TTL_SEC", 20))
-    with _USER_FID_AUTH_CACHE_LOCK:
-        if len(_USER_FID_AUTH_CACHE) >= _USER_FID_AUTH_CACHE_MAX_SIZE:
-            _USER_FID_AUTH_CACHE.pop(next(iter(_USER_FID_AUTH_CACHE)))
-        _USER_FID_AUTH_CACHE[fid] = {
-            "payload": response_payload,
-            "token": custom_jwt,
-            "expires_at": now_ts + auth_cache_ttl_sec,
-        }
+    _USER_FID_AUTH_CACHE.set(
+        fid,
+        {"payload": response_payload, "token": custom_jwt},
+        auth_cache_ttl_sec,
+    )
 
     return response_payload, custom_jwt, None
 
@@ -367,15 +372,10 @@ def _invalidate_fid_caches(*fids):
     keys = [str(fid or "").strip() for fid in fids if str(fid or "").strip()]
     if not keys:
         return
-    with _USER_FID_CACHE_LOCK:
-        for fid in keys:
-            _USER_FID_CACHE.pop(fid, None)
-    with _USER_FID_AUTH_CACHE_LOCK:
-        for fid in keys:
-            _USER_FID_AUTH_CACHE.pop(fid, None)
-    with _USER_FID_CACHE_LOCK:
-        for fid in keys:
-            _USER_FID_MISS_CACHE.pop(fid, None)
+    for fid in keys:
+        _USER_FID_CACHE.pop(fid, None)
+        _USER_FID_AUTH_CACHE.pop(fid, None)
+        _USER_FID_MISS_CACHE.pop(fid, None)
 
 
 def _find_existing_user_fid_by_email(email: str):
@@ -643,27 +643,138 @@ def _ensure_notification_tracking_tables():
         _NOTIF_TABLES_READY = True
 
 
-def _upsert_notification_failure(token: str, job_id: int, exc: Exception):
-    error_type = type(exc).__name__
-    error_message = str(exc)
-    row = NotificationDispatchFailure.query.filter_by(token=token).first()
-    if row:
-        row.failure_count = int(row.failure_count or 0) + 1
-        row.error_type = error_type
-        row.error_message = error_message
-        row.last_failed_at = datetime.utcnow()
-        row.last_job_id = int(job_id)
-        row.is_blocked = True
-    else:
-        row = NotificationDispatchFailure(
-            token=token,
-            error_type=error_type,
-            error_message=error_message,
-            failure_count=1,
-            is_blocked=True,
-            last_job_id=int(job_id),
+def _flush_notification_failures(failures, job_id: int):
+    """
+    Record failed sends with a single executemany upsert; the caller commits.
+    `failures` holds (token, exception) pairs. Only tokens FCM rejected as
+    unregistered or invalid are blocked, so a transient per-token error is
+    counted without dropping the device from later dispatches.
+    """
+    if not failures:
+        return
+    now = datetime.utcnow()
+    rows = {}
+    for token, exc in failures:
+        # ON CONFLICT cannot touch the same row twice in one statement.
+        rows[token] = {
+            "token": token,
+            "error_type": type(exc).__name__,
+            "error_message": str(exc),
+            "failure_count": 1,
+            "is_blocked": is_permanent_token_error(exc),
+            "first_failed_at": now,
+            "last_failed_at": now,
+            "last_job_id": int(job_id),
+        }
+    table = NotificationDispatchFailure.__table__
+    statement = insert_for_dialect(NotificationDispatchFailure.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.token],
+        set_={
+            "failure_count": table.c.failure_count + 1,
+            "error_type": statement.excluded.error_type,
+            "error_message": statement.excluded.error_message,
+            "last_failed_at": statement.excluded.last_failed_at,
+            "last_job_id": statement.excluded.last_job_id,
+            "is_blocked": or_(table.c.is_blocked, statement.excluded.is_blocked),
+        },
+    )
+    # executemany: SQLAlchemy sends these as multi-row VALUES batches.
+    db.session.execute(statement, list(rows.values()))
+
+
+def _dispatch_token_filter(exclude_blocked: bool):
+    conditions = [FCMToken.token.isnot(None), func.length(func.trim(FCMToken.token)) > 0]
+    if exclude_blocked:
+        blocked = (
+            db.session.query(NotificationDispatchFailure.id)
+            .filter(
+                NotificationDispatchFailure.token == FCMToken.token,
+                NotificationDispatchFailure.is_blocked.is_(True),
+            )
+            .exists()
         )
-        db.session.add(row)
+        conditions.append(~blocked)
+    return conditions
+
+
+def _iter_dispatch_token_batches(after_id, exclude_blocked: bool, batch_size: int):
+    """
+    Yield lists of (token_id, token) in id order, one keyset page per FCM batch.
+    Blocked tokens are dropped by an anti-join, so only one page is held here.
+    """
+    cursor = int(after_id or 0)
+    conditions = _dispatch_token_filter(exclude_blocked)
+    while True:
+        rows = (
+            db.session.query(FCMToken.id, FCMToken.token)
+            .filter(FCMToken.id > cursor, *conditions)
+            .order_by(FCMToken.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return
+        cursor = int(rows[-1][0])
+        yield [(int(row[0]), str(row[1]).strip()) for row in rows]
+
+
+def _count_dispatch_tokens():
+    """Return (tokens_found, tokens_blocked) without loading any token."""
+    found, blocked = (
+        db.session.query(func.count(FCMToken.id), func.count(NotificationDispatchFailure.id))
+        .select_from(FCMToken)
+        .outerjoin(
+            NotificationDispatchFailure,
+            (NotificationDispatchFailure.token == FCMToken.token)
+            & NotificationDispatchFailure.is_blocked.is_(True),
+        )
+        .filter(*_dispatch_token_filter(False))
+        .one()
+    )
+    return int(found or 0), int(blocked or 0)
+
+
+def _send_notification_batches(job, batches):
+    """
+    Send (token_id, token) batches through FCM multicast on a bounded pool.
+
+    `batches` is consumed lazily: the job thread reads the next keyset page only
+    once fewer than _NOTIFICATION_FCM_BATCH_CONCURRENCY batches are in flight,
+    so memory stays flat however many devices are registered. Results are
+    applied in submission order, so the committed checkpoint never moves past a
+    token whose outcome has not been recorded.
+    """
+    title = job.notification_title or "Notification"
+    message = job.notification_message or "You have a new message!"
+    in_flight = deque()
+
+    def apply_next():
+        future, last_token_id = in_flight.popleft()
+        failures = []
+        for token, ok, err in future.result():
+            if ok:
+                job.sent = int(job.sent or 0) + 1
+            else:
+                failures.append((token, err or Exception("Unknown send error")))
+        job.failed = int(job.failed or 0) + len(failures)
+        # Same transaction as the checkpoint, so a resumed job never counts
+        # a failure twice.
+        _flush_notification_failures(failures, int(job.id))
+        job.checkpoint_token_id = int(last_token_id)
+        db.session.commit()
+
+    with ThreadPoolExecutor(
+        max_workers=_NOTIFICATION_FCM_BATCH_CONCURRENCY,
+        thread_name_prefix="notif-fcm",
+    ) as pool:
+        for batch in batches:
+            future = pool.submit(send_multicast_with_results, [token for _, token in batch], title, message)
+            in_flight.append((future, batch[-1][0]))
+            if len(in_flight) >= _NOTIFICATION_FCM_BATCH_CONCURRENCY:
+                apply_next()
+        while in_flight:
+            apply_next()
 
 
 def _run_notification_dispatch_job(app_obj, job_id: int):
@@ -674,10 +785,17 @@ def _run_notification_dispatch_job(app_obj, job_id: int):
             if not job:
                 return
 
+            resuming = job.checkpoint_token_id is not None
             job.status = "running"
-            job.started_at = datetime.utcnow()
+            job.started_at = job.started_at if resuming else datetime.utcnow()
+            job.completed_at = None
+            job.error_message = None
             db.session.commit()
-            current_app.logger.info("notification_job_started job_id=%s", job.id)
+            current_app.logger.info(
+                "notification_job_started job_id=%s resume_after_token_id=%s",
+                job.id,
+                job.checkpoint_token_id,
+            )
 
             if (not job.force) and (not is_within_time_window()):
                 job.status = "completed"
@@ -686,23 +804,8 @@ def _run_notification_dispatch_job(app_obj, job_id: int):
                 db.session.commit()
                 return
 
-            tokens_rows = (
-                db.session.query(FCMToken.token)
-                .filter(FCMToken.token.isnot(None))
-                .all()
-            )
-            token_list = [str(row[0]).strip() for row in tokens_rows if str(row[0] or "").strip()]
-            job.tokens_found = len(token_list)
-
-            blocked_tokens = set()
-            if not job.retry_failed:
-                blocked_rows = (
-                    db.session.query(NotificationDispatchFailure.token)
-                    .filter(NotificationDispatchFailure.is_blocked.is_(True))
-                    .all()
-                )
-                blocked_tokens = {str(row[0]).strip() for row in blocked_rows if str(row[0] or "").strip()}
-            job.tokens_blocked = len([t for t in token_list if t in blocked_tokens])
+            if not resuming:
+                job.tokens_found, job.tokens_blocked = _count_dispatch_tokens()
 
             if not job.notification_title or not job.notification_message:
                 generated = generate_notification()
@@ -717,33 +820,29 @@ def _run_notification_dispatch_job(app_obj, job_id: int):
                 current_app.logger.info("notification_job_completed job_id=%s dry_run=true", job.id)
                 return
 
-            send_targets = [token for token in token_list if token not in blocked_tokens]
-            job.tokens_attempted = len(send_targets)
+            if not resuming:
+                job.tokens_attempted = job.tokens_found - (0 if job.retry_failed else job.tokens_blocked)
+                job.sent = 0
+                job.failed = 0
+            db.session.commit()
 
-            sent = 0
-            failed = 0
-            for token in send_targets:
-                ok, _, err = send_notification_with_result(
-                    token,
-                    job.notification_title or "Notification",
-                    job.notification_message or "You have a new message!",
-                )
-                if ok:
-                    sent += 1
-                else:
-                    failed += 1
-                    _upsert_notification_failure(token, int(job.id), err or Exception("Unknown send error"))
+            _send_notification_batches(
+                job,
+                _iter_dispatch_token_batches(
+                    job.checkpoint_token_id,
+                    exclude_blocked=not job.retry_failed,
+                    batch_size=_NOTIFICATION_FCM_BATCH_SIZE,
+                ),
+            )
 
-            job.sent = sent
-            job.failed = failed
             job.status = "completed"
             job.completed_at = datetime.utcnow()
             db.session.commit()
             current_app.logger.info(
                 "notification_job_completed job_id=%s sent=%s failed=%s blocked=%s attempted=%s",
                 job.id,
-                sent,
-                failed,
+                job.sent,
+                job.failed,
                 job.tokens_blocked,
                 job.tokens_attempted,
             )
@@ -826,6 +925,41 @@ def get_notification_dispatch_job(job_id):
     return jsonify({"success": True, "job": job.to_dict()}), 200
 
 
+@user_blueprint.route("/cron/notifications/jobs/<int:job_id>/resume", methods=["POST"])
+def resume_notification_dispatch_job(job_id):
+    if not _is_valid_cron_request():
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+    _ensure_notification_tracking_tables()
+    job = NotificationDispatchJob.query.get(int(job_id))
+    if not job:
+        return jsonify({"success": False, "message": "Job not found"}), 404
+    stale = job.updated_at and job.updated_at <= datetime.utcnow() - _NOTIFICATION_JOB_STALE_AFTER
+    if job.status == "completed" or (job.status in ("queued", "running") and not stale):
+        return jsonify({"success": False, "message": f"Job is {job.status}", "job": job.to_dict()}), 409
+    job.status = "queued"
+    db.session.commit()
+    app_obj = current_app._get_current_object()
+    _NOTIFICATION_JOB_EXECUTOR.submit(_run_notification_dispatch_job, app_obj, int(job.id))
+    current_app.logger.info(
+        "notification_job_resumed job_id=%s after_token_id=%s", job.id, job.checkpoint_token_id
+    )
+    return jsonify({
+        "success": True,
+        "queued": True,
+        "job_id": int(job.id),
+        "resume_after_token_id": job.checkpoint_token_id,
+        "status_url": f"/api/cron/notifications/jobs/{int(job.id)}",
+    }), 202
+
+
+@user_blueprint.route("/cron/cache/stats", methods=["GET"])
+def cron_cache_stats():
+    """Per-namespace size and hit ratio for this worker's caches, for TTL tuning."""
+    if not _is_valid_cron_request():
+        return jsonify({"success": False, "message": "Unauthorized"}), 401
+    return jsonify({"success": True, "pid": os.getpid(), "caches": cache_stats()}), 200
+
+
 @user_blueprint.route("/cron/notifications/failures", methods=["GET"])
 def list_notification_dispatch_failures():
     if not _is_valid_cron_request():
@@ -1043,12 +1177,7 @@ def create_user():
             return jsonify(result), status_code
 
         user_payload = result.to_dict()
-        if len(_USER_CACHE) >= _USER_CACHE_MAX_SIZE:
-            _USER_CACHE.pop(next(iter(_USER_CACHE)))
-        _USER_CACHE[result.id] = {
-            "payload": user_payload,
-            "expires_at": time.time() + int(current_app.config.get("USER_CACHE_TTL_SEC", 15)),
-        }
+        _USER_CACHE.set(result.id, user_payload, int(current_app.config.get("USER_CACHE_TTL_SEC", 15)))
 
         return jsonify({"message": "User created successfully", "user": user_payload}), 201
     except Exception:
@@ -1143,7 +1272,8 @@ def delete_user_id():
                 UPDATE users
                 SET deleted_at = :deleted_at,
                     purge_after = :purge_after,
-                    deletion_status = 'pending_purge'
+                    deletion_status = 'pending_purge',
+                    deletion_changed_at = now()
                 WHERE id = :user_id
                 """
             ),
@@ -1192,7 +1322,8 @@ def restore_deleted_user():
             return jsonify({"message": "The restore window has expired"}), 409
         db.session.execute(text("""
             UPDATE users
-            SET deleted_at = NULL, purge_after = NULL, deletion_status = NULL
+            SET deleted_at = NULL, purge_after = NULL, deletion_status = NULL,
+                deletion_changed_at = now()
             WHERE id = :user_id
         """), {"user_id": user_id})
         db.session.commit()
@@ -1320,21 +1451,15 @@ def get_user():
     try:
         cache_ttl_sec = int(current_app.config.get("USER_CACHE_TTL_SEC", 15))
         cached = _USER_CACHE.get(user_id)
-        now_ts = time.time()
-        if cached and cached["expires_at"] > now_ts:
-            return jsonify({"user": cached["payload"]}), 200
+        if cached is not None:
+            return jsonify({"user": cached}), 200
 
         user = UserService.get_user(user_id)
         if not user:
             return jsonify({"message": "User not found"}), 404
 
         user_payload = user.to_dict()
-        if len(_USER_CACHE) >= _USER_CACHE_MAX_SIZE:
-            _USER_CACHE.pop(next(iter(_USER_CACHE)))
-        _USER_CACHE[user_id] = {
-            "payload": user_payload,
-            "expires_at": now_ts + cache_ttl_sec,
-        }
+        _USER_CACHE.set(user_id, user_payload, cache_ttl_sec)
         return jsonify({"user": user_payload}), 200
     except Exception:
         current_app.logger.exception("Get user failed for user_id=%s", user_id)
@@ -1377,13 +1502,12 @@ def get_registered_phone_status():
     user_id = g.auth_user_id
     started = time.perf_counter()
     cache_ttl_sec = int(current_app.config.get("USER_PHONE_CACHE_TTL_SEC", 30))
-    now_ts = time.time()
     cache_key = int(user_id)
 
     try:
         cached = _USER_PHONE_CACHE.get(cache_key)
-        if cached and cached["expires_at"] > now_ts:
-            response = jsonify(cached["payload"])
+        if cached is not None:
+            response = jsonify(cached)
             response.headers["Cache-Control"] = "no-store"
             return response, 200
 
@@ -1403,12 +1527,7 @@ def get_registered_phone_status():
             "phone": phone if phone else None,
         }
 
-        if len(_USER_PHONE_CACHE) >= _USER_PHONE_CACHE_MAX_SIZE:
-            _USER_PHONE_CACHE.pop(next(iter(_USER_PHONE_CACHE)))
-        _USER_PHONE_CACHE[cache_key] = {
-            "payload": payload,
-            "expires_at": now_ts + cache_ttl_sec,
-        }
+        _USER_PHONE_CACHE.set(cache_key, payload, cache_ttl_sec)
 
         response = jsonify(payload)
         response.headers["Cache-Control"] = "no-store"
@@ -1517,44 +1636,30 @@ def get_user_by_fid_auth(user_fid):
         if not _FID_RE.match(user_fid):
             return jsonify({'message': 'invalid user_fid format'}), 400
 
-        now_ts = time.time()
-        auth_cache_ttl_sec = int(current_app.config.get("USER_FID_AUTH_RESPONSE_CACHE_TTL_SEC", 20))
-        with _USER_FID_AUTH_CACHE_LOCK:
-            cached_auth = _USER_FID_AUTH_CACHE.get(user_fid)
-        if cached_auth and cached_auth["expires_at"] > now_ts:
+        cached_auth = _USER_FID_AUTH_CACHE.get(user_fid)
+        if cached_auth is not None:
             response = jsonify(cached_auth["payload"])
             response.headers['Authorization'] = f"Bearer {cached_auth['token']}"
             response.headers['Cache-Control'] = 'no-store'
             return response, 200
 
         miss_cache_ttl_sec = int(current_app.config.get("USER_FID_MISS_CACHE_TTL_SEC", 45))
-        with _USER_FID_CACHE_LOCK:
-            cached_miss = _USER_FID_MISS_CACHE.get(user_fid)
-        if cached_miss and cached_miss["expires_at"] > now_ts:
+        if _USER_FID_MISS_CACHE.get(user_fid):
             return jsonify({'message': 'User not found'}), 404
 
         cache_ttl_sec = int(current_app.config.get("USER_FID_CACHE_TTL_SEC", 30))
-        with _USER_FID_CACHE_LOCK:
-            cached = _USER_FID_CACHE.get(user_fid)
-        if cached and cached["expires_at"] > now_ts:
-            user_payload = cached["payload"]
-        else:
-            user_payload = UserService.get_user_auth_payload_by_fid(user_fid)
-            if not user_payload:
-                with _USER_FID_CACHE_LOCK:
-                    if len(_USER_FID_MISS_CACHE) >= _USER_FID_MISS_CACHE_MAX_SIZE:
-                        _USER_FID_MISS_CACHE.pop(next(iter(_USER_FID_MISS_CACHE)))
-                    _USER_FID_MISS_CACHE[user_fid] = {
-                        "expires_at": now_ts + miss_cache_ttl_sec,
-                    }
-                return jsonify({'message': 'User not found'}), 404
-            with _USER_FID_CACHE_LOCK:
-                if len(_USER_FID_CACHE) >= _USER_FID_CACHE_MAX_SIZE:
-                    _USER_FID_CACHE.pop(next(iter(_USER_FID_CACHE)))
-                _USER_FID_CACHE[user_fid] = {
-                    "payload": user_payload,
-                    "expires_at": now_ts + cache_ttl_sec,
-                }
+
+        def _load_user_payload():
+            payload = UserService.get_user_auth_payload_by_fid(user_fid)
+            if not payload:
+                _USER_FID_MISS_CACHE.set(user_fid, True, miss_cache_ttl_sec)
+                return None
+            return payload
+
+        # Concurrent logins for the same fid share one DB lookup.
+        user_payload = _USER_FID_CACHE.get_or_load(user_fid, _load_user_payload, cache_ttl_sec)
+        if not user_payload:
+            return jsonify({'message': 'User not found'}), 404
 
         response_payload, custom_jwt, build_err = _build_auth_response_for_fid(user_fid, user_payload=user_payload)
         if not response_payload or not custom_jwt:
@@ -1613,12 +1718,11 @@ def search_users():
         # For typeahead, this avoids expensive lower()/count scans on each keystroke.
         offset = (page - 1) * limit
         auth_user_id = g.auth_user_id
-        now_ts = time.time()
         cache_ttl_sec = int(current_app.config.get("USER_SEARCH_CACHE_TTL_SEC", 10))
         cache_key = f"{auth_user_id}|{q}|{limit}|{page}|{int(include_count)}"
         cached = _USER_SEARCH_CACHE.get(cache_key)
-        if cached and cached["expires_at"] > now_ts:
-            return jsonify(cached["payload"]), 200
+        if cached is not None:
+            return jsonify(cached), 200
 
         q_prefix = q
         q_prefix_hi = f"{q_prefix}\uffff"
@@ -1709,12 +1813,7 @@ def search_users():
         else:
             payload["count"] = None
 
-        if len(_USER_SEARCH_CACHE) >= _USER_SEARCH_CACHE_MAX_SIZE:
-            _USER_SEARCH_CACHE.pop(next(iter(_USER_SEARCH_CACHE)))
-        _USER_SEARCH_CACHE[cache_key] = {
-            "payload": payload,
-            "expires_at": now_ts + cache_ttl_sec,
-        }
+        _USER_SEARCH_CACHE.set(cache_key, payload, cache_ttl_sec)
 
         return jsonify(payload), 200
     except Exception:
@@ -2037,8 +2136,6 @@ def user_purchase_pass():
 
         db.session.commit()
         _invalidate_user_microcache(user_id, [
-            "user-available-passes",
-            "user-all-passes",
             "user-passes",
             "user-passes-history",
             "users-transactions",
@@ -2060,48 +2157,176 @@ def user_purchase_pass():
             "details": str(e)
         }), 500
 
+_TRANSACTION_FEED_DEFAULT_LIMIT = 50
+_TRANSACTION_FEED_MAX_LIMIT = 200
+
+
+def _encode_transaction_cursor(ts, source, row_id):
+    raw = json.dumps([ts.isoformat(), source, int(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_transaction_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        ts, source, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if source not in ("txn", "wallet"):
+            raise ValueError(source)
+        return datetime.fromisoformat(ts), source, int(row_id)
+    except (ValueError, TypeError, UnicodeError, binascii.Error):
+        raise ValueError("invalid cursor")
+
+
+def _transaction_feed_branch(source, ts, key_columns, id_column, cursor):
+    """
+    One side of the merged feed: the next rows after ``cursor`` in
+    (ts DESC, source DESC, id DESC) order. ``key_columns`` spell ts the way
+    the (user_id, ..., id DESC) index stores it, so the predicate is a row
+    comparison the index can seek on.
+    """
+    conditions = []
+    if cursor is not None:
+        cursor_ts, cursor_source, cursor_id = cursor
+        cursor_key = (cursor_ts.date(), cursor_ts.time()) if len(key_columns) == 2 else (cursor_ts,)
+        if source == cursor_source:
+            conditions.append(tuple_(*key_columns, id_column) < tuple_(*cursor_key, cursor_id))
+        elif source < cursor_source:
+            conditions.append(tuple_(*key_columns) <= tuple_(*cursor_key))
+        else:
+            conditions.append(tuple_(*key_columns) < tuple_(*cursor_key))
+    return conditions, [column.desc() for column in key_columns] + [id_column.desc()]
+
+
+def _transaction_feed_page(user_id, limit, cursor=None):
+    """
+    Newest-first page of the user's bookings and wallet movements, merged
+    with UNION ALL in SQL. Each side reads at most ``limit + 1`` rows off its
+    index, so a page costs the same however long the history is. With
+    ``limit=None`` the whole history comes back as one page.
+    """
+    fetch = None if limit is None else limit + 1
+    if db.session.get_bind().dialect.name == "sqlite":
+        # SQLite stores dates and times as ISO strings; joining them gives the
+        # same text a DateTime column holds.
+        txn_ts = type_coerce(
+            type_coerce(Transaction.booking_date, String) + " " + type_coerce(Transaction.booking_time, String),
+            DateTime,
+        )
+    else:
+        txn_ts = Transaction.booking_date + Transaction.booking_time
+
+    conditions, order_by = _transaction_feed_branch(
+        "txn", txn_ts, (Transaction.booking_date, Transaction.booking_time), Transaction.id, cursor
+    )
+    txn_rows = (
+        select(
+            literal("txn").label("source"),
+            Transaction.id.label("id"),
+            txn_ts.label("ts"),
+            cast(Transaction.amount, Float).label("amount"),
+            Transaction.booking_type.label("type"),
+            Transaction.mode_of_payment.label("mode"),
+            Transaction.settlement_status.label("status"),
+            Transaction.reference_id.label("reference_id"),
+        )
+        .where(Transaction.user_id == user_id, *conditions)
+        .order_by(*order_by)
+        .limit(fetch)
+        .subquery()
+    )
+
+    wallet_ts = HashWalletTransaction.timestamp
+    conditions, order_by = _transaction_feed_branch(
+        "wallet", wallet_ts, (wallet_ts,), HashWalletTransaction.id, cursor
+    )
+    wallet_rows = (
+        select(
+            literal("wallet").label("source"),
+            HashWalletTransaction.id.label("id"),
+            wallet_ts.label("ts"),
+            cast(HashWalletTransaction.amount, Float).label("amount"),
+            literal(None, String).label("type"),
+            literal(None, String).label("mode"),
+            literal(None, String).label("status"),
+            HashWalletTransaction.reference_id.label("reference_id"),
+        )
+        .where(HashWalletTransaction.user_id == user_id, wallet_ts.isnot(None), *conditions)
+        .order_by(*order_by)
+        .limit(fetch)
+        .subquery()
+    )
+
+    feed = union_all(select(txn_rows), select(wallet_rows)).subquery()
+    rows = db.session.execute(
+        select(feed)
+        .order_by(feed.c.ts.desc(), feed.c.source.desc(), feed.c.id.desc())
+        .limit(fetch)
+    ).all()
+
+    transactions = []
+    for row in rows[:limit]:
+        if row.source == "txn":
+            transactions.append({
+                "id": f"txn_{row.id}",
+                "date": row.ts.date().isoformat(),
+                "time": row.ts.time().strftime("%H:%M:%S"),
+                "amount": row.amount,
+                "type": row.type,  # 'booking', 'pass_purchase', etc.
+                "mode": row.mode,
+                "status": row.status,
+                "reference_id": row.reference_id
+            })
+        else:
+            amount = int(row.amount)
+            transactions.append({
+                "id": f"wallet_{row.id}",
+                "date": row.ts.date().isoformat(),
+                "time": row.ts.time().strftime("%H:%M:%S"),
+                "amount": amount,
+                "type": f"wallet_{'credit' if amount > 0 else 'debit'}",
+                "reference_id": row.reference_id
+            })
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = _encode_transaction_cursor(last.ts, last.source, last.id)
+    return transactions, next_cursor
+
+
 @user_blueprint.route('/users/transactions', methods=['GET'])
 @auth_required_self(decrypt_user=True) 
 def user_transaction_history():
+    """
+    Newest-first transaction feed.
+    Query params: ?limit=1..200 (default 50)&cursor=<next_cursor from the previous page>
+    Without either param the full history is returned unpaged, as before paging
+    existed, and the response has no `next_cursor`.
+    """
     user_id = g.auth_user_id 
     try:
+        paged = "limit" in request.args or "cursor" in request.args
+        limit = request.args.get("limit", default=_TRANSACTION_FEED_DEFAULT_LIMIT, type=int)
+        if limit <= 0 or limit > _TRANSACTION_FEED_MAX_LIMIT:
+            return jsonify({"message": f"limit must be between 1 and {_TRANSACTION_FEED_MAX_LIMIT}"}), 400
+        cursor = request.args.get("cursor") or None
+        if cursor is not None:
+            try:
+                cursor = _decode_transaction_cursor(cursor)
+            except ValueError:
+                return jsonify({"message": "Invalid cursor"}), 400
+
         cache_key = f"users-transactions|u:{int(user_id)}|q:{request.query_string.decode('utf-8')}"
         cached = _microcache_get(cache_key)
         if cached is not None:
             return jsonify(cached), 200
 
-        all_txns = []
-
-        # 1. Normal Transactions from Transaction table
-        transactions = Transaction.query.filter_by(user_id=user_id).all()
-        for t in transactions:
-            all_txns.append({
-                "id": f"txn_{t.id}",
-                "date": t.booking_date.isoformat(),
-                "time": t.booking_time.strftime("%H:%M:%S"),
-                "amount": t.amount,
-                "type": t.booking_type,  # 'booking', 'pass_purchase', etc.
-                "mode": t.mode_of_payment,
-                "status": t.settlement_status,
-                "reference_id": t.reference_id
-            })
-
-        # 2. Wallet Transactions from HashWalletTransaction table
-        wallet_txns = HashWalletTransaction.query.filter_by(user_id=user_id).all()
-        for w in wallet_txns:
-            all_txns.append({
-                "id": f"wallet_{w.id}",
-                "date": w.timestamp.date().isoformat(),
-                "time": w.timestamp.time().strftime("%H:%M:%S"),
-                "amount": w.amount,
-                "type": f"wallet_{'credit' if w.amount > 0 else 'debit'}",
-                "reference_id": w.reference_id
-            })
-
-        # Sort all by date and time (newest first)
-        all_txns.sort(key=lambda x: (x['date'], x['time']), reverse=True)
-
-        payload = {"transactions": all_txns}
+        if paged:
+            transactions, next_cursor = _transaction_feed_page(int(user_id), limit, cursor)
+            payload = {"transactions": transactions, "next_cursor": next_cursor}
+        else:
+            transactions, _ = _transaction_feed_page(int(user_id), None)
+            payload = {"transactions": transactions}
         _microcache_set(
             cache_key,
             payload,
@@ -2117,66 +2342,8 @@ def user_transaction_history():
 @auth_required_self(decrypt_user=True) 
 def user_available_passes():
     user_id = g.auth_user_id 
-    today = datetime.utcnow().date()
     pass_type_filter = request.args.get('type', None)  # 'vendor', 'hash', or None
-    cache_key = f"user-available-passes|u:{int(user_id)}|q:{request.query_string.decode('utf-8')}"
-    cached = _microcache_get(cache_key)
-    if cached is not None:
-        return jsonify(cached), 200
-
-    # --- Get all passes the user has ever purchased (active or expired) ---
-    user_passes_all = db.session.query(UserPass.cafe_pass_id).filter(
-        UserPass.user_id == user_id
-    ).all()
-    bought_pass_ids = set(row[0] for row in user_passes_all)
-
-    # Standard available passes query
-    available_passes_query = CafePass.query.filter(
-        CafePass.is_active == True
-    )
-
-    # Apply type filter
-    if pass_type_filter == 'vendor':
-        available_passes_query = available_passes_query.filter(CafePass.vendor_id.isnot(None))
-    elif pass_type_filter == 'hash':
-        available_passes_query = available_passes_query.filter(CafePass.vendor_id.is_(None))
-
-    available_passes = available_passes_query.all()
-
-    # Build result with is_bought info + vendor images + HOUR-BASED PASS DETAILS ✅
-    result = []
-    for p in available_passes:
-        vendor_images = []
-        if p.vendor:  # only vendor passes have vendor images
-            vendor_images = [{"id": img.id, "url": img.url} for img in p.vendor.images]
-
-        pass_data = {
-            "id": p.id,
-            "name": p.name,
-            "price": p.price,
-            "days_valid": p.days_valid,
-            "description": p.description,
-            "pass_type": p.pass_type.name if p.pass_type else None,
-            "vendor_id": p.vendor_id,
-            "vendor_name": p.vendor.cafe_name if p.vendor else "Hash Pass",
-            "vendor_images": vendor_images,
-            "is_bought": p.id in bought_pass_ids,
-            
-            # ✅ ADDED: Hour-based pass details
-            "pass_mode": p.pass_mode,  # 'date_based' or 'hour_based'
-            "total_hours": float(p.total_hours) if p.total_hours else None,
-            "hour_calculation_mode": p.hour_calculation_mode,  # 'actual_duration' or 'vendor_config'
-            "hours_per_slot": float(p.hours_per_slot) if p.hours_per_slot else None
-        }
-        
-        result.append(pass_data)
-
-    _microcache_set(
-        cache_key,
-        result,
-        int(current_app.config.get("API_CACHE_USER_AVAILABLE_PASSES_TTL_SEC", 20)),
-    )
-    return jsonify(result), 200
+    return jsonify(available_passes_for_user(user_id, pass_type_filter)), 200
 
 
 @user_blueprint.route("/user/all_passes", methods=["GET"])
@@ -2184,10 +2351,6 @@ def user_available_passes():
 def user_all_passes():
     user_id = g.auth_user_id 
     today = datetime.utcnow().date()
-    cache_key = f"user-all-passes|u:{int(user_id)}|q:{request.query_string.decode('utf-8')}"
-    cached = _microcache_get(cache_key)
-    if cached is not None:
-        return jsonify(cached), 200
 
     # User's active passes
     user_passes = db.session.query(UserPass).filter(
@@ -2197,28 +2360,20 @@ def user_all_passes():
     ).all()
     user_pass_map = {up.cafe_pass_id: up for up in user_passes}
 
-    # All active passes
-    all_active_passes = CafePass.query.filter(CafePass.is_active == True).all()
-
     result = []
-    for p in all_active_passes:
-        up = user_pass_map.get(p.id)
+    for p in available_passes():
+        up = user_pass_map.get(p["id"])
         result.append({
-            "id": p.id,
-            "name": p.name,
-            "price": p.price,
-            "days_valid": p.days_valid,
-            "description": p.description,
-            "pass_type": p.pass_type.name if p.pass_type else None,
-            "vendor_id": p.vendor_id,
-            "vendor_name": p.vendor.cafe_name if p.vendor else "Hash Pass",
+            "id": p["id"],
+            "name": p["name"],
+            "price": p["price"],
+            "days_valid": p["days_valid"],
+            "description": p["description"],
+            "pass_type": p["pass_type"],
+            "vendor_id": p["vendor_id"],
+            "vendor_name": p["vendor_name"],
             "already_purchased": bool(up)
         })
-    _microcache_set(
-        cache_key,
-        result,
-        int(current_app.config.get("API_CACHE_USER_ALL_PASSES_TTL_SEC", 20)),
-    )
     return jsonify(result), 200
 
 @user_blueprint.route("/user/passes", methods=["GET"])
@@ -2349,6 +2504,82 @@ def get_extra_service_categories(vendor_id):
     )
     return jsonify(result), 200
 
+def _extra_service_tree(vendor_id, category_id=None, menu_id=None, with_images=False):
+    """
+    Active extra-service categories of a vendor with their active menus, read
+    in one joined query. With with_images, one more query adds each menu's
+    primary (else first active) image URL. Returns None when category_id is
+    given but is not an active category of this vendor.
+    """
+    menu_join = [ExtraServiceMenu.category_id == ExtraServiceCategory.id, ExtraServiceMenu.is_active.is_(True)]
+    if menu_id is not None:
+        menu_join.append(ExtraServiceMenu.id == menu_id)
+    query = (
+        db.session.query(
+            ExtraServiceCategory.id,
+            ExtraServiceCategory.name,
+            ExtraServiceCategory.description,
+            ExtraServiceMenu.id.label("menu_id"),
+            ExtraServiceMenu.name.label("menu_name"),
+            ExtraServiceMenu.price,
+            ExtraServiceMenu.description.label("menu_description"),
+        )
+        .outerjoin(ExtraServiceMenu, and_(*menu_join))
+        .filter(ExtraServiceCategory.vendor_id == vendor_id, ExtraServiceCategory.is_active.is_(True))
+        .order_by(ExtraServiceCategory.id, ExtraServiceMenu.id)
+    )
+    if category_id is not None:
+        query = query.filter(ExtraServiceCategory.id == category_id)
+
+    categories = {}
+    menus = []
+    for row in query.all():
+        category = categories.get(row.id)
+        if category is None:
+            category = categories[row.id] = {
+                "id": row.id,
+                "name": row.name,
+                "description": row.description,
+                "menus": [],
+            }
+        if row.menu_id is not None:
+            menu = {
+                "id": row.menu_id,
+                "name": row.menu_name,
+                "price": row.price,
+                "description": row.menu_description,
+            }
+            category["menus"].append(menu)
+            menus.append(menu)
+    if category_id is not None and not categories:
+        return None
+
+    if with_images:
+        image_urls = {}
+        if menus:
+            ranked = (
+                db.session.query(
+                    ExtraServiceMenuImage.menu_id,
+                    ExtraServiceMenuImage.image_url,
+                    func.row_number().over(
+                        partition_by=ExtraServiceMenuImage.menu_id,
+                        order_by=(ExtraServiceMenuImage.is_primary.desc(), ExtraServiceMenuImage.id),
+                    ).label("rank"),
+                )
+                .filter(
+                    ExtraServiceMenuImage.menu_id.in_([menu["id"] for menu in menus]),
+                    ExtraServiceMenuImage.is_active.is_(True),
+                )
+                .subquery()
+            )
+            image_urls = dict(
+                db.session.query(ranked.c.menu_id, ranked.c.image_url).filter(ranked.c.rank == 1).all()
+            )
+        for menu in menus:
+            menu["image_url"] = image_urls.get(menu["id"])
+    return list(categories.values())
+
+
 @user_blueprint.route("/vendor/<int:vendor_id>/extras/category/<int:category_id>/menus", methods=["GET"])
 def get_extra_service_menus(vendor_id, category_id):
     cache_key = (
@@ -2358,24 +2589,11 @@ def get_extra_service_menus(vendor_id, category_id):
     if cached is not None:
         return jsonify(cached), 200
 
-    # Confirm category belongs to this vendor and is active
-    category = ExtraServiceCategory.query.filter_by(
-        id=category_id,
-        vendor_id=vendor_id,
-        is_active=True
-    ).first_or_404()
-
-    menus = ExtraServiceMenu.query.filter_by(
-        category_id=category.id,
-        is_active=True
-    ).all()
-
-    result = [{
-        "id": menu.id,
-        "name": menu.name,
-        "price": menu.price,
-        "description": menu.description
-    } for menu in menus]
+    # Also confirms the category belongs to this vendor and is active
+    tree = _extra_service_tree(vendor_id, category_id=category_id)
+    if tree is None:
+        abort(404)
+    result = tree[0]["menus"]
 
     _microcache_set(
         cache_key,
@@ -2393,25 +2611,11 @@ def get_extra_service_menu_item(vendor_id, category_id, menu_id):
     if cached is not None:
         return jsonify(cached), 200
 
-    # Validate category belongs to vendor and active
-    category = ExtraServiceCategory.query.filter_by(
-        id=category_id,
-        vendor_id=vendor_id,
-        is_active=True
-    ).first_or_404()
-
-    menu = ExtraServiceMenu.query.filter_by(
-        id=menu_id,
-        category_id=category.id,
-        is_active=True
-    ).first_or_404()
-
-    result = {
-        "id": menu.id,
-        "name": menu.name,
-        "price": menu.price,
-        "description": menu.description
-    }
+    # Validates category and menu against the vendor in the same query
+    tree = _extra_service_tree(vendor_id, category_id=category_id, menu_id=menu_id)
+    if tree is None or not tree[0]["menus"]:
+        abort(404)
+    result = tree[0]["menus"][0]
 
     _microcache_set(
         cache_key,
@@ -2433,49 +2637,7 @@ def get_extra_service(vendor_id):
         if cached is not None:
             return jsonify(cached), 200
 
-        categories = ExtraServiceCategory.query.filter_by(
-            vendor_id=vendor_id,
-            is_active=True
-        ).all()
-
-        result = []
-        for category in categories:
-            # Get active menu items for this category
-            menus = ExtraServiceMenu.query.filter_by(
-                category_id=category.id,
-                is_active=True
-            ).all()
-
-            # Build menu items array with image URLs
-            menu_items = []
-            for menu in menus:
-                # Get primary image or first available image
-                image_url = None
-                menu_images = ExtraServiceMenuImage.query.filter_by(
-                    menu_id=menu.id,
-                    is_active=True
-                ).order_by(ExtraServiceMenuImage.is_primary.desc()).all()
-                
-                if menu_images:
-                    image_url = menu_images[0].image_url
-
-                menu_items.append({
-                    "id": menu.id,
-                    "name": menu.name,
-                    "price": menu.price,
-                    "description": menu.description,
-                    "image_url": image_url
-                })
-
-            # Add category with its menus
-            result.append({
-                "id": category.id,
-                "name": category.name,
-                "description": category.description,
-                "menus": menu_items
-            })
-
-        payload = {"categories": result}
+        payload = {"categories": _extra_service_tree(vendor_id, with_images=True)}
         _microcache_set(
             cache_key,
             payload,
@@ -2487,34 +2649,88 @@ def get_extra_service(vendor_id):
         current_app.logger.error(f"Error fetching extra services for vendor {vendor_id}: {str(e)}")
         return jsonify({"error": "Failed to fetch extra services", "details": str(e)}), 500
 
+_FCM_EXPORT_DEFAULT_LIMIT = 1000
+_FCM_EXPORT_MAX_LIMIT = 5000
+# Rows fetched per round-trip from the server-side cursor in NDJSON mode.
+_FCM_EXPORT_STREAM_CHUNK = 1000
+
+
+def _fcm_export_query(after_id: int):
+    return (
+        db.session.query(
+            FCMToken.id,
+            FCMToken.token,
+            FCMToken.platform,
+            FCMToken.created_at,
+            User.name,
+            User.gender,
+        )
+        .join(User, FCMToken.user_id == User.id)
+        .filter(FCMToken.id > after_id)
+        .order_by(FCMToken.id.asc())
+    )
+
+
+def _fcm_export_row(row):
+    return {
+        "id": int(row.id),
+        "token": row.token,
+        "platform": row.platform,
+        "created_at": row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else None,
+        "user": {
+            "name": row.name,
+            "gender": row.gender,
+        },
+    }
+
+
 @user_blueprint.route("/getAllFCMToken", methods=["GET"])
 def get_all_fcm():
+    """
+    Device tokens with the owner's name and gender, in token id order.
+
+    ?limit=&after_id= returns one keyset page and `next_after_id` (null on the
+    last page). ?format=ndjson (or Accept: application/x-ndjson) streams every
+    row after `after_id`, one JSON object per line, from a server-side cursor.
+    With neither, the whole list is returned as before.
+    """
     try:
-        # Fetch all tokens with related user data
-        tokens = (
-            db.session.query(FCMToken, User)
-            .join(User, FCMToken.user_id == User.id)
-            .all()
-        )
+        after_id = max(0, int(request.args.get("after_id", 0) or 0))
+        limit = request.args.get("limit")
+        limit = min(max(int(limit), 1), _FCM_EXPORT_MAX_LIMIT) if limit else None
+    except (TypeError, ValueError):
+        return jsonify({"success": False, "error": "after_id and limit must be integers"}), 400
+    if limit is None and "after_id" in request.args:
+        limit = _FCM_EXPORT_DEFAULT_LIMIT
+
+    ndjson = (
+        request.args.get("format") == "ndjson"
+        or "application/x-ndjson" in (request.headers.get("Accept") or "")
+    )
+    if ndjson:
+        def generate():
+            for row in _fcm_export_query(after_id).yield_per(_FCM_EXPORT_STREAM_CHUNK):
+                yield json.dumps(_fcm_export_row(row), separators=(",", ":")) + "\n"
 
-        result = [
-            {
-                "token": fcm.token,
-                "platform": fcm.platform,
-                "created_at": fcm.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-                "user": {
-                    "name": user.name,
-                    "gender": user.gender
-                }
-            }
-            for fcm, user in tokens
-        ]
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
 
-        return jsonify({"success": True, "data": result}), 200
+    try:
+        query = _fcm_export_query(after_id)
+        if limit is None:
+            return jsonify({"success": True, "data": [_fcm_export_row(row) for row in query.all()]}), 200
+
+        rows = query.limit(limit + 1).all()
+        page = [_fcm_export_row(row) for row in rows[:limit]]
+        return jsonify({
+            "success": True,
+            "data": page,
+            "next_after_id": page[-1]["id"] if len(rows) > limit else None,
+        }), 200
 
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
-    
+
+
 @user_blueprint.route('/user/<int:user_id>/available_passes', methods=['GET'])
 def get_user_available_passes_by_id(user_id):
     """
@@ -2523,12 +2739,6 @@ def get_user_available_passes_by_id(user_id):
     Query params: ?type=hash|vendor
     """
     try:
-        cache_key = f"user-id-available-passes|u:0|q:{int(user_id)}:{request.query_string.decode('utf-8')}"
-        cached = _microcache_get(cache_key)
-        if cached is not None:
-            return jsonify(cached), 200
-
-        today = datetime.utcnow().date()
         pass_type_filter = request.args.get('type', None)  # 'vendor', 'hash', or None
 
         # Check if user exists
@@ -2536,59 +2746,7 @@ def get_user_available_passes_by_id(user_id):
         if not user:
             return jsonify({"message": "User not found"}), 404
 
-        # --- Get all passes the user has ever purchased (active or expired) ---
-        user_passes_all = db.session.query(UserPass.cafe_pass_id).filter(
-            UserPass.user_id == user_id
-        ).all()
-        bought_pass_ids = set(row[0] for row in user_passes_all)
-
-        # Standard available passes query
-        available_passes_query = CafePass.query.filter(
-            CafePass.is_active == True
-        )
-
-        # Apply type filter
-        if pass_type_filter == 'vendor':
-            available_passes_query = available_passes_query.filter(CafePass.vendor_id.isnot(None))
-        elif pass_type_filter == 'hash':
-            available_passes_query = available_passes_query.filter(CafePass.vendor_id.is_(None))
-
-        available_passes = available_passes_query.all()
-
-        # Build result with hour-based pass details ✅
-        result = []
-        for p in available_passes:
-            vendor_images = []
-            if p.vendor:  # only vendor passes have vendor images
-                vendor_images = [{"id": img.id, "url": img.url} for img in p.vendor.images]
-
-            pass_data = {
-                "id": p.id,
-                "name": p.name,
-                "price": p.price,
-                "days_valid": p.days_valid,
-                "description": p.description,
-                "pass_type": p.pass_type.name if p.pass_type else None,
-                "vendor_id": p.vendor_id,
-                "vendor_name": p.vendor.cafe_name if p.vendor else "Hash Pass",
-                "vendor_images": vendor_images,
-                "is_bought": p.id in bought_pass_ids,
-                
-                # ✅ Hour-based pass details
-                "pass_mode": p.pass_mode,  # 'date_based' or 'hour_based'
-                "total_hours": float(p.total_hours) if p.total_hours else None,
-                "hour_calculation_mode": p.hour_calculation_mode,  # 'actual_duration' or 'vendor_config'
-                "hours_per_slot": float(p.hours_per_slot) if p.hours_per_slot else None
-            }
-            
-            result.append(pass_data)
-
-        _microcache_set(
-            cache_key,
-            result,
-            int(current_app.config.get("API_CACHE_USER_AVAILABLE_PASSES_TTL_SEC", 20)),
-        )
-        return jsonify(result), 200
+        return jsonify(available_passes_for_user(user_id, pass_type_filter)), 200
 
     except Exception as e:
         current_app.logger.error(f"Error fetching available passes for user {user_id}: {str(e)}")
@@ -0,0 +1,13 @@
+from db.extensions import db
+
+
+def insert_for_dialect(table):
+    """INSERT for the session's backend, so callers can add ON CONFLICT DO UPDATE.
+
+    PostgreSQL and SQLite both support the upsert; only the construct differs.
+    """
+    if db.session.get_bind().dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy.dialects.postgresql import insert
+    return insert(table)
@@ -0,0 +1,107 @@
+# gunicorn.conf.py
+#
+# Production entry point:  gunicorn -c gunicorn.conf.py
+#
+# Every setting can be overridden from the environment so the same image runs
+# on small and large hosts. Worker sizing rules:
+#
+# * threads per worker default to DB_POOL_SIZE, so each request thread can
+#   hold a pooled connection without waiting on the pool;
+# * workers default to 2 * CPU + 1, capped so that
+#   workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under DB_MAX_CONNECTIONS
+#   when that limit is known.
+
+import multiprocessing
+import os
+
+
+def _env_int(name, default):
+    raw = os.getenv(name)
+    if raw is None or not str(raw).strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def _default_workers():
+    workers = multiprocessing.cpu_count() * 2 + 1
+    max_connections = _env_int("DB_MAX_CONNECTIONS", 0)
+    per_worker = _env_int("DB_POOL_SIZE", 20) + _env_int("DB_MAX_OVERFLOW", 40)
+    if max_connections > 0 and per_worker > 0:
+        workers = min(workers, max(1, max_connections // per_worker))
+    return max(1, workers)
+
+
+wsgi_app = "app:create_app()"
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '5053')}")
+
+# gthread suits the blocking psycopg2/requests calls in the controllers.
+# gevent is supported for I/O-heavy deployments; it needs gevent installed.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = _env_int("GUNICORN_WORKERS", _default_workers())
+threads = _env_int("GUNICORN_THREADS", max(1, _env_int("DB_POOL_SIZE", 20)))
+worker_connections = _env_int("GUNICORN_WORKER_CONNECTIONS", 1000)
+
+if worker_class == "gevent":
+    # Patch before the app is preloaded so sockets, locks and psycopg2 waits
+    # are cooperative in every worker.
+    from gevent import monkey
+
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+    except ImportError:
+        pass
+
+# Import create_app once in the master so workers share its memory
+# copy-on-write; per-process resources are reset in post_fork below.
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() in ("true", "1", "t")
+
+timeout = _env_int("GUNICORN_TIMEOUT_SEC", 60)
+graceful_timeout = _env_int("GUNICORN_GRACEFUL_TIMEOUT_SEC", 30)
+keepalive = _env_int("GUNICORN_KEEPALIVE_SEC", 5)
+
+# Recycle workers periodically; the jitter keeps them from restarting together.
+max_requests = _env_int("GUNICORN_MAX_REQUESTS", 5000)
+max_requests_jitter = _env_int("GUNICORN_MAX_REQUESTS_JITTER", 500)
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "warning")
+
+
+def post_fork(server, worker):
+    # Connections opened while the master imported the app must not be shared
+    # between processes; drop them so each worker builds its own pool.
+    if not preload_app:
+        return
+    from db.extensions import db
+
+    flask_app = server.app.wsgi()
+    with flask_app.app_context():
+        db.engine.dispose(close=False)
+
+
+def on_starting(server):
+    # Per-worker metrics snapshots from a previous run would be merged into
+    # this run's counters; start from an empty METRICS_MULTIPROC_DIR.
+    from services.metrics import reset_multiproc_dir
+
+    reset_multiproc_dir()
+
+
+def worker_exit(server, worker):
+    from services.metrics import flush_snapshot
+
+    flush_snapshot(force=True)
+
+
+def child_exit(server, worker):
+    # Runs in the master, so the archive file has a single writer.
+    from services.metrics import fold_exited_worker
+
+    fold_exited_worker(worker.pid)
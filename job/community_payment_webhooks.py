@@ -0,0 +1,111 @@
+"""Drain the community payment webhook inbox outside the request path.
+
+``POST /api/payments/webhook`` only verifies the signature and stores the event.
+This worker reconciles the stored events against Razorpay:
+
+    flask --app "app:create_app()" community-payment-webhook-worker --concurrency 4
+
+Every thread claims its own batch with ``FOR UPDATE SKIP LOCKED`` (see
+``process_pending_community_payment_webhooks``), so threads and extra worker
+processes never reconcile the same event twice. Queue depth and the age of the
+oldest ready event are logged every ``metrics_interval_sec``.
+"""
+
+import logging
+import threading
+import time
+
+from db.extensions import db
+from services.community_tournament_service import (
+    community_payment_webhook_queue_metrics,
+    process_pending_community_payment_webhooks,
+)
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_KEYS = ("processed", "settled", "retried", "failed")
+
+
+def drain_webhook_batch(app, batch_size=10):
+    """Claim and reconcile one batch of ready webhook events."""
+    with app.app_context():
+        try:
+            summary = process_pending_community_payment_webhooks(batch_size)
+            if summary.get("processed"):
+                # Settlements change registration counts on public tournament
+                # pages; evict them the way the cron endpoint does.
+                from controllers.community_tournament_controller import _invalidate_community_cache_for_write
+
+                _invalidate_community_cache_for_write("process_pending_community_payment_queue")
+            return summary
+        finally:
+            db.session.remove()
+
+
+def log_queue_metrics(app):
+    with app.app_context():
+        try:
+            metrics = community_payment_webhook_queue_metrics()
+        finally:
+            db.session.remove()
+    logger.info(
+        "community payment webhooks ready=%s retry=%s processing=%s failed=%s lag=%.1fs",
+        metrics["ready"], metrics["retry"], metrics["processing"], metrics["failed"],
+        metrics["oldest_ready_lag_sec"],
+    )
+    return metrics
+
+
+def run_webhook_worker(
+    app,
+    concurrency=4,
+    batch_size=10,
+    poll_interval_sec=1.0,
+    metrics_interval_sec=30.0,
+    stop_event=None,
+    once=False,
+):
+    """Run ``concurrency`` drain threads until ``stop_event`` is set.
+
+    With ``once`` each thread exits as soon as it finds no ready events, which
+    suits a scheduler that starts the worker periodically.
+    """
+    stop_event = stop_event or threading.Event()
+    totals = dict.fromkeys(_SUMMARY_KEYS, 0)
+    totals_lock = threading.Lock()
+
+    def drain():
+        while not stop_event.is_set():
+            try:
+                summary = drain_webhook_batch(app, batch_size)
+            except Exception:
+                logger.exception("community payment webhook batch failed")
+                summary = None
+            if summary:
+                with totals_lock:
+                    for key in _SUMMARY_KEYS:
+                        totals[key] += int(summary.get(key) or 0)
+            if summary and summary.get("processed"):
+                continue
+            if once:
+                return
+            stop_event.wait(poll_interval_sec)
+
+    threads = [
+        threading.Thread(target=drain, name=f"community-webhook-{index}", daemon=True)
+        for index in range(max(1, int(concurrency)))
+    ]
+    for thread in threads:
+        thread.start()
+    next_report = time.monotonic() + metrics_interval_sec
+    while any(thread.is_alive() for thread in threads) and not stop_event.wait(0.2):
+        if time.monotonic() < next_report:
+            continue
+        next_report = time.monotonic() + metrics_interval_sec
+        try:
+            log_queue_metrics(app)
+        except Exception:
+            logger.exception("community payment webhook metrics failed")
+    for thread in threads:
+        thread.join()
+    return totals
@@ -1,9 +1,13 @@
 import os
+import json
 import time
 import requests
 import logging
 import random
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
 
 try:
     from google import genai
@@ -26,6 +30,13 @@ logger = logging.getLogger(__name__)
 API_BASE = os.getenv("API_BASE", "https://hfg-user-onboard.onrender.com/api")
 API_KEY = os.getenv("API_KEY", "")
 NOTIFY_INTERVAL = int(os.getenv("NOTIFY_INTERVAL", "14400"))  # seconds
+NOTIFY_CONCURRENCY = int(os.getenv("NOTIFY_CONCURRENCY", "16"))  # in-flight /notify-user calls
+NOTIFY_PAGE_SIZE = int(os.getenv("NOTIFY_PAGE_SIZE", "1000"))  # tokens per /getAllFCMToken page
+NOTIFY_TIMEOUT_SEC = float(os.getenv("NOTIFY_TIMEOUT_SEC", "10"))
+NOTIFY_CHECKPOINT_FILE = os.getenv(
+    "NOTIFY_CHECKPOINT_FILE",
+    os.path.join(tempfile.gettempdir(), "hfg_notification_checkpoint.json"),
+)
 
 # ----------------------------
 # Gemini Setup
@@ -130,7 +141,79 @@ def is_within_time_window():
     return 6 <= ist_hour < 22  # 6AM to 10PM
 
 
-def run_notification_cycle(force=False):
+# ----------------------------
+# Sender
+# ----------------------------
+def _build_session(concurrency):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, concurrency))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _load_checkpoint(path):
+    """Return the unfinished cycle saved at `path`, or None if there is none."""
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            checkpoint = json.load(handle)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring unreadable checkpoint %s: %s", path, e)
+        return None
+    # A cycle older than one interval is not resumed; the next one starts fresh.
+    if time.time() - float(checkpoint.get("started_at") or 0) > NOTIFY_INTERVAL:
+        return None
+    return checkpoint
+
+
+def _save_checkpoint(path, checkpoint):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump(checkpoint, handle)
+    os.replace(tmp_path, path)
+
+
+def _clear_checkpoint(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _send_one(session, api_base, token, notif):
+    if not token:
+        return False
+    payload = {"token": token, "title": notif["title"], "message": notif["message"]}
+    try:
+        r = session.post(f"{api_base}/notify-user", json=payload, timeout=NOTIFY_TIMEOUT_SEC)
+    except requests.RequestException as e:
+        logger.warning("Send to %s... failed: %s", token[:10], e)
+        return False
+    return 200 <= r.status_code < 300
+
+
+def run_notification_cycle(
+    force=False,
+    api_base=None,
+    concurrency=None,
+    page_size=None,
+    checkpoint_path=None,
+):
+    """
+    Notify every registered device once.
+
+    Tokens are read one /getAllFCMToken page at a time and each page is sent
+    with `concurrency` parallel /notify-user calls over one pooled session.
+    Progress is saved to `checkpoint_path` after every page, so a crashed
+    cycle resumes from the last finished page with the same notification.
+    """
+    api_base = api_base or API_BASE
+    concurrency = max(1, int(concurrency or NOTIFY_CONCURRENCY))
+    page_size = max(1, int(page_size or NOTIFY_PAGE_SIZE))
+    checkpoint_path = checkpoint_path or NOTIFY_CHECKPOINT_FILE
+
     if not force and not is_within_time_window():
         current_ist = datetime.utcnow() + timedelta(hours=5, minutes=30)
         logger.info(
@@ -139,41 +222,82 @@ def run_notification_cycle(force=False):
         )
         return {"success": True, "skipped": True, "reason": "outside_notification_window"}
 
-    logger.info("Fetching FCM tokens...")
-    resp = requests.get(f"{API_BASE}/getAllFCMToken")
-    if resp.status_code != 200:
-        logger.error("Error fetching tokens: %s", resp.text)
-        return {"success": False, "error": resp.text, "status_code": resp.status_code}
-
-    data = resp.json().get("data", [])
-    if not data:
-        return {"success": True, "skipped": False, "tokens_found": 0, "sent": 0, "failed": 0}
-
-    logger.info("Found %s tokens to notify.", len(data))
-    notif = generate_notification()
-    sent = 0
-    failed = 0
-
-    for entry in data:
-        token = entry.get("token")
-        if not token:
-            failed += 1
-            continue
-        payload = {"token": token, "title": notif["title"], "message": notif["message"]}
-        r = requests.post(f"{API_BASE}/notify-user", json=payload)
-        if 200 <= r.status_code < 300:
-            sent += 1
-        else:
-            failed += 1
-        logger.info("Sent to %s... Status %s", token[:10], r.status_code)
+    checkpoint = _load_checkpoint(checkpoint_path)
+    resumed = checkpoint is not None
+    if resumed:
+        logger.info("Resuming notification cycle after token id %s", checkpoint["after_id"])
+    else:
+        checkpoint = {
+            "started_at": time.time(),
+            "after_id": 0,
+            "notification": None,
+            "tokens_found": 0,
+            "sent": 0,
+            "failed": 0,
+        }
+
+    session = _build_session(concurrency)
+    started = time.perf_counter()
+    processed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="notify") as pool:
+            while True:
+                logger.info("Fetching FCM tokens after id %s...", checkpoint["after_id"])
+                resp = session.get(
+                    f"{api_base}/getAllFCMToken",
+                    params={"after_id": checkpoint["after_id"], "limit": page_size},
+                    timeout=NOTIFY_TIMEOUT_SEC,
+                )
+                if resp.status_code != 200:
+                    logger.error("Error fetching tokens: %s", resp.text)
+                    return {"success": False, "error": resp.text, "status_code": resp.status_code, "resumed": resumed}
+                body = resp.json()
+                page = body.get("data", [])
+                if page and not checkpoint["notification"]:
+                    checkpoint["notification"] = generate_notification()
+                notif = checkpoint["notification"]
+
+                results = list(pool.map(
+                    lambda entry: _send_one(session, api_base, entry.get("token"), notif),
+                    page,
+                ))
+                processed += len(results)
+                checkpoint["tokens_found"] += len(results)
+                checkpoint["sent"] += sum(1 for ok in results if ok)
+                checkpoint["failed"] += sum(1 for ok in results if not ok)
+
+                next_after_id = body.get("next_after_id")
+                if not page or next_after_id is None:
+                    break
+                checkpoint["after_id"] = next_after_id
+                _save_checkpoint(checkpoint_path, checkpoint)
+    except requests.RequestException as e:
+        logger.error("Notification cycle interrupted: %s", e)
+        return {"success": False, "error": str(e), "resumed": resumed}
+    finally:
+        session.close()
 
+    _clear_checkpoint(checkpoint_path)
+    elapsed = time.perf_counter() - started
+    tokens_per_sec = processed / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        "Notification cycle done: tokens=%s sent=%s failed=%s elapsed=%.1fs throughput=%.1f tokens/sec",
+        checkpoint["tokens_found"],
+        checkpoint["sent"],
+        checkpoint["failed"],
+        elapsed,
+        tokens_per_sec,
+    )
     return {
         "success": True,
         "skipped": False,
-        "tokens_found": len(data),
-        "sent": sent,
-        "failed": failed,
-        "notification": notif,
+        "resumed": resumed,
+        "tokens_found": checkpoint["tokens_found"],
+        "sent": checkpoint["sent"],
+        "failed": checkpoint["failed"],
+        "notification": checkpoint["notification"],
+        "elapsed_sec": round(elapsed, 3),
+        "tokens_per_sec": round(tokens_per_sec, 1),
     }
 
 def main():
@@ -219,6 +219,26 @@ class CommunityTournamentMatch(db.Model):
         }
 
 
+class CommunityTournamentStanding(db.Model):
+    """Leaderboard projection, maintained as matches complete or are restarted."""
+
+    __tablename__ = "community_tournament_standings"
+
+    tournament_id = Column(UUID(as_uuid=True), ForeignKey("community_tournaments.id", ondelete="CASCADE"), primary_key=True)
+    team_id = Column(UUID(as_uuid=True), ForeignKey("community_tournament_teams.id", ondelete="CASCADE"), primary_key=True)
+    played = Column(Integer, nullable=False, default=0)
+    wins = Column(Integer, nullable=False, default=0)
+    losses = Column(Integer, nullable=False, default=0)
+    points = Column(Integer, nullable=False, default=0)
+    score_for = Column(Integer, nullable=False, default=0)
+    score_against = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_community_standings_tournament_rank", "tournament_id", "points"),
+    )
+
+
 class CommunityMatchResultSubmission(db.Model):
     __tablename__ = "community_match_result_submissions"
 
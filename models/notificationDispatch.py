@@ -22,6 +22,9 @@ class NotificationDispatchJob(db.Model):
     tokens_attempted = Column(Integer, nullable=False, default=0)
     sent = Column(Integer, nullable=False, default=0)
     failed = Column(Integer, nullable=False, default=0)
+    # Highest fcm_tokens.id whose send outcome is committed; a resumed job
+    # continues after it.
+    checkpoint_token_id = Column(Integer, nullable=True)
 
     error_message = Column(Text, nullable=True)
     started_at = Column(DateTime, nullable=True)
@@ -45,6 +48,7 @@ class NotificationDispatchJob(db.Model):
             "tokens_attempted": self.tokens_attempted,
             "sent": self.sent,
             "failed": self.failed,
+            "checkpoint_token_id": self.checkpoint_token_id,
             "error_message": self.error_message,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
@@ -0,0 +1,855 @@
+"""Named caches shared by the API controllers.
+
+Every controller-level cache is obtained through ``get_cache`` so eviction,
+expiry and hit/miss accounting behave the same way everywhere and can be
+inspected with ``cache_stats``. Two backends implement ``CacheBackend``:
+
+* ``TTLCache`` keeps entries in process memory (the default).
+* ``RedisCache`` keeps entries in Redis so every worker shares one copy.
+
+The backend is chosen with ``CACHE_BACKEND=memory|redis`` and
+``CACHE_REDIS_URL``. Namespaces created with ``shared=False`` always stay in
+process. Whenever ``CACHE_REDIS_URL`` is set, invalidations of in-process
+caches (``pop``, ``invalidate_tags``, ``invalidate_prefixes``, ``mark_stale``,
+``clear``) are also published on ``CACHE_INVALIDATION_CHANNEL`` and applied by
+every other worker, so a write handled by one worker is not served stale by
+the rest.
+
+Per-namespace budgets can be overridden without a deploy through
+``CACHE_<NAMESPACE>_MAX_ITEMS`` / ``CACHE_<NAMESPACE>_MAX_BYTES`` where the
+namespace is upper-cased with dashes replaced by underscores
+(``api-microcache`` -> ``CACHE_API_MICROCACHE_MAX_ITEMS``).
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import pickle
+import sys
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Event, Lock
+
+
+logger = logging.getLogger(__name__)
+
+
+# Returned by CacheBackend.lookup when no usable entry exists.
+MISSING = object()
+_SIZE_WALK_MAX_DEPTH = 6
+
+
+def _approx_size(value, _depth=0):
+    """Rough deep size of a JSON-like payload; only used when a byte budget is set."""
+    size = sys.getsizeof(value)
+    if _depth >= _SIZE_WALK_MAX_DEPTH:
+        return size
+    if isinstance(value, dict):
+        return size + sum(
+            _approx_size(k, _depth + 1) + _approx_size(v, _depth + 1)
+            for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(_approx_size(item, _depth + 1) for item in value)
+    return size
+
+
+class _Entry:
+    __slots__ = ("value", "expires_at", "stale_until", "size", "tags")
+
+    def __init__(self, value, expires_at, stale_until, size, tags):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.tags = tags
+
+
+class _Flight:
+    """One in-progress load of a key that concurrent callers can wait on."""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.value = None
+        self.error = None
+
+
+class CacheBackend(ABC):
+    """Interface shared by the in-process and Redis-backed caches.
+
+    Backends implement ``lookup``/``set``/``stats`` and the ``_*_local``
+    invalidation primitives. The public invalidation methods apply the change
+    and, when an invalidation bus is attached, broadcast it so the same
+    namespace in other worker processes drops the keys too.
+
+    ``get_or_load`` coalesces concurrent misses for a key within the process
+    (single-flight): one caller runs the loader while the others wait for its
+    result or, when a stale copy is still inside its window, return that
+    immediately.
+    """
+
+    def __init__(self, namespace, default_ttl_sec=60):
+        self.namespace = namespace
+        self.default_ttl_sec = default_ttl_sec
+        self.coalesced = 0
+        self._flights = {}
+        self._flights_lock = Lock()
+        self._bus = None
+
+    @abstractmethod
+    def __contains__(self, key):
+        ...
+
+    @abstractmethod
+    def lookup(self, key):
+        """Return ``(value, is_fresh)``; ``(MISSING, False)`` when nothing usable is cached."""
+
+    @abstractmethod
+    def set(self, key, value, ttl_sec=None, tags=(), stale_ttl_sec=0):
+        ...
+
+    @abstractmethod
+    def stats(self):
+        ...
+
+    def get(self, key, default=None):
+        value, fresh = self.lookup(key)
+        return value if fresh else default
+
+    def pop(self, key, default=None):
+        value = self._pop_local([key])
+        self._broadcast("pop", [key])
+        return default if value is MISSING else value
+
+    def invalidate_tags(self, *tags):
+        """Drop every key carrying any of ``tags``; returns the local count."""
+        removed = self._invalidate_tags_local(tags)
+        self._broadcast("tags", tags)
+        return removed
+
+    def invalidate_prefixes(self, *prefixes):
+        """Drop every string key starting with one of ``prefixes``; returns the local count."""
+        removed = self._invalidate_prefixes_local(prefixes)
+        self._broadcast("prefixes", prefixes)
+        return removed
+
+    def mark_stale(self, *tags):
+        """Age tagged entries so the next reader revalidates.
+
+        Entries written with a stale window stay readable through ``lookup``
+        until it closes; entries without one are dropped.
+        """
+        affected = self._mark_stale_local(tags)
+        self._broadcast("stale", tags)
+        return affected
+
+    def clear(self):
+        self._clear_local()
+        self._broadcast("clear", [])
+
+    def apply_remote_invalidation(self, op, args):
+        """Apply an invalidation received from another worker without re-broadcasting it."""
+        handler = {
+            "pop": self._pop_local,
+            "tags": self._invalidate_tags_local,
+            "prefixes": self._invalidate_prefixes_local,
+            "stale": self._mark_stale_local,
+            "clear": lambda _args: self._clear_local(),
+        }.get(op)
+        if handler is not None:
+            handler(args)
+
+    def get_or_load(self, key, loader, ttl_sec=None, tags=(), stale_ttl_sec=0, wait_timeout_sec=10.0):
+        """Return the cached value for ``key``, running ``loader`` at most once at a time.
+
+        A ``None`` result is handed to waiting callers but not cached. When the
+        loading caller raises, waiting callers re-raise the same error rather
+        than all retrying the loader. Callers that wait longer than
+        ``wait_timeout_sec`` give up on the leader and load for themselves.
+        """
+        value, fresh = self.lookup(key)
+        if fresh:
+            return value
+        with self._flights_lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if value is not MISSING:
+                return value
+            if not flight.done.wait(wait_timeout_sec):
+                return loader()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            value = loader()
+            if value is not None:
+                self.set(key, value, ttl_sec, tags=tags, stale_ttl_sec=stale_ttl_sec)
+            flight.value = value
+            return value
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._flights_lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _broadcast(self, op, args):
+        if self._bus is not None:
+            self._bus.publish(self.namespace, op, args)
+
+    def _subscribe(self):
+        # A forked worker resubscribes on its first read without waiting for it.
+        if self._bus is not None:
+            self._bus.start(wait=False)
+
+    @abstractmethod
+    def _pop_local(self, keys):
+        ...
+
+    @abstractmethod
+    def _invalidate_tags_local(self, tags):
+        ...
+
+    @abstractmethod
+    def _invalidate_prefixes_local(self, prefixes):
+        ...
+
+    @abstractmethod
+    def _mark_stale_local(self, tags):
+        ...
+
+    @abstractmethod
+    def _clear_local(self):
+        ...
+
+
+class TTLCache(CacheBackend):
+    """Thread-safe in-process LRU cache whose entries also expire after a per-entry TTL.
+
+    Expired entries are removed proactively: every write drains the expiry
+    heap up to "now", so dead keys do not wait for a reader to find them.
+    Capacity (``max_items``) and the optional memory budget (``max_bytes``)
+    evict least-recently-used entries first.
+
+    Entries may carry tags; ``invalidate_tags`` drops every key carrying one
+    of the tags through a secondary index, so targeted invalidation costs
+    O(keys for that tag) instead of a scan over the whole cache.
+
+    An entry written with ``stale_ttl_sec`` is kept for that long after it
+    stops being fresh. ``get`` ignores it, but ``lookup`` still returns it so
+    callers can serve it while one request revalidates (stale-while-revalidate);
+    ``mark_stale`` ages such entries immediately instead of dropping them.
+    """
+
+    def __init__(self, namespace, max_items, max_bytes=0, default_ttl_sec=60, sizeof=None):
+        super().__init__(namespace, default_ttl_sec)
+        self.max_items = max(int(max_items or 1), 1)
+        self.max_bytes = max(int(max_bytes or 0), 0)
+        self._sizeof = sizeof or _approx_size
+        # key -> _Entry, ordered from least to most recently used.
+        self._entries = OrderedDict()
+        self._tag_index = {}
+        self._expiry_heap = []
+        self._seq = itertools.count()
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return self._lookup(key, time.monotonic())[1]
+
+    def get(self, key, default=None):
+        self._subscribe()
+        with self._lock:
+            entry, fresh = self._lookup(key, time.monotonic())
+            if fresh:
+                self.hits += 1
+                return entry.value
+            self.misses += 1
+            return default
+
+    def lookup(self, key):
+        self._subscribe()
+        with self._lock:
+            entry, fresh = self._lookup(key, time.monotonic())
+            if entry is None:
+                self.misses += 1
+                return MISSING, False
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry.value, fresh
+
+    def set(self, key, value, ttl_sec=None, tags=(), stale_ttl_sec=0):
+        ttl = float(self.default_ttl_sec if ttl_sec is None else ttl_sec)
+        if ttl <= 0:
+            self._pop_local([key])
+            return
+        size = self._sizeof(value) if self.max_bytes else 0
+        now = time.monotonic()
+        expires_at = now + ttl
+        stale_until = expires_at + max(float(stale_ttl_sec or 0), 0.0)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            tags = tuple(tags or ())
+            self._entries[key] = _Entry(value, expires_at, stale_until, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tag_index.setdefault(tag, set()).add(key)
+            heapq.heappush(self._expiry_heap, (stale_until, next(self._seq), key))
+            self._expire(now)
+            self._enforce_budget()
+
+    def sweep(self):
+        """Remove every expired entry now; returns how many were dropped."""
+        with self._lock:
+            return self._expire(time.monotonic())
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "backend": "memory",
+                "items": len(self._entries),
+                "bytes": self._bytes,
+                "max_items": self.max_items,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _pop_local(self, keys):
+        value = MISSING
+        with self._lock:
+            for key in keys:
+                entry = self._remove(key)
+                if entry is not None:
+                    value = entry.value
+        return value
+
+    def _invalidate_tags_local(self, tags):
+        removed = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    if self._remove(key) is not None:
+                        removed += 1
+        return removed
+
+    def _invalidate_prefixes_local(self, prefixes):
+        prefixes = tuple(str(prefix) for prefix in prefixes)
+        if not prefixes:
+            return 0
+        with self._lock:
+            stale_keys = [
+                key for key in self._entries
+                if isinstance(key, str) and key.startswith(prefixes)
+            ]
+            for key in stale_keys:
+                self._remove(key)
+        return len(stale_keys)
+
+    def _mark_stale_local(self, tags):
+        now = time.monotonic()
+        affected = 0
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tag_index.get(tag, ())):
+                    entry = self._entries.get(key)
+                    if entry is None:
+                        continue
+                    affected += 1
+                    if entry.stale_until > entry.expires_at:
+                        entry.expires_at = min(entry.expires_at, now)
+                    else:
+                        self._remove(key)
+        return affected
+
+    def _clear_local(self):
+        with self._lock:
+            self._entries.clear()
+            self._tag_index.clear()
+            self._expiry_heap = []
+            self._bytes = 0
+
+    # Internal helpers; callers must hold self._lock.
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+        if entry.stale_until <= now:
+            self._remove(key)
+            self.expirations += 1
+            return None, False
+        self._entries.move_to_end(key)
+        return entry, entry.expires_at > now
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+            for tag in entry.tags:
+                keys = self._tag_index.get(tag)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tag_index[tag]
+        return entry
+
+    def _expire(self, now):
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            stale_until, _, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # Heap items are not removed on overwrite/pop; skip the stale ones.
+            if entry is not None and entry.stale_until == stale_until:
+                self._remove(key)
+                self.expirations += 1
+                removed += 1
+        if len(heap) > 2 * len(self._entries) + 64:
+            self._expiry_heap = [
+                (entry.stale_until, next(self._seq), key) for key, entry in self._entries.items()
+            ]
+            heapq.heapify(self._expiry_heap)
+        return removed
+
+    def _enforce_budget(self):
+        while self._entries and (
+            len(self._entries) > self.max_items
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+
+def _redis_glob_escape(value):
+    return "".join("\\" + ch if ch in "*?[]\\" else ch for ch in str(value))
+
+
+class RedisCache(CacheBackend):
+    """Cache namespace stored in Redis and shared by every worker process.
+
+    Values are pickled together with their freshness deadline, so the Redis
+    instance must only be reachable by this service. Each key's Redis TTL
+    covers both the fresh and the stale window, and tag membership is kept in
+    Redis sets so tag invalidation stays O(tagged keys). Capacity is governed
+    by the server's ``maxmemory`` policy rather than per-namespace budgets.
+
+    Redis errors are logged and treated as misses: a cache outage slows
+    requests down but does not fail them.
+    """
+
+    _SCAN_BATCH = 500
+
+    def __init__(self, namespace, client, prefix="hfg:cache:", default_ttl_sec=60):
+        super().__init__(namespace, default_ttl_sec)
+        self._client = client
+        self._key_prefix = f"{prefix}{namespace}:"
+        self._tag_prefix = f"{prefix}{namespace}#tag:"
+        self._lock = Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def __len__(self):
+        match = _redis_glob_escape(self._key_prefix) + "*"
+        return sum(1 for _ in self._client.scan_iter(match=match, count=self._SCAN_BATCH))
+
+    def __contains__(self, key):
+        return self.get(key, MISSING) is not MISSING
+
+    def lookup(self, key):
+        try:
+            raw = self._client.get(self._key(key))
+        except Exception:
+            self._record_error("get")
+            raw = None
+        if raw is not None:
+            try:
+                expires_at, _stale_until, value = pickle.loads(raw)
+            except Exception:
+                # A corrupt entry, or one written by an incompatible release.
+                self._record_error("decode")
+                raw = None
+        if raw is None:
+            self._count("misses")
+            return MISSING, False
+        fresh = expires_at > time.time()
+        self._count("hits" if fresh else "stale_hits")
+        return value, fresh
+
+    def set(self, key, value, ttl_sec=None, tags=(), stale_ttl_sec=0):
+        ttl = float(self.default_ttl_sec if ttl_sec is None else ttl_sec)
+        if ttl <= 0:
+            self._pop_local([key])
+            return
+        stale = max(float(stale_ttl_sec or 0), 0.0)
+        now = time.time()
+        blob = pickle.dumps((now + ttl, now + ttl + stale, value), protocol=pickle.HIGHEST_PROTOCOL)
+        redis_key = self._key(key)
+        ttl_ms = int((ttl + stale) * 1000) + 1
+        tag_keys = [self._tag_key(tag) for tag in tags or ()]
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            pipe.set(redis_key, blob, px=ttl_ms)
+            for tag_key in tag_keys:
+                pipe.sadd(tag_key, redis_key)
+                pipe.pttl(tag_key)
+            results = pipe.execute()
+            # A tag set must live at least as long as its longest-lived member.
+            short_lived = [
+                tag_key for tag_key, remaining in zip(tag_keys, results[2::2])
+                if remaining is None or remaining < ttl_ms
+            ]
+            if short_lived:
+                pipe = self._client.pipeline(transaction=False)
+                for tag_key in short_lived:
+                    pipe.pexpire(tag_key, ttl_ms)
+                pipe.execute()
+        except Exception:
+            self._record_error("set")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "namespace": self.namespace,
+                "backend": "redis",
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "errors": self.errors,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _key(self, key):
+        return f"{self._key_prefix}{key}"
+
+    def _tag_key(self, tag):
+        return f"{self._tag_prefix}{tag}"
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _record_error(self, operation):
+        self._count("errors")
+        logger.warning("cache %s %s failed", self.namespace, operation, exc_info=True)
+
+    def _delete(self, redis_keys):
+        removed = 0
+        redis_keys = list(redis_keys)
+        for offset in range(0, len(redis_keys), self._SCAN_BATCH):
+            removed += self._client.delete(*redis_keys[offset:offset + self._SCAN_BATCH])
+        return removed
+
+    def _pop_local(self, keys):
+        try:
+            self._delete(self._key(key) for key in keys)
+        except Exception:
+            self._record_error("pop")
+        return MISSING
+
+    def _tagged_keys(self, tags):
+        pipe = self._client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.smembers(self._tag_key(tag))
+        members = set()
+        for result in pipe.execute():
+            members.update(result or ())
+        return members
+
+    def _invalidate_tags_local(self, tags):
+        if not tags:
+            return 0
+        try:
+            removed = self._delete(self._tagged_keys(tags))
+            self._delete(self._tag_key(tag) for tag in tags)
+            return removed
+        except Exception:
+            self._record_error("invalidate_tags")
+            return 0
+
+    def _invalidate_prefixes_local(self, prefixes):
+        removed = 0
+        try:
+            for prefix in prefixes:
+                match = _redis_glob_escape(self._key(prefix)) + "*"
+                removed += self._delete(self._client.scan_iter(match=match, count=self._SCAN_BATCH))
+        except Exception:
+            self._record_error("invalidate_prefixes")
+        return removed
+
+    def _mark_stale_local(self, tags):
+        if not tags:
+            return 0
+        try:
+            redis_keys = sorted(self._tagged_keys(tags))
+            if not redis_keys:
+                return 0
+            now = time.time()
+            raws = self._client.mget(redis_keys)
+            pipe = self._client.pipeline(transaction=False)
+            affected = 0
+            for redis_key, raw in zip(redis_keys, raws):
+                if raw is None:
+                    continue
+                affected += 1
+                expires_at, stale_until, value = pickle.loads(raw)
+                if stale_until > expires_at:
+                    aged = (min(expires_at, now), stale_until, value)
+                    pipe.set(redis_key, pickle.dumps(aged, protocol=pickle.HIGHEST_PROTOCOL), keepttl=True)
+                else:
+                    pipe.delete(redis_key)
+            pipe.execute()
+            return affected
+        except Exception:
+            self._record_error("mark_stale")
+            return 0
+
+    def _clear_local(self):
+        try:
+            for prefix in (self._key_prefix, self._tag_prefix):
+                match = _redis_glob_escape(prefix) + "*"
+                self._delete(self._client.scan_iter(match=match, count=self._SCAN_BATCH))
+        except Exception:
+            self._record_error("clear")
+
+
+class InvalidationBus:
+    """Broadcasts in-process cache invalidations to other workers over Redis pub/sub.
+
+    Each process subscribes from a daemon thread and applies messages from
+    other processes to its own caches; its own messages are recognised by
+    origin id and skipped. ``resolve`` maps a namespace to the local cache
+    (the module registry by default). Publishing never raises: if Redis is
+    unreachable the local invalidation still happens and the failure is
+    logged, leaving other workers to catch up through TTL expiry.
+
+    ``client_factory`` builds the subscriber's connection, which blocks on
+    reads and so has no socket timeout. ``publish_client_factory`` builds the
+    connection ``publish`` uses on request threads; it should carry the
+    request-path timeouts. It defaults to ``client_factory``.
+    """
+
+    def __init__(self, client_factory, channel, resolve=None, publish_client_factory=None):
+        self._client_factory = client_factory
+        self._publish_client_factory = publish_client_factory or client_factory
+        self._channel = channel
+        self._resolve = resolve or _registered_cache
+        self._lock = Lock()
+        self._pid = None
+        self._publish_client = None
+        self._origin = None
+        self.published = 0
+        self.received = 0
+
+    def start(self, wait=True):
+        """
+        Subscribe this process; safe to call repeatedly and again after fork.
+        ``wait=False`` returns without waiting for the subscription to be live.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._publish_client = self._publish_client_factory()
+            self._origin = uuid.uuid4().hex
+            ready = Event()
+            threading.Thread(
+                target=self._listen,
+                args=(self._client_factory(), self._origin, ready),
+                name="cache-invalidation",
+                daemon=True,
+            ).start()
+            self._pid = pid
+        if wait:
+            ready.wait(5)
+
+    def reset_after_fork(self):
+        """Forget the parent's subscription; the child subscribes on first use."""
+        self._pid = None
+        self._publish_client = None
+
+    def publish(self, namespace, op, args):
+        self.start()
+        message = json.dumps(
+            {"origin": self._origin, "namespace": namespace, "op": op, "args": list(args)},
+            default=str,
+        )
+        try:
+            self._publish_client.publish(self._channel, message)
+            self.published += 1
+        except Exception:
+            logger.warning("cache invalidation publish failed for %s", namespace, exc_info=True)
+
+    def _listen(self, client, origin, ready):
+        while self._pid in (None, os.getpid()):
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self._channel)
+                ready.set()
+                for message in pubsub.listen():
+                    self._handle(message, origin)
+            except Exception:
+                ready.set()
+                logger.warning("cache invalidation subscriber disconnected; retrying", exc_info=True)
+                time.sleep(1.0)
+
+    def _handle(self, message, origin):
+        if message.get("type") != "message":
+            return
+        try:
+            data = json.loads(message["data"])
+        except (TypeError, ValueError):
+            return
+        if data.get("origin") == origin:
+            return
+        cache = self._resolve(data.get("namespace"))
+        if cache is not None:
+            cache.apply_remote_invalidation(data.get("op"), data.get("args") or [])
+            self.received += 1
+
+
+_REGISTRY = {}
+_REGISTRY_LOCK = Lock()
+_REDIS_CLIENT = None
+_BUS = None
+
+
+def _registered_cache(namespace):
+    with _REGISTRY_LOCK:
+        return _REGISTRY.get(namespace)
+
+
+def _env_budget(namespace, suffix, default):
+    env_key = f"CACHE_{namespace.upper().replace('-', '_')}_{suffix}"
+    raw = os.getenv(env_key)
+    if raw is None or not str(raw).strip():
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def _redis_client():
+    """The request-path client: every call is bounded by the socket timeouts."""
+    global _REDIS_CLIENT
+    if _REDIS_CLIENT is None:
+        import redis
+
+        timeout_sec = float(os.getenv("CACHE_REDIS_SOCKET_TIMEOUT_SEC", "0.5") or 0.5)
+        _REDIS_CLIENT = redis.Redis.from_url(
+            os.getenv("CACHE_REDIS_URL"),
+            socket_timeout=timeout_sec,
+            socket_connect_timeout=timeout_sec,
+            health_check_interval=30,
+        )
+    return _REDIS_CLIENT
+
+
+def _invalidation_bus():
+    global _BUS
+    if _BUS is None and (os.getenv("CACHE_REDIS_URL") or "").strip():
+        import redis
+
+        # The subscriber blocks on reads, so it gets its own connection
+        # without the request-path socket timeout; publishes run on request
+        # threads and use the timed client.
+        _BUS = InvalidationBus(
+            lambda: redis.Redis.from_url(os.getenv("CACHE_REDIS_URL")),
+            os.getenv("CACHE_INVALIDATION_CHANNEL", "hfg:cache:invalidate"),
+            publish_client_factory=_redis_client,
+        )
+    return _BUS
+
+
+def get_cache(namespace, max_items, max_bytes=0, default_ttl_sec=60, shared=True):
+    """Return the process-wide cache for ``namespace``, creating it on first use.
+
+    ``shared=False`` keeps the namespace in process even when
+    ``CACHE_BACKEND=redis``; use it for small, very hot lookups where a
+    network round trip would cost more than the miss it saves.
+    """
+    with _REGISTRY_LOCK:
+        cache = _REGISTRY.get(namespace)
+        if cache is not None:
+            if cache._bus is not None:
+                cache._bus.start()
+            return cache
+        backend = (os.getenv("CACHE_BACKEND") or "memory").strip().lower()
+        if shared and backend == "redis":
+            cache = RedisCache(
+                namespace,
+                _redis_client(),
+                prefix=os.getenv("CACHE_REDIS_PREFIX", "hfg:cache:"),
+                default_ttl_sec=default_ttl_sec,
+            )
+        else:
+            cache = TTLCache(
+                namespace,
+                max_items=_env_budget(namespace, "MAX_ITEMS", max_items),
+                max_bytes=_env_budget(namespace, "MAX_BYTES", max_bytes),
+                default_ttl_sec=default_ttl_sec,
+            )
+            cache._bus = _invalidation_bus()
+        _REGISTRY[namespace] = cache
+    if cache._bus is not None:
+        cache._bus.start()
+    return cache
+
+
+def _reset_bus_after_fork():
+    # Threads do not survive fork (e.g. gunicorn --preload). Connecting and
+    # starting threads inside the fork handler is unsafe, so the child only
+    # drops the parent's state and resubscribes on its first cache use.
+    if _BUS is not None:
+        _BUS.reset_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_bus_after_fork)
+
+
+def cache_stats():
+    with _REGISTRY_LOCK:
+        caches = list(_REGISTRY.values())
+    return {cache.namespace: cache.stats() for cache in caches}
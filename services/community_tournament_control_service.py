@@ -7,6 +7,7 @@ from urllib.parse import urlparse
 
 from sqlalchemy import func, or_
 
+from db.dialect import insert_for_dialect
 from db.extensions import db
 from models.communityTournament import (
     CommunityFileAsset,
@@ -29,6 +30,7 @@ from models.communityTournamentOperations import (
     CommunityTournamentMatch,
     CommunityTournamentPayout,
     CommunityTournamentReview,
+    CommunityTournamentStanding,
     CommunityTournamentTeam,
     CommunityTournamentTeamMember,
 )
@@ -471,6 +473,9 @@ def manage_team(host_user_id, tournament_id, team_id, payload):
         if not registration:
             raise CommunityValidationError("team registration not found")
         _refund_or_cancel_registration(registration, tournament)
+        # A freed seat reopens a tournament closed only for being full; seat
+        # claims go by the stored status.
+        sync_tournament_status(tournament)
         team.status = CommunityTeamStatus.REJECTED
         team.rejection_reason = reason or "Refunded by host"
     else:
@@ -853,65 +858,161 @@ def list_private_matches(user_id, tournament_id, filters):
     return list_matches(tournament_id, filters, include_lobby=True, tournament=tournament)
 
 
+_STANDING_COUNTERS = ("played", "wins", "losses", "points", "score_for", "score_against")
+
+
+def _match_standing_deltas(match):
+    """What one completed match adds to each team's standing row."""
+    deltas = {}
+
+    def _add(team_id, **values):
+        row = deltas.setdefault(team_id, dict.fromkeys(_STANDING_COUNTERS, 0))
+        for name, value in values.items():
+            row[name] += value
+
+    if match.standings:
+        for entry in match.standings:
+            try:
+                team_id = uuid.UUID(str(entry["team_id"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            _add(
+                team_id,
+                played=1,
+                points=int(entry.get("points") or 0),
+                wins=1 if int(entry.get("placement") or 0) == 1 else 0,
+            )
+        return deltas
+    if not match.team_a_id or not match.team_b_id:
+        return deltas
+    _add(match.team_a_id, played=1)
+    _add(match.team_b_id, played=1)
+    if match.winner_team_id in {match.team_a_id, match.team_b_id}:
+        _add(match.winner_team_id, wins=1, points=3)
+    loser_id = match.team_b_id if match.winner_team_id == match.team_a_id else match.team_a_id
+    _add(loser_id, losses=1)
+    if match.team_a_score is not None and match.team_b_score is not None:
+        _add(match.team_a_id, score_for=match.team_a_score, score_against=match.team_b_score)
+        _add(match.team_b_id, score_for=match.team_b_score, score_against=match.team_a_score)
+    return deltas
+
+
+def _apply_standing_deltas(tournament_id, deltas, sign=1):
+    # Only the tournament's own teams get rows, whichever path applies the deltas.
+    team_ids = {
+        row[0] for row in db.session.query(CommunityTournamentTeam.id)
+        .filter(
+            CommunityTournamentTeam.tournament_id == tournament_id,
+            CommunityTournamentTeam.id.in_(list(deltas)),
+        )
+        .all()
+    } if deltas else set()
+    deltas = {team_id: row for team_id, row in deltas.items() if team_id in team_ids}
+    if not deltas:
+        return
+    table = CommunityTournamentStanding.__table__
+    statement = insert_for_dialect(CommunityTournamentStanding.__table__).values([
+        {"tournament_id": tournament_id, "team_id": team_id, **{name: sign * value for name, value in row.items()}}
+        for team_id, row in deltas.items()
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.tournament_id, table.c.team_id],
+        set_={
+            **{name: table.c[name] + statement.excluded[name] for name in _STANDING_COUNTERS},
+            "updated_at": func.now(),
+        },
+    )
+    db.session.execute(statement)
+
+
+def _record_match_standings(match, sign=1):
+    """Add (or with ``sign=-1`` remove) a completed match's standing contribution.
+
+    Runs inside the caller's transaction, which already holds the match row
+    lock, so a match is never counted twice.
+    """
+    _apply_standing_deltas(match.tournament_id, _match_standing_deltas(match), sign)
+
+
+def rebuild_tournament_standings(tournament_id=None):
+    """Recompute the standings projection from completed matches.
+
+    Rebuilds one tournament, or when ``tournament_id`` is omitted every
+    tournament with completed matches or existing standing rows, so stale rows
+    are cleared too. Returns the number of tournaments rebuilt.
+    """
+    tournament_ids = [tournament_id] if tournament_id else [
+        row[0] for row in db.session.query(CommunityTournamentMatch.tournament_id)
+        .filter(CommunityTournamentMatch.status == CommunityMatchStatus.COMPLETED)
+        .union(db.session.query(CommunityTournamentStanding.tournament_id))
+        .all()
+    ]
+    for current_id in tournament_ids:
+        # Every path that completes or restarts a match locks its row first,
+        # so holding all of the tournament's match rows keeps the projection
+        # from changing underneath the rebuild.
+        matches = CommunityTournamentMatch.query.filter_by(tournament_id=current_id).with_for_update().all()
+        CommunityTournamentStanding.query.filter_by(tournament_id=current_id).delete(synchronize_session=False)
+        totals = {}
+        for match in matches:
+            if match.status != CommunityMatchStatus.COMPLETED:
+                continue
+            for team_id, row in _match_standing_deltas(match).items():
+                total = totals.setdefault(team_id, dict.fromkeys(_STANDING_COUNTERS, 0))
+                for name, value in row.items():
+                    total[name] += value
+        _apply_standing_deltas(current_id, totals)
+        db.session.commit()
+    return len(tournament_ids)
+
+
 def leaderboard(tournament_id, invite_code=None):
     tournament = CommunityTournament.query.filter_by(id=tournament_id).first()
     if not tournament:
         raise CommunityValidationError("tournament not found")
     _require_private_access(tournament, invite_code)
-    teams = CommunityTournamentTeam.query.filter_by(tournament_id=tournament_id).all()
-    standings = {
-        team.id: {
-            "team_id": str(team.id),
-            "team_name": team.name,
-            "played": 0,
-            "wins": 0,
-            "losses": 0,
-            "points": 0,
-            "score_for": 0,
-            "score_against": 0,
-        }
-        for team in teams
-    }
-    matches = CommunityTournamentMatch.query.filter_by(
-        tournament_id=tournament_id,
-        status=CommunityMatchStatus.COMPLETED,
-    ).all()
-    for match in matches:
-        if match.standings:
-            for entry in match.standings:
-                try:
-                    team_id = uuid.UUID(str(entry["team_id"]))
-                except (KeyError, TypeError, ValueError):
-                    continue
-                if team_id not in standings:
-                    continue
-                standings[team_id]["played"] += 1
-                standings[team_id]["points"] += int(entry.get("points") or 0)
-                if int(entry.get("placement") or 0) == 1:
-                    standings[team_id]["wins"] += 1
-            continue
-        if not match.team_a_id or not match.team_b_id:
-            continue
-        for team_id in (match.team_a_id, match.team_b_id):
-            if team_id in standings:
-                standings[team_id]["played"] += 1
-        if match.winner_team_id in standings:
-            standings[match.winner_team_id]["wins"] += 1
-            standings[match.winner_team_id]["points"] += 3
-        loser_id = match.team_b_id if match.winner_team_id == match.team_a_id else match.team_a_id
-        if loser_id in standings:
-            standings[loser_id]["losses"] += 1
-        if match.team_a_score is not None and match.team_b_score is not None:
-            standings[match.team_a_id]["score_for"] += match.team_a_score
-            standings[match.team_a_id]["score_against"] += match.team_b_score
-            standings[match.team_b_id]["score_for"] += match.team_b_score
-            standings[match.team_b_id]["score_against"] += match.team_a_score
-    items = sorted(
-        standings.values(),
-        key=lambda row: (-row["points"], -(row["score_for"] - row["score_against"]), row["team_name"].lower()),
+    standing = CommunityTournamentStanding
+    points = func.coalesce(standing.points, 0)
+    score_for = func.coalesce(standing.score_for, 0)
+    score_against = func.coalesce(standing.score_against, 0)
+    rows = (
+        db.session.query(
+            CommunityTournamentTeam.id,
+            CommunityTournamentTeam.name,
+            func.coalesce(standing.played, 0),
+            func.coalesce(standing.wins, 0),
+            func.coalesce(standing.losses, 0),
+            points,
+            score_for,
+            score_against,
+        )
+        .outerjoin(
+            standing,
+            (standing.tournament_id == CommunityTournamentTeam.tournament_id)
+            & (standing.team_id == CommunityTournamentTeam.id),
+        )
+        .filter(CommunityTournamentTeam.tournament_id == tournament.id)
+        .order_by(
+            points.desc(),
+            (score_for - score_against).desc(),
+            func.lower(CommunityTournamentTeam.name),
+            CommunityTournamentTeam.id,
+        )
+        .all()
     )
-    for index, item in enumerate(items, start=1):
-        item["position"] = index
+    items = []
+    for index, row in enumerate(rows, start=1):
+        items.append({
+            "team_id": str(row[0]),
+            "team_name": row[1],
+            "played": int(row[2]),
+            "wins": int(row[3]),
+            "losses": int(row[4]),
+            "points": int(row[5]),
+            "score_for": int(row[6]),
+            "score_against": int(row[7]),
+            "position": index,
+        })
     return {"items": items}
 
 
@@ -919,6 +1020,7 @@ def _advance_match_winner(match, winner_team_id):
     match.winner_team_id = winner_team_id
     match.status = CommunityMatchStatus.COMPLETED
     match.completed_at = _now()
+    _record_match_standings(match)
     if not match.next_match_id:
         return
     next_match = CommunityTournamentMatch.query.filter_by(id=match.next_match_id).with_for_update().first()
@@ -1465,14 +1567,19 @@ def manage_match(host_user_id, tournament_id, match_id, payload):
         if seen_teams != allowed_ids:
             raise CommunityValidationError("standings must include every match participant")
         normalized.sort(key=lambda row: row["placement"])
+        if match.status == CommunityMatchStatus.COMPLETED:
+            _record_match_standings(match, sign=-1)
         match.standings = normalized
         match.winner_team_id = uuid.UUID(normalized[0]["team_id"])
         match.status = CommunityMatchStatus.COMPLETED
         match.completed_at = _now()
+        _record_match_standings(match)
     elif action == "restart":
         if not reason:
             raise CommunityValidationError("reason is required to restart a match")
         _retract_advanced_winner(match)
+        if match.status == CommunityMatchStatus.COMPLETED:
+            _record_match_standings(match, sign=-1)
         CommunityMatchResultSubmission.query.filter_by(match_id=match.id).delete(synchronize_session=False)
         match.status = CommunityMatchStatus.READY
         match.winner_team_id = None
@@ -1678,61 +1785,159 @@ def list_announcements(tournament_id, requester_user_id):
     return {"items": [row.to_dict() for row in visible]}
 
 
-def host_dashboard(host_user_id):
-    tournaments = CommunityTournament.query.filter_by(host_user_id=int(host_user_id)).all()
-    tournament_ids = [tournament.id for tournament in tournaments]
-    if not tournament_ids:
-        return {"summary": {"active_tournaments": 0, "total_registrations": 0, "entry_fees_collected": 0, "prize_pool": 0, "pending_team_approvals": 0, "matches_requiring_verification": 0, "open_disputes": 0}, "tournaments": []}
-    for tournament in tournaments:
-        sync_tournament_status(tournament)
-    registrations = CommunityTournamentRegistration.query.filter(
-        CommunityTournamentRegistration.tournament_id.in_(tournament_ids),
-        CommunityTournamentRegistration.status == CommunityTournamentRegistrationStatus.CONFIRMED,
-    ).count()
-    pending_teams = CommunityTournamentTeam.query.filter(
-        CommunityTournamentTeam.tournament_id.in_(tournament_ids),
-        CommunityTournamentTeam.status == CommunityTeamStatus.PENDING,
-    ).count()
-    attention_matches = CommunityTournamentMatch.query.filter(
-        CommunityTournamentMatch.tournament_id.in_(tournament_ids),
-        CommunityTournamentMatch.status.in_({CommunityMatchStatus.AWAITING_RESULTS, CommunityMatchStatus.DISPUTED}),
-    ).count()
-    open_disputes = CommunityTournamentDispute.query.filter(
-        CommunityTournamentDispute.tournament_id.in_(tournament_ids),
-        CommunityTournamentDispute.status.in_({CommunityDisputeStatus.OPEN, CommunityDisputeStatus.UNDER_REVIEW}),
-    ).count()
-    items = []
-    for tournament in tournaments:
-        item = tournament.to_dict(include_room_details=True)
-        item["attention"] = {
-            "pending_team_approvals": CommunityTournamentTeam.query.filter_by(tournament_id=tournament.id, status=CommunityTeamStatus.PENDING).count(),
-            "unchecked_in_teams": CommunityTournamentTeam.query.filter(
-                CommunityTournamentTeam.tournament_id == tournament.id,
+_HOST_INACTIVE_STATUSES = {
+    CommunityTournamentStatus.DRAFT,
+    CommunityTournamentStatus.COMPLETED,
+    CommunityTournamentStatus.CANCELLED,
+}
+_VERIFICATION_MATCH_STATUSES = {CommunityMatchStatus.AWAITING_RESULTS, CommunityMatchStatus.DISPUTED}
+_OPEN_DISPUTE_STATUSES = {CommunityDisputeStatus.OPEN, CommunityDisputeStatus.UNDER_REVIEW}
+
+
+def _host_attention_counts(host_tournament_ids):
+    """Per-tournament attention counters for a host, one grouped query per table."""
+    counts = {}
+
+    def _merge(rows, *names):
+        for row in rows:
+            entry = counts.setdefault(row[0], {
+                "pending_team_approvals": 0,
+                "unchecked_in_teams": 0,
+                "matches_requiring_verification": 0,
+                "open_disputes": 0,
+            })
+            for name, value in zip(names, row[1:]):
+                entry[name] = int(value or 0)
+
+    _merge(
+        db.session.query(
+            CommunityTournamentTeam.tournament_id,
+            func.count().filter(CommunityTournamentTeam.status == CommunityTeamStatus.PENDING),
+            func.count().filter(
                 CommunityTournamentTeam.status == CommunityTeamStatus.APPROVED,
                 CommunityTournamentTeam.checked_in_at.is_(None),
-            ).count(),
-            "matches_requiring_verification": CommunityTournamentMatch.query.filter(
-                CommunityTournamentMatch.tournament_id == tournament.id,
-                CommunityTournamentMatch.status.in_({CommunityMatchStatus.AWAITING_RESULTS, CommunityMatchStatus.DISPUTED}),
-            ).count(),
-            "open_disputes": CommunityTournamentDispute.query.filter(
-                CommunityTournamentDispute.tournament_id == tournament.id,
-                CommunityTournamentDispute.status.in_({CommunityDisputeStatus.OPEN, CommunityDisputeStatus.UNDER_REVIEW}),
-            ).count(),
+            ),
+        )
+        .filter(
+            CommunityTournamentTeam.tournament_id.in_(host_tournament_ids),
+            CommunityTournamentTeam.status.in_({CommunityTeamStatus.PENDING, CommunityTeamStatus.APPROVED}),
+        )
+        .group_by(CommunityTournamentTeam.tournament_id)
+        .all(),
+        "pending_team_approvals",
+        "unchecked_in_teams",
+    )
+    _merge(
+        db.session.query(CommunityTournamentMatch.tournament_id, func.count())
+        .filter(
+            CommunityTournamentMatch.tournament_id.in_(host_tournament_ids),
+            CommunityTournamentMatch.status.in_(_VERIFICATION_MATCH_STATUSES),
+        )
+        .group_by(CommunityTournamentMatch.tournament_id)
+        .all(),
+        "matches_requiring_verification",
+    )
+    _merge(
+        db.session.query(CommunityTournamentDispute.tournament_id, func.count())
+        .filter(
+            CommunityTournamentDispute.tournament_id.in_(host_tournament_ids),
+            CommunityTournamentDispute.status.in_(_OPEN_DISPUTE_STATUSES),
+        )
+        .group_by(CommunityTournamentDispute.tournament_id)
+        .all(),
+        "open_disputes",
+    )
+    return counts
+
+
+def host_dashboard(host_user_id, filters=None):
+    """Host overview: totals across every tournament plus the tournament list.
+
+    The number of queries is fixed regardless of how many tournaments the host
+    has run: attention counters are grouped aggregates, and only tournaments
+    whose status can still move on the clock are synced. The list is paged,
+    with a ``pagination`` block, only when ``page``, ``per_page`` or ``limit``
+    is sent; otherwise every tournament comes back as before paging existed.
+    """
+    host_user_id = int(host_user_id)
+    filters = filters or {}
+    paged = any(name in filters for name in ("page", "per_page", "limit"))
+    page, per_page = _pagination(filters)
+    empty_attention = {
+        "pending_team_approvals": 0,
+        "unchecked_in_teams": 0,
+        "matches_requiring_verification": 0,
+        "open_disputes": 0,
+    }
+
+    active = CommunityTournament.query.filter(
+        CommunityTournament.host_user_id == host_user_id,
+        CommunityTournament.status.notin_(_HOST_INACTIVE_STATUSES),
+    ).all()
+    changed = False
+    for tournament in active:
+        changed = sync_tournament_status(tournament) or changed
+    if changed:
+        db.session.commit()
+
+    totals = db.session.query(
+        func.count(CommunityTournament.id),
+        func.count(CommunityTournament.id).filter(CommunityTournament.status.notin_(_HOST_INACTIVE_STATUSES)),
+        func.coalesce(func.sum(CommunityTournament.total_collection), 0),
+        func.coalesce(func.sum(CommunityTournament.prize_pool), 0),
+    ).filter(CommunityTournament.host_user_id == host_user_id).one()
+    total_tournaments = int(totals[0] or 0)
+    paging = {}
+    if paged:
+        paging["pagination"] = {
+            "page": page,
+            "per_page": per_page,
+            "total": total_tournaments,
+            "pages": (total_tournaments + per_page - 1) // per_page,
         }
+    if not total_tournaments:
+        return {"summary": {"active_tournaments": 0, "total_registrations": 0, "entry_fees_collected": 0, "prize_pool": 0, "pending_team_approvals": 0, "matches_requiring_verification": 0, "open_disputes": 0}, "tournaments": [], **paging}
+
+    host_tournament_ids = (
+        db.session.query(CommunityTournament.id)
+        .filter(CommunityTournament.host_user_id == host_user_id)
+        .scalar_subquery()
+    )
+    registrations = (
+        db.session.query(func.count(CommunityTournamentRegistration.id))
+        .filter(
+            CommunityTournamentRegistration.tournament_id.in_(host_tournament_ids),
+            CommunityTournamentRegistration.status == CommunityTournamentRegistrationStatus.CONFIRMED,
+        )
+        .scalar()
+    )
+    attention = _host_attention_counts(host_tournament_ids)
+
+    tournaments = (
+        CommunityTournament.query
+        .filter(CommunityTournament.host_user_id == host_user_id)
+        .order_by(CommunityTournament.created_at.desc(), CommunityTournament.id.desc())
+    )
+    if paged:
+        tournaments = tournaments.offset((page - 1) * per_page).limit(per_page)
+    tournaments = tournaments.all()
+    items = []
+    for tournament in tournaments:
+        item = tournament.to_dict(include_room_details=True)
+        item["attention"] = dict(attention.get(tournament.id, empty_attention))
         items.append(item)
-    db.session.commit()
     return {
         "summary": {
-            "active_tournaments": sum(1 for tournament in tournaments if tournament.status not in {CommunityTournamentStatus.DRAFT, CommunityTournamentStatus.COMPLETED, CommunityTournamentStatus.CANCELLED}),
-            "total_registrations": registrations,
-            "entry_fees_collected": float(sum(Decimal(str(tournament.total_collection or 0)) for tournament in tournaments)),
-            "prize_pool": float(sum(Decimal(str(tournament.prize_pool or 0)) for tournament in tournaments)),
-            "pending_team_approvals": pending_teams,
-            "matches_requiring_verification": attention_matches,
-            "open_disputes": open_disputes,
+            "active_tournaments": int(totals[1] or 0),
+            "total_registrations": int(registrations or 0),
+            "entry_fees_collected": float(Decimal(str(totals[2] or 0))),
+            "prize_pool": float(Decimal(str(totals[3] or 0))),
+            "pending_team_approvals": sum(entry["pending_team_approvals"] for entry in attention.values()),
+            "matches_requiring_verification": sum(entry["matches_requiring_verification"] for entry in attention.values()),
+            "open_disputes": sum(entry["open_disputes"] for entry in attention.values()),
         },
         "tournaments": items,
+        **paging,
     }
 
 
@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal, ROUND_HALF_UP
 import hashlib
@@ -12,7 +13,7 @@ from urllib.parse import urlparse
 import cloudinary
 import cloudinary.uploader
 from flask import current_app
-from sqlalchemy import and_, func, or_
+from sqlalchemy import and_, case, func, or_, update
 from sqlalchemy.exc import IntegrityError
 
 from db.extensions import db
@@ -51,6 +52,7 @@ from models.hashWallet import HashWallet
 from models.notification import Notification
 from models.user import User
 from services.community_dispute_chat_service import provision_dispute_chat_room
+from services.metrics import register_executor
 
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
@@ -115,6 +117,13 @@ TEAM_MODES = {"solo", "duo", "squad", "team", "custom"}
 PLATFORMS = {"mobile", "pc", "console", "cross_platform"}
 REGISTRATION_POLICIES = {"automatic", "manual_approval", "payment", "identity_verification"}
 
+# Razorpay lookups for the reconciliation cron. The pool is bounded so a large
+# backlog cannot open more provider connections than the HTTP pool holds.
+_PAYMENT_FETCH_EXECUTOR = register_executor("community-payment-fetch", ThreadPoolExecutor(
+    max_workers=max(1, int(os.getenv("COMMUNITY_PAYMENT_FETCH_CONCURRENCY", "8") or 8)),
+    thread_name_prefix="community-payment-fetch",
+))
+
 
 class CommunityValidationError(ValueError):
     pass
@@ -1449,8 +1458,13 @@ def _retry_webhook_event(event, error):
         event.next_attempt_at = _now() + timedelta(minutes=min(60, 2 ** min(event.attempts, 6)))
 
 
-def process_pending_community_payment_webhooks(limit=50):
-    """Reconcile durable Razorpay webhook events, including out-of-order delivery."""
+def process_pending_community_payment_webhooks(limit=50, deadline=None):
+    """
+    Reconcile durable Razorpay webhook events, including out-of-order delivery.
+
+    Events still unprocessed when the ``time.monotonic()`` ``deadline`` passes
+    are released for the next run without spending an attempt.
+    """
     from services.payment_service import fetch_tournament_payment
 
     now = _now()
@@ -1479,7 +1493,7 @@ def process_pending_community_payment_webhooks(limit=50):
         .limit(min(max(int(limit or 50), 1), 100))
         .all()
     )
-    summary = {"processed": 0, "settled": 0, "retried": 0, "failed": 0}
+    summary = {"processed": 0, "settled": 0, "retried": 0, "failed": 0, "deferred": 0}
     event_ids = []
     for event in events:
         event.status = CommunityPaymentWebhookStatus.PROCESSING
@@ -1487,7 +1501,11 @@ def process_pending_community_payment_webhooks(limit=50):
         event_ids.append(event.id)
     if event_ids:
         db.session.commit()
-    for event_id in event_ids:
+    for index, event_id in enumerate(event_ids):
+        if _pass_expired(deadline):
+            _release_webhook_events(event_ids[index:])
+            summary["deferred"] = len(event_ids) - index
+            break
         summary["processed"] += 1
         try:
             event = CommunityPaymentWebhookEvent.query.filter_by(id=event_id).first()
@@ -1540,19 +1558,120 @@ def process_pending_community_payment_webhooks(limit=50):
     return summary
 
 
+def _release_webhook_events(event_ids):
+    for event in CommunityPaymentWebhookEvent.query.filter(CommunityPaymentWebhookEvent.id.in_(event_ids)).all():
+        event.status = CommunityPaymentWebhookStatus.RETRY
+        event.attempts = max(0, int(event.attempts or 0) - 1)
+        event.next_attempt_at = None
+    db.session.commit()
+
+
+def community_payment_webhook_queue_metrics():
+    """Depth and lag of the webhook inbox, for the worker log and cron probes."""
+    now = _now()
+    ready_statuses = {CommunityPaymentWebhookStatus.PENDING, CommunityPaymentWebhookStatus.RETRY}
+    by_status = dict(
+        db.session.query(CommunityPaymentWebhookEvent.status, func.count())
+        .filter(CommunityPaymentWebhookEvent.status != CommunityPaymentWebhookStatus.PROCESSED)
+        .group_by(CommunityPaymentWebhookEvent.status)
+        .all()
+    )
+    ready, oldest_ready_at = (
+        db.session.query(func.count(), func.min(CommunityPaymentWebhookEvent.created_at))
+        .filter(
+            CommunityPaymentWebhookEvent.status.in_(ready_statuses),
+            or_(
+                CommunityPaymentWebhookEvent.next_attempt_at.is_(None),
+                CommunityPaymentWebhookEvent.next_attempt_at <= now,
+            ),
+        )
+        .one()
+    )
+    lag_sec = 0.0
+    if oldest_ready_at is not None:
+        if oldest_ready_at.tzinfo is None and now.tzinfo is not None:
+            oldest_ready_at = oldest_ready_at.replace(tzinfo=now.tzinfo)
+        lag_sec = max(0.0, (now - oldest_ready_at).total_seconds())
+    return {
+        "ready": int(ready or 0),
+        "pending": int(by_status.get(CommunityPaymentWebhookStatus.PENDING, 0)),
+        "retry": int(by_status.get(CommunityPaymentWebhookStatus.RETRY, 0)),
+        "processing": int(by_status.get(CommunityPaymentWebhookStatus.PROCESSING, 0)),
+        "failed": int(by_status.get(CommunityPaymentWebhookStatus.FAILED, 0)),
+        "oldest_ready_lag_sec": round(lag_sec, 3),
+    }
+
+
+def _claim_tournament_seat(tournament_id):
+    """
+    Take one seat with a single conditional UPDATE. Returns the new count, or
+    None when the tournament is full or its registration window is no longer
+    open. The row is only locked from this statement until the caller commits.
+
+    The window is checked on the stored row: closing registration and starting
+    the tournament both move ``registration_end_at``, so a registrant who read
+    the tournament before either committed cannot claim a seat after it.
+    """
+    table = CommunityTournament.__table__
+    now = _now()
+    claimed = table.c.registered_players_count + 1
+    return db.session.execute(
+        update(table)
+        .where(
+            table.c.id == tournament_id,
+            table.c.registered_players_count < table.c.max_players,
+            table.c.status.in_({CommunityTournamentStatus.PUBLISHED, CommunityTournamentStatus.REGISTRATION_OPEN}),
+            table.c.registration_start_at <= now,
+            table.c.registration_end_at >= now,
+        )
+        .values(
+            registered_players_count=claimed,
+            # Inside the window a published tournament is open, as _derive_status has it.
+            status=case(
+                (claimed >= table.c.max_players, CommunityTournamentStatus.REGISTRATION_CLOSED),
+                (table.c.status == CommunityTournamentStatus.PUBLISHED, CommunityTournamentStatus.REGISTRATION_OPEN),
+                else_=table.c.status,
+            ),
+        )
+        .returning(table.c.registered_players_count)
+    ).scalar()
+
+
+def _record_registration_created(registration_id, user_id, tournament_id, tournament_title):
+    """Audit and notify after the registration commits; a failure here does not undo it."""
+    try:
+        _audit("registration_created", "community_tournament_registration", registration_id, user_id, metadata={"tournament_id": str(tournament_id)})
+        _notify(user_id, "community_registration_success", "Registration received", f"You registered for {tournament_title}.", tournament_id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        current_app.logger.exception(
+            "Could not record community registration audit/notification",
+            extra={"tournament_id": str(tournament_id), "registration_id": str(registration_id)},
+        )
+
+
 def register_for_tournament(user_id, tournament_id, payment_reference=None, payment_order_id=None, invite_code=None):
-    tournament = CommunityTournament.query.filter_by(id=tournament_id).with_for_update().first()
+    """
+    Register a player without holding the tournament row for the request.
+
+    The checks run on a plain read. A free registration claims its seat with
+    ``_claim_tournament_seat`` right before commit, so a burst of registrants
+    only queues on the row for that one statement. Paid registrations take
+    their seat when the payment is confirmed, which re-syncs the status under
+    the row lock, so nothing here writes the status from the unlocked read.
+    """
+    tournament = CommunityTournament.query.filter_by(id=tournament_id).first()
     if not tournament:
         raise CommunityValidationError("tournament not found")
-    sync_tournament_status(tournament)
-    if tournament.status != CommunityTournamentStatus.REGISTRATION_OPEN:
+    status = _derive_status(tournament)
+    if status != CommunityTournamentStatus.REGISTRATION_OPEN:
         raise CommunityConflictError("registration is not open")
     if tournament.invite_code_hash:
         supplied_hash = _invite_code_hash(invite_code or "")
         if not hmac.compare_digest(tournament.invite_code_hash, supplied_hash):
             raise CommunityForbiddenError("a valid tournament invite code is required")
     if tournament.registered_players_count >= tournament.max_players:
-        tournament.status = CommunityTournamentStatus.REGISTRATION_CLOSED
         raise CommunityConflictError("tournament is full")
     if int(tournament.host_user_id) == int(user_id):
         raise CommunityValidationError("host cannot register for their own tournament")
@@ -1575,6 +1694,8 @@ def register_for_tournament(user_id, tournament_id, payment_reference=None, paym
             db.session.commit()
         return existing
 
+    tournament_ref = tournament.id
+    tournament_title = tournament.title
     reg = CommunityTournamentRegistration(
         tournament_id=tournament.id,
         user_id=int(user_id),
@@ -1596,16 +1717,15 @@ def register_for_tournament(user_id, tournament_id, payment_reference=None, paym
         db.session.rollback()
         raise CommunityConflictError("user is already registered") from exc
 
-    if reg.status == CommunityTournamentRegistrationStatus.CONFIRMED:
-        tournament.registered_players_count += 1
-        _recalculate_prize_pool(tournament)
-        if tournament.registered_players_count >= tournament.max_players:
-            tournament.status = CommunityTournamentStatus.REGISTRATION_CLOSED
     if tournament.entry_fee > 0:
         _queue_payment_settlement(reg, payment_reference, payment_order_id)
-    _audit("registration_created", "community_tournament_registration", reg.id, user_id, metadata={"tournament_id": str(tournament.id)})
-    _notify(user_id, "community_registration_success", "Registration received", f"You registered for {tournament.title}.", tournament.id)
+    elif _claim_tournament_seat(tournament_ref) is None:
+        db.session.rollback()
+        raise CommunityConflictError("tournament is full")
+    # A free entry adds nothing to the collection, so the prize pool is unchanged.
+    registration_id = reg.id
     db.session.commit()
+    _record_registration_created(registration_id, user_id, tournament_ref, tournament_title)
     return reg
 
 
@@ -1728,13 +1848,90 @@ def settle_community_registration_payment(registration_id, payment_details):
     )
 
 
-def process_pending_community_payments(limit=50):
-    """Cron worker: fetch pending Razorpay payments and settle captured ones."""
+def _pass_time_left(deadline):
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def _pass_expired(deadline):
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def _timed_payment_pass(name, run, budget_sec):
+    """Run one reconciliation pass with its own deadline; a failure is reported, not raised."""
+    started = time.monotonic()
+    try:
+        summary = run(started + budget_sec)
+    except Exception as exc:
+        db.session.rollback()
+        current_app.logger.exception("Community payment pass failed", extra={"payment_pass": name})
+        summary = {"processed": 0, "error": str(exc)[:500]}
+    elapsed = time.monotonic() - started
+    summary["elapsed_sec"] = round(elapsed, 3)
+    summary["per_sec"] = round(summary.get("processed", 0) / elapsed, 2) if elapsed > 0 else 0.0
+    return summary
+
+
+def _fetch_settlement_payment(plan):
+    """Provider lookups for one settlement job. Runs on the fetch pool and never touches the session."""
     from services.payment_service import fetch_tournament_payment, fetch_tournament_payment_for_order
 
+    expected = {
+        "expected_registration_id": plan["registration_id"],
+        "expected_user_id": plan["user_id"],
+    }
+    if plan["payment_id"]:
+        try:
+            return fetch_tournament_payment(
+                plan["payment_id"], plan["entry_fee"], plan["currency"], plan["order_id"], **expected
+            )
+        except Exception:
+            if not plan["order_id"]:
+                raise
+    elif not plan["order_id"]:
+        raise CommunityValidationError("Razorpay payment ID is not available yet")
+    return fetch_tournament_payment_for_order(plan["order_id"], plan["entry_fee"], plan["currency"], **expected)
+
+
+def _apply_settlement_fetch(job_id, registration_id, future, summary):
+    """Settle or reschedule one job from its fetch result, on the request's session."""
+    job = CommunityPaymentSettlementJob.query.filter_by(id=job_id).first()
+    if not job:
+        return
+    summary["processed"] += 1
+    try:
+        settle_community_registration_payment(registration_id, future.result())
+        summary["settled"] += 1
+        summary["items"].append({"registration_id": str(registration_id), "status": "settled"})
+        return
+    except Exception as exc:
+        db.session.rollback()
+        error_text = str(exc)[:500]
+        if "status: failed" in error_text.lower():
+            record_community_registration_payment(registration_id, "failed", payment_reference=job.payment_id)
+            job.status = CommunityPaymentSettlementStatus.FAILED
+            job.last_error = error_text
+            job.next_attempt_at = None
+            db.session.commit()
+            summary["failed"] += 1
+            summary["items"].append(job.to_dict())
+            return
+        job.status = CommunityPaymentSettlementStatus.RETRY
+        job.last_error = error_text
+    delay_minutes = min(60, max(1, 2 ** min(job.attempts, 6)))
+    job.next_attempt_at = _now() + timedelta(minutes=delay_minutes)
+    db.session.commit()
+    summary["retried"] += 1
+    summary["items"].append(job.to_dict())
+
+
+def process_pending_settlement_jobs(limit=50, deadline=None):
+    """
+    Settle claimed payment jobs. Razorpay lookups for the whole batch run on
+    the bounded fetch pool; results are applied one at a time on this
+    thread's session, so each registration is still mutated serially. Jobs
+    whose lookup has not finished by ``deadline`` go back to the queue.
+    """
     limit = min(max(int(limit or 50), 1), 100)
-    webhook_summary = process_pending_community_payment_webhooks(limit)
-    recovery_summary = process_pending_duplicate_payment_refunds(limit)
     now = _now()
     jobs = (
         CommunityPaymentSettlementJob.query
@@ -1761,15 +1958,7 @@ def process_pending_community_payments(limit=50):
         .limit(limit)
         .all()
     )
-    summary = {
-        "processed": 0,
-        "settled": 0,
-        "retried": 0,
-        "failed": 0,
-        "items": [],
-        "webhooks": webhook_summary,
-        "duplicate_payment_refunds": recovery_summary,
-    }
+    summary = {"processed": 0, "settled": 0, "retried": 0, "failed": 0, "deferred": 0, "items": []}
     job_ids = []
     for job in jobs:
         job.status = CommunityPaymentSettlementStatus.PROCESSING
@@ -1777,74 +1966,84 @@ def process_pending_community_payments(limit=50):
         job_ids.append(job.id)
     if job_ids:
         db.session.commit()
+
+    futures = {}
     for job_id in job_ids:
         job = CommunityPaymentSettlementJob.query.filter_by(id=job_id).first()
         if not job:
             continue
-        summary["processed"] += 1
         registration = CommunityTournamentRegistration.query.filter_by(id=job.registration_id).first()
         tournament = CommunityTournament.query.filter_by(id=job.tournament_id).first()
         if not registration or not tournament or registration.status != CommunityTournamentRegistrationStatus.PENDING_PAYMENT:
             job.status = CommunityPaymentSettlementStatus.FAILED
             job.last_error = "registration is no longer pending payment"
             db.session.commit()
+            summary["processed"] += 1
             summary["failed"] += 1
             summary["items"].append(job.to_dict())
             continue
-        try:
-            if job.payment_id:
-                try:
-                    payment_details = fetch_tournament_payment(
-                        job.payment_id,
-                        tournament.entry_fee,
-                        tournament.currency,
-                        job.order_id,
-                        expected_registration_id=registration.id,
-                        expected_user_id=registration.user_id,
-                    )
-                except Exception:
-                    if not job.order_id:
-                        raise
-                    payment_details = fetch_tournament_payment_for_order(
-                        job.order_id,
-                        tournament.entry_fee,
-                        tournament.currency,
-                        expected_registration_id=registration.id,
-                        expected_user_id=registration.user_id,
-                    )
-            elif job.order_id:
-                payment_details = fetch_tournament_payment_for_order(
-                    job.order_id,
-                    tournament.entry_fee,
-                    tournament.currency,
-                    expected_registration_id=registration.id,
-                    expected_user_id=registration.user_id,
-                )
-            else:
-                raise CommunityValidationError("Razorpay payment ID is not available yet")
-            settle_community_registration_payment(registration.id, payment_details)
-            summary["settled"] += 1
-            summary["items"].append({"registration_id": str(registration.id), "status": "settled"})
-            continue
-        except Exception as exc:
-            error_text = str(exc)[:500]
-            if "status: failed" in error_text.lower():
-                record_community_registration_payment(registration.id, "failed", payment_reference=job.payment_id)
-                job.status = CommunityPaymentSettlementStatus.FAILED
-                job.last_error = error_text
-                job.next_attempt_at = None
-                db.session.commit()
-                summary["failed"] += 1
-                summary["items"].append(job.to_dict())
-                continue
+        plan = {
+            "payment_id": job.payment_id,
+            "order_id": job.order_id,
+            "entry_fee": tournament.entry_fee,
+            "currency": tournament.currency,
+            "registration_id": registration.id,
+            "user_id": registration.user_id,
+        }
+        futures[_PAYMENT_FETCH_EXECUTOR.submit(_fetch_settlement_payment, plan)] = (job_id, registration.id)
+
+    finished = set()
+    try:
+        for future in as_completed(futures, timeout=_pass_time_left(deadline)):
+            job_id, registration_id = futures[future]
+            finished.add(job_id)
+            _apply_settlement_fetch(job_id, registration_id, future, summary)
+    except FuturesTimeoutError:
+        pass
+    # Lookups still queued or in flight are read-only for these jobs; hand the
+    # jobs back so the next tick picks them up without counting an attempt.
+    deferred = [job_id for job_id, _ in futures.values() if job_id not in finished]
+    for future, (job_id, _) in futures.items():
+        if job_id not in finished:
+            future.cancel()
+    if deferred:
+        for job in CommunityPaymentSettlementJob.query.filter(CommunityPaymentSettlementJob.id.in_(deferred)).all():
             job.status = CommunityPaymentSettlementStatus.RETRY
-            job.last_error = error_text
-        delay_minutes = min(60, max(1, 2 ** min(job.attempts, 6)))
-        job.next_attempt_at = _now() + timedelta(minutes=delay_minutes)
+            job.attempts = max(0, int(job.attempts or 0) - 1)
+            job.next_attempt_at = None
         db.session.commit()
-        summary["retried"] += 1
-        summary["items"].append(job.to_dict())
-    summary["refunds"] = process_pending_community_refunds(limit)
+        summary["deferred"] = len(deferred)
+    return summary
+
+
+def process_pending_community_payments(limit=50):
+    """
+    Cron worker: reconcile the community payment queues.
+
+    Webhook events, duplicate-payment refunds, settlement jobs and pending
+    refunds run as separate passes, each with COMMUNITY_PAYMENT_PASS_BUDGET_SEC
+    of its own and its own elapsed time and throughput in the summary. A pass
+    that fails or runs out of time leaves its remaining work queued and does
+    not stop the passes after it.
+    """
+    limit = min(max(int(limit or 50), 1), 100)
+    budget_sec = float(current_app.config.get("COMMUNITY_PAYMENT_PASS_BUDGET_SEC", 12) or 12)
+    webhook_summary = _timed_payment_pass(
+        "webhooks", lambda deadline: process_pending_community_payment_webhooks(limit, deadline=deadline), budget_sec
+    )
+    recovery_summary = _timed_payment_pass(
+        "duplicate_payment_refunds",
+        lambda deadline: process_pending_duplicate_payment_refunds(limit, deadline=deadline),
+        budget_sec,
+    )
+    summary = _timed_payment_pass(
+        "settlements", lambda deadline: process_pending_settlement_jobs(limit, deadline=deadline), budget_sec
+    )
+    summary["webhooks"] = webhook_summary
+    summary["duplicate_payment_refunds"] = recovery_summary
+    summary["refunds"] = _timed_payment_pass(
+        "refunds", lambda deadline: process_pending_community_refunds(limit, deadline=deadline), budget_sec
+    )
     return summary
 
 
@@ -1919,8 +2118,8 @@ def _refund_or_cancel_registration(registration, tournament):
     return registration
 
 
-def process_pending_community_refunds(limit=50):
-    """Reconcile provider refunds accepted but not yet processed."""
+def process_pending_community_refunds(limit=50, deadline=None):
+    """Reconcile provider refunds accepted but not yet processed, stopping at ``deadline``."""
     from services.payment_service import refund_tournament_payment
 
     registrations = (
@@ -1930,8 +2129,12 @@ def process_pending_community_refunds(limit=50):
         .limit(min(max(int(limit or 50), 1), 100))
         .all()
     )
-    summary = {"processed": 0, "refunded": 0, "pending": 0, "failed": 0, "items": []}
-    for registration in registrations:
+    summary = {"processed": 0, "refunded": 0, "pending": 0, "failed": 0, "deferred": 0, "items": []}
+    for index, registration in enumerate(registrations):
+        if _pass_expired(deadline):
+            # Nothing was claimed; the rest stay refund_pending for the next run.
+            summary["deferred"] = len(registrations) - index
+            break
         summary["processed"] += 1
         registration_id = registration.id
         tournament = CommunityTournament.query.filter_by(id=registration.tournament_id).first()
@@ -1978,8 +2181,13 @@ def process_pending_community_refunds(limit=50):
     return summary
 
 
-def process_pending_duplicate_payment_refunds(limit=50):
-    """Refund captured duplicate payments without altering tournament registration state."""
+def process_pending_duplicate_payment_refunds(limit=50, deadline=None):
+    """
+    Refund captured duplicate payments without altering tournament registration state.
+
+    Recoveries not reached by ``deadline`` go back to the status they were
+    claimed from.
+    """
     from services.payment_service import refund_tournament_payment
 
     limit = min(max(int(limit or 50), 1), 100)
@@ -2009,9 +2217,11 @@ def process_pending_duplicate_payment_refunds(limit=50):
         .limit(limit)
         .all()
     )
-    summary = {"processed": 0, "refunded": 0, "pending": 0, "retried": 0, "failed": 0, "items": []}
+    summary = {"processed": 0, "refunded": 0, "pending": 0, "retried": 0, "failed": 0, "deferred": 0, "items": []}
     recovery_ids = []
+    claimed_from = {}
     for recovery in recoveries:
+        claimed_from[recovery.id] = recovery.status
         recovery.status = CommunityDuplicatePaymentRecoveryStatus.PROCESSING
         recovery.attempts = int(recovery.attempts or 0) + 1
         recovery_ids.append(recovery.id)
@@ -2019,7 +2229,11 @@ def process_pending_duplicate_payment_refunds(limit=50):
         db.session.commit()
 
     max_attempts = int(current_app.config.get("COMMUNITY_PAYMENT_RECONCILIATION_MAX_ATTEMPTS", 12) or 12)
-    for recovery_id in recovery_ids:
+    for index, recovery_id in enumerate(recovery_ids):
+        if _pass_expired(deadline):
+            _release_duplicate_payment_recoveries(recovery_ids[index:], claimed_from)
+            summary["deferred"] = len(recovery_ids) - index
+            break
         summary["processed"] += 1
         try:
             recovery = CommunityDuplicatePaymentRecovery.query.filter_by(id=recovery_id).first()
@@ -2099,6 +2313,18 @@ def process_pending_duplicate_payment_refunds(limit=50):
     return summary
 
 
+def _release_duplicate_payment_recoveries(recovery_ids, claimed_from):
+    for recovery in CommunityDuplicatePaymentRecovery.query.filter(
+        CommunityDuplicatePaymentRecovery.id.in_(recovery_ids)
+    ).all():
+        status = claimed_from.get(recovery.id)
+        if status == CommunityDuplicatePaymentRecoveryStatus.PROCESSING:
+            status = CommunityDuplicatePaymentRecoveryStatus.PENDING_REFUND
+        recovery.status = status or CommunityDuplicatePaymentRecoveryStatus.PENDING_REFUND
+        recovery.attempts = max(0, int(recovery.attempts or 0) - 1)
+    db.session.commit()
+
+
 def list_pending_community_payments(filters):
     page, per_page = _pagination(filters)
     status = str(filters.get("status") or "").strip().lower()
@@ -2294,6 +2520,9 @@ def manage_registration(host_user_id, tournament_id, registration_id, payload):
         except Exception:
             db.session.rollback()
             raise
+        # A freed seat reopens a tournament closed only for being full; seat
+        # claims go by the stored status.
+        sync_tournament_status(tournament)
         title = "Refund initiated" if registration.status == CommunityTournamentRegistrationStatus.REFUND_PENDING else "Registration cancelled"
         _notify(registration.user_id, "community_registration_removed", title, f"Your registration for {tournament.title} was cancelled by the host.", tournament.id)
     else:
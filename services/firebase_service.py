@@ -1,10 +1,13 @@
 # firebase_service.py
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, exceptions as firebase_exceptions, messaging
 from flask import current_app
 
 firebase_app = None  # Global variable to store the initialized app
 
+# FCM accepts at most this many tokens per multicast message.
+FCM_MULTICAST_LIMIT = 500
+
 def init_firebase():
     global firebase_app
     if not firebase_app:
@@ -46,6 +49,43 @@ def send_notification_with_result(token, title, body, data=None):
     except Exception as e:
         return False, None, e
 
+
+def send_multicast_with_results(tokens, title, body, data=None, client=None):
+    """
+    Send one notification to up to FCM_MULTICAST_LIMIT tokens in a single batch
+    call. Returns (token, ok, error) per token in input order. A failure of the
+    batch call itself (timeout, 5xx, auth) is raised, since it says nothing
+    about the tokens. `client` defaults to firebase messaging and only needs
+    `send_each_for_multicast`.
+    """
+    tokens = list(tokens)
+    if len(tokens) > FCM_MULTICAST_LIMIT:
+        raise ValueError(f"at most {FCM_MULTICAST_LIMIT} tokens per multicast")
+    if not tokens:
+        return []
+    message = messaging.MulticastMessage(
+        notification=messaging.Notification(
+            title=title,
+            body=body,
+        ),
+        tokens=tokens,
+        data=data or {},
+    )
+    batch = (client or messaging).send_each_for_multicast(message)
+    results = []
+    for token, response in zip(tokens, batch.responses):
+        if response.success:
+            results.append((token, True, None))
+        else:
+            results.append((token, False, response.exception or Exception("Unknown send error")))
+    return results
+
+
+def is_permanent_token_error(error):
+    """True when FCM rejected the token itself: unregistered, or not a valid token."""
+    return isinstance(error, (messaging.UnregisteredError, firebase_exceptions.InvalidArgumentError))
+
+
 def notify_user_all_tokens(user, title, message):
     """
     Send an FCM notification to all of a user's registered devices.
@@ -0,0 +1,435 @@
+"""Request, cache, pool and executor metrics in Prometheus text format.
+
+``init_metrics(app)`` records every response in a per-endpoint latency
+histogram and a status counter, and serves ``GET /metrics``. The route needs
+``Authorization: Bearer <METRICS_AUTH_TOKEN>`` and is disabled (404) while the
+token is unset. Point-in-time numbers are read when the route is scraped:
+
+* cache hits, misses, evictions and sizes for every ``get_cache`` namespace;
+* SQLAlchemy pool size, checked-out and overflow connections;
+* queue depth of every executor passed to ``register_executor``;
+* outbound Razorpay call counts from ``razorpay_http_stats``.
+
+Each worker process only sees its own numbers. With ``METRICS_MULTIPROC_DIR``
+set (e.g. under gunicorn), every worker writes its snapshot to
+``<dir>/metrics-<pid>.json`` at most every ``METRICS_FLUSH_INTERVAL_SEC`` and
+the scraped worker merges all of them. Counters and histograms are summed,
+including those of workers that have exited, so totals never go backwards.
+Gauges carry a ``pid`` label and are only reported for live workers.
+``gunicorn.conf.py`` empties the directory on start and folds each exited
+worker's file into ``metrics-archive.json`` so recycled workers do not pile up.
+"""
+
+import hmac
+import json
+import logging
+import os
+import tempfile
+import time
+from threading import Lock
+
+from flask import Response, abort, current_app, g, request
+
+from services.cache import cache_stats
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds, from cache hits (a few ms) to requests close to the worker timeout.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_METRIC_HELP = {
+    "hfg_http_request_duration_seconds": ("histogram", "Request latency by route template."),
+    "hfg_http_requests_total": ("counter", "Responses by route template and status code."),
+    "hfg_cache_hits_total": ("counter", "Fresh cache hits."),
+    "hfg_cache_stale_hits_total": ("counter", "Stale entries served while revalidating."),
+    "hfg_cache_misses_total": ("counter", "Cache misses."),
+    "hfg_cache_evictions_total": ("counter", "Entries evicted by the item or byte budget."),
+    "hfg_cache_expirations_total": ("counter", "Entries dropped after their TTL."),
+    "hfg_cache_items": ("gauge", "Entries held by an in-process cache."),
+    "hfg_cache_bytes": ("gauge", "Approximate bytes held by an in-process cache."),
+    "hfg_db_pool_size": ("gauge", "Configured SQLAlchemy pool size."),
+    "hfg_db_pool_checked_out": ("gauge", "Connections currently checked out of the pool."),
+    "hfg_db_pool_overflow": ("gauge", "Connections open beyond pool_size (negative while below it)."),
+    "hfg_executor_queue_depth": ("gauge", "Tasks waiting for a background executor thread."),
+    "hfg_executor_threads": ("gauge", "Threads started by a background executor."),
+    "hfg_razorpay_http_calls_total": ("counter", "Outbound Razorpay calls by route."),
+    "hfg_razorpay_http_errors_total": ("counter", "Outbound Razorpay calls that failed."),
+    "hfg_razorpay_http_retries_total": ("counter", "Retries made by the Razorpay HTTP adapter."),
+}
+
+_CACHE_COUNTERS = (
+    ("hits", "hfg_cache_hits_total"),
+    ("stale_hits", "hfg_cache_stale_hits_total"),
+    ("misses", "hfg_cache_misses_total"),
+    ("evictions", "hfg_cache_evictions_total"),
+    ("expirations", "hfg_cache_expirations_total"),
+)
+
+_EXECUTORS = {}
+_EXECUTORS_LOCK = Lock()
+
+
+class _RequestMetrics:
+    """Latency histograms and status counters keyed by (endpoint, method)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = Lock()
+        # (endpoint, method) -> [per-bucket counts..., sum, count]
+        self._latency = {}
+        # (endpoint, method, status) -> count
+        self._statuses = {}
+
+    def observe(self, endpoint, method, status, elapsed_sec):
+        with self._lock:
+            series = self._latency.get((endpoint, method))
+            if series is None:
+                series = self._latency[(endpoint, method)] = [0] * len(self.buckets) + [0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if elapsed_sec <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += elapsed_sec
+            series[-1] += 1
+            key = (endpoint, method, str(status))
+            self._statuses[key] = self._statuses.get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._latency.clear()
+            self._statuses.clear()
+
+    def samples(self):
+        """Counters and histograms as plain lists, ready for JSON."""
+        with self._lock:
+            latency = {key: list(series) for key, series in self._latency.items()}
+            statuses = dict(self._statuses)
+        histograms = [
+            ["hfg_http_request_duration_seconds", {"endpoint": endpoint, "method": method},
+             series[:-2], series[-2], series[-1]]
+            for (endpoint, method), series in latency.items()
+        ]
+        counters = [
+            ["hfg_http_requests_total", {"endpoint": endpoint, "method": method, "status": status}, count]
+            for (endpoint, method, status), count in statuses.items()
+        ]
+        return counters, histograms
+
+
+_REQUESTS = _RequestMetrics()
+_FLUSH_STATE = {"at": 0.0}
+_FLUSH_LOCK = Lock()
+
+
+def register_executor(name, executor):
+    """Report ``executor``'s queue depth and thread count under ``name``."""
+    with _EXECUTORS_LOCK:
+        _EXECUTORS[name] = executor
+    return executor
+
+
+def _cache_samples():
+    counters, gauges = [], []
+    for namespace, stats in cache_stats().items():
+        labels = {"namespace": namespace, "backend": stats.get("backend", "memory")}
+        for field, name in _CACHE_COUNTERS:
+            counters.append([name, labels, stats.get(field, 0)])
+        if "items" in stats:
+            gauges.append(["hfg_cache_items", labels, stats["items"]])
+            gauges.append(["hfg_cache_bytes", labels, stats.get("bytes", 0)])
+    return counters, gauges
+
+
+def _pool_samples():
+    from db.extensions import db
+
+    gauges = []
+    try:
+        engines = dict(db.engines)
+    except Exception:
+        return gauges
+    for bind, engine in engines.items():
+        pool = engine.pool
+        # SQLite test pools have no queue to report.
+        if not hasattr(pool, "checkedout"):
+            continue
+        labels = {"bind": bind or "default"}
+        gauges.append(["hfg_db_pool_size", labels, pool.size()])
+        gauges.append(["hfg_db_pool_checked_out", labels, pool.checkedout()])
+        gauges.append(["hfg_db_pool_overflow", labels, pool.overflow()])
+    return gauges
+
+
+def _executor_samples():
+    with _EXECUTORS_LOCK:
+        executors = dict(_EXECUTORS)
+    gauges = []
+    for name, executor in executors.items():
+        labels = {"executor": name}
+        gauges.append(["hfg_executor_queue_depth", labels, executor._work_queue.qsize()])
+        gauges.append(["hfg_executor_threads", labels, len(executor._threads)])
+    return gauges
+
+
+def _razorpay_samples():
+    from services.payment_service import razorpay_http_stats
+
+    counters = []
+    for route, stats in razorpay_http_stats().items():
+        labels = {"route": route}
+        counters.append(["hfg_razorpay_http_calls_total", labels, stats.get("calls", 0)])
+        counters.append(["hfg_razorpay_http_errors_total", labels, stats.get("errors", 0)])
+        counters.append(["hfg_razorpay_http_retries_total", labels, stats.get("retries", 0)])
+    return counters
+
+
+def snapshot():
+    """This process's metrics as one JSON-serialisable dict."""
+    counters, histograms = _REQUESTS.samples()
+    cache_counters, gauges = _cache_samples()
+    counters.extend(cache_counters)
+    counters.extend(_razorpay_samples())
+    gauges.extend(_pool_samples())
+    gauges.extend(_executor_samples())
+    return {
+        "pid": os.getpid(),
+        "buckets": list(_REQUESTS.buckets),
+        "counters": counters,
+        "histograms": histograms,
+        "gauges": gauges,
+    }
+
+
+def _multiproc_dir():
+    return (os.getenv("METRICS_MULTIPROC_DIR") or "").strip()
+
+
+def flush_snapshot(force=False):
+    """Write this worker's snapshot for the other workers to merge."""
+    directory = _multiproc_dir()
+    if not directory:
+        return False
+    interval = float(os.getenv("METRICS_FLUSH_INTERVAL_SEC", "1") or 1)
+    now = time.monotonic()
+    with _FLUSH_LOCK:
+        if not force and now - _FLUSH_STATE["at"] < interval:
+            return False
+        _FLUSH_STATE["at"] = now
+    payload = snapshot()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        _write_json(directory, f"metrics-{payload['pid']}.json", payload)
+    except OSError:
+        # Metrics must never fail the request that happened to flush them.
+        logger.warning("could not write metrics snapshot to %s", directory, exc_info=True)
+        return False
+    return True
+
+
+def _merge_into(target, snap):
+    """Add ``snap``'s counters and histograms to ``target`` (gauges are dropped)."""
+    counters = {(name, _label_key(labels)): value for name, labels, value in target.get("counters", [])}
+    for name, labels, value in snap.get("counters", []):
+        key = (name, _label_key(labels))
+        counters[key] = counters.get(key, 0) + value
+    histograms = {
+        (name, _label_key(labels)): [list(counts), total, count]
+        for name, labels, counts, total, count in target.get("histograms", [])
+    }
+    for name, labels, counts, total, count in snap.get("histograms", []):
+        merged = histograms.setdefault((name, _label_key(labels)), [[0] * len(counts), 0.0, 0])
+        merged[0] = [a + b for a, b in zip(merged[0], counts)]
+        merged[1] += total
+        merged[2] += count
+    target["counters"] = [[name, dict(labels), value] for (name, labels), value in counters.items()]
+    target["histograms"] = [
+        [name, dict(labels), counts, total, count]
+        for (name, labels), (counts, total, count) in histograms.items()
+    ]
+    target["gauges"] = []
+    return target
+
+
+def _write_json(directory, name, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as handle:
+            json.dump(payload, handle)
+        os.replace(tmp_path, os.path.join(directory, name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def reset_multiproc_dir():
+    """Remove every snapshot; run once in the master before workers start."""
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.startswith(("metrics-", ".metrics-")):
+            os.unlink(os.path.join(directory, name))
+
+
+def fold_exited_worker(pid):
+    """Move an exited worker's totals into metrics-archive.json.
+
+    Only the gunicorn master calls this (``child_exit``), so the archive has a
+    single writer.
+    """
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    worker_path = os.path.join(directory, f"metrics-{int(pid)}.json")
+    archive_path = os.path.join(directory, "metrics-archive.json")
+    try:
+        with open(worker_path) as handle:
+            snap = json.load(handle)
+    except (OSError, ValueError):
+        return
+    try:
+        with open(archive_path) as handle:
+            archive = json.load(handle)
+    except (OSError, ValueError):
+        archive = {"pid": None, "buckets": snap.get("buckets") or list(LATENCY_BUCKETS)}
+    _write_json(directory, "metrics-archive.json", _merge_into(archive, snap))
+    os.unlink(worker_path)
+
+
+def _pid_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect():
+    directory = _multiproc_dir()
+    if not directory:
+        return [snapshot()], False
+    flush_snapshot(force=True)
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("metrics-") and name.endswith(".json")):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as handle:
+                snapshots.append(json.load(handle))
+        except (OSError, ValueError):
+            continue
+    return snapshots, True
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels:
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value):
+    if isinstance(value, float) and value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+def render_prometheus():
+    """Prometheus text exposition (version 0.0.4) of every worker's metrics."""
+    snapshots, multiprocess = _collect()
+    scalars = {}
+    histograms = {}
+    buckets = tuple(LATENCY_BUCKETS)
+    for snap in snapshots:
+        buckets = tuple(snap.get("buckets") or buckets)
+        for name, labels, value in snap.get("counters", []):
+            key = (name, _label_key(labels))
+            scalars[key] = scalars.get(key, 0) + value
+        if not multiprocess or _pid_alive(snap.get("pid")):
+            for name, labels, value in snap.get("gauges", []):
+                if multiprocess:
+                    labels = dict(labels, pid=str(snap.get("pid")))
+                scalars[(name, _label_key(labels))] = value
+        for name, labels, counts, total, count in snap.get("histograms", []):
+            key = (name, _label_key(labels))
+            merged = histograms.get(key)
+            if merged is None:
+                histograms[key] = [list(counts), total, count]
+            else:
+                merged[0] = [a + b for a, b in zip(merged[0], counts)]
+                merged[1] += total
+                merged[2] += count
+
+    lines = []
+    for name, (metric_type, help_text) in _METRIC_HELP.items():
+        if metric_type == "histogram":
+            series = sorted((key, value) for key, value in histograms.items() if key[0] == name)
+        else:
+            series = sorted((key, value) for key, value in scalars.items() if key[0] == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for (_, labels), value in series:
+            if metric_type != "histogram":
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            counts, total, count = value
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + (float("inf"),), counts + [count - sum(counts)]):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", _format_value(float(bound))),)
+                lines.append(f"{name}_bucket{_format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(float(total))}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def _authorized():
+    expected = str(current_app.config.get("METRICS_AUTH_TOKEN") or "").strip()
+    if not expected:
+        abort(404)
+    supplied = str(request.headers.get("Authorization") or "").strip()
+    if supplied.lower().startswith("bearer "):
+        supplied = supplied[7:].strip()
+    return hmac.compare_digest(supplied, expected)
+
+
+def init_metrics(app):
+    """Record every response and serve ``GET /metrics`` on ``app``."""
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start_ts = getattr(g, "request_start_ts", None)
+        if start_ts is not None and request.method != "OPTIONS":
+            rule = request.url_rule
+            _REQUESTS.observe(
+                rule.rule if rule is not None else "<unmatched>",
+                request.method,
+                response.status_code,
+                time.perf_counter() - start_ts,
+            )
+            flush_snapshot()
+        return response
+
+    @app.route("/metrics", methods=["GET"])
+    def prometheus_metrics():
+        if not _authorized():
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(render_prometheus(), mimetype="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,144 @@
+"""Process-wide snapshot of the active pass catalog.
+
+Every user sees the same active passes; only ``is_bought`` differs. The
+snapshot holds each active ``CafePass`` as a plain dict with its pass type,
+vendor name and vendor images already resolved. The pass endpoints overlay
+one ``user_passes`` lookup on it instead of rebuilding the catalog per user.
+
+Passes are edited outside this service, so the snapshot follows
+``catalog_versions.version`` for ``cafe_passes``. The triggers in
+sql/20261018_pass_catalog_version.sql bump it on any write to cafe_passes,
+pass_types, images or a vendor's name. At most once per
+PASS_CATALOG_CHECK_SEC, one request reads the version and reloads the
+snapshot if it moved.
+"""
+
+import time
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import select, text
+from sqlalchemy.orm import joinedload, selectinload
+
+from db.extensions import db
+from models.cafePass import CafePass
+from models.userPass import UserPass
+from models.vendor import Vendor
+
+
+CATALOG_NAME = "cafe_passes"
+
+
+def _pass_entry(p):
+    return {
+        "id": p.id,
+        "name": p.name,
+        "price": p.price,
+        "days_valid": p.days_valid,
+        "description": p.description,
+        "pass_type": p.pass_type.name if p.pass_type else None,
+        "vendor_id": p.vendor_id,
+        "vendor_name": p.vendor.cafe_name if p.vendor else "Hash Pass",
+        # Only vendor passes have vendor images.
+        "vendor_images": [{"id": img.id, "url": img.url} for img in p.vendor.images] if p.vendor else [],
+        "pass_mode": p.pass_mode,  # 'date_based' or 'hour_based'
+        "total_hours": float(p.total_hours) if p.total_hours else None,
+        "hour_calculation_mode": p.hour_calculation_mode,  # 'actual_duration' or 'vendor_config'
+        "hours_per_slot": float(p.hours_per_slot) if p.hours_per_slot else None,
+    }
+
+
+class _PassCatalog:
+    """Active passes ordered by id, reloaded when the catalog version changes."""
+
+    def __init__(self):
+        self.entries = ()
+        self.version = None
+        self.checked_at = None
+        self._lock = Lock()
+
+    def passes(self, pass_type_filter=None):
+        check_sec = float(current_app.config.get("PASS_CATALOG_CHECK_SEC", 5) or 5)
+        if self._due(time.monotonic(), check_sec):
+            # Only the first load makes callers wait; later checks are done by
+            # whichever request gets the lock while the rest read the old snapshot.
+            if self._lock.acquire(blocking=self.checked_at is None):
+                try:
+                    now = time.monotonic()
+                    if self._due(now, check_sec):
+                        self._check(now)
+                finally:
+                    self._lock.release()
+        entries = self.entries
+        if pass_type_filter == "vendor":
+            return [entry for entry in entries if entry["vendor_id"] is not None]
+        if pass_type_filter == "hash":
+            return [entry for entry in entries if entry["vendor_id"] is None]
+        return list(entries)
+
+    def reset(self):
+        with self._lock:
+            self.entries = ()
+            self.version = None
+            self.checked_at = None
+
+    def _due(self, now, check_sec):
+        return self.checked_at is None or now - self.checked_at >= check_sec
+
+    def _check(self, now):
+        try:
+            version = db.session.execute(
+                text("SELECT version FROM catalog_versions WHERE name = :name"), {"name": CATALOG_NAME}
+            ).scalar()
+        except Exception:
+            # Without the version table, fall back to reloading every check.
+            db.session.rollback()
+            current_app.logger.warning("Could not read the pass catalog version", exc_info=True)
+            version = None
+        if version is not None and version == self.version and self.checked_at is not None:
+            self.checked_at = now
+            return
+        try:
+            passes = db.session.execute(
+                select(CafePass)
+                .options(
+                    joinedload(CafePass.pass_type),
+                    joinedload(CafePass.vendor).selectinload(Vendor.images),
+                )
+                .where(CafePass.is_active == True)  # noqa: E712
+                .order_by(CafePass.id)
+            ).unique().scalars().all()
+            entries = tuple(_pass_entry(p) for p in passes)
+        except Exception:
+            if self.checked_at is None:
+                raise
+            db.session.rollback()
+            current_app.logger.warning("Could not reload the pass catalog; serving the old snapshot", exc_info=True)
+            self.checked_at = now
+            return
+        self.entries = entries
+        self.version = version
+        self.checked_at = now
+
+
+_PASS_CATALOG = _PassCatalog()
+
+
+def available_passes(pass_type_filter=None):
+    """Active passes as dicts without ``is_bought``; ``pass_type_filter`` is 'vendor', 'hash' or None."""
+    return _PASS_CATALOG.passes(pass_type_filter)
+
+
+def bought_pass_ids(user_id):
+    """Ids of every pass the user has ever bought, active or expired."""
+    return set(db.session.execute(
+        select(UserPass.cafe_pass_id).where(UserPass.user_id == int(user_id))
+    ).scalars())
+
+
+def available_passes_for_user(user_id, pass_type_filter=None):
+    bought = bought_pass_ids(user_id)
+    return [
+        dict(entry, is_bought=entry["id"] in bought)
+        for entry in available_passes(pass_type_filter)
+    ]
@@ -2,14 +2,19 @@ import os
 import hmac
 import hashlib
 import json
+import logging
+import threading
 import time
 import re
 from decimal import Decimal, ROUND_HALF_UP
 from typing import Tuple, Dict, Any
+from urllib.parse import urlsplit
 
 PROVIDER = os.getenv("PAYMENT_PROVIDER", "mock").lower()    # "mock" | "razorpay" | "stripe"
 CURRENCY_DEFAULT = os.getenv("PAYMENT_CURRENCY", "INR")
 
+logger = logging.getLogger(__name__)
+
 
 def _as_dict(value) -> Dict[str, Any]:
     """Provider webhooks are untrusted JSON; only mappings support metadata lookup."""
@@ -260,6 +265,118 @@ def _mock_verify_webhook(payload: bytes, signature: str) -> Tuple[bool, str, str
     status = data.get("status") or data.get("data", {}).get("status") or "succeeded"
     return True, reg_id, status
 
+# ---------------------------
+# Razorpay HTTP client
+# ---------------------------
+
+_RAZORPAY_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Payment, order and refund ids all look like "<prefix>_<alnum>".
+_RAZORPAY_ID_SEGMENT = re.compile(r"/[a-z]+_[A-Za-z0-9]+(?=/|$)")
+
+_RAZORPAY_HTTP = None
+_RAZORPAY_HTTP_LOCK = threading.Lock()
+_RAZORPAY_CALL_STATS: Dict[str, Dict[str, float]] = {}
+_RAZORPAY_STATS_LOCK = threading.Lock()
+
+
+def _razorpay_url(path: str) -> str:
+    return os.getenv("RAZORPAY_API_BASE", "https://api.razorpay.com").rstrip("/") + path
+
+
+def _env_number(name: str, default, cast=int):
+    try:
+        return cast(os.getenv(name) or default)
+    except ValueError:
+        return default
+
+
+def _record_razorpay_call(method: str, url: str, elapsed_ms: float, status: int = None, retries: int = 0):
+    route = f"{method.upper()} {_RAZORPAY_ID_SEGMENT.sub('/{id}', urlsplit(url).path)}"
+    with _RAZORPAY_STATS_LOCK:
+        stats = _RAZORPAY_CALL_STATS.setdefault(
+            route, {"calls": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        stats["calls"] += 1
+        stats["retries"] += retries
+        stats["total_ms"] += elapsed_ms
+        stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+        if status is None or status >= 400:
+            stats["errors"] += 1
+    slow_ms = _env_number("RAZORPAY_HTTP_SLOW_MS", 1000)
+    if elapsed_ms >= slow_ms:
+        logger.warning("razorpay %s took %.1fms status=%s retries=%s", route, elapsed_ms, status, retries)
+
+
+def razorpay_http_stats() -> Dict[str, Dict[str, float]]:
+    """Per-route call counts and latency of outbound Razorpay requests."""
+    with _RAZORPAY_STATS_LOCK:
+        snapshot = {route: dict(stats) for route, stats in _RAZORPAY_CALL_STATS.items()}
+    for stats in snapshot.values():
+        stats["avg_ms"] = round(stats["total_ms"] / stats["calls"], 3) if stats["calls"] else 0.0
+        stats["total_ms"] = round(stats["total_ms"], 3)
+        stats["max_ms"] = round(stats["max_ms"], 3)
+    return snapshot
+
+
+def _build_razorpay_http():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class _InstrumentedSession(requests.Session):
+        def request(self, method, url, *args, **kwargs):
+            started = time.perf_counter()
+            status = None
+            retries = 0
+            try:
+                response = super().request(method, url, *args, **kwargs)
+                status = response.status_code
+                retry_state = getattr(response.raw, "retries", None)
+                retries = len(getattr(retry_state, "history", None) or ())
+                return response
+            finally:
+                _record_razorpay_call(method, url, (time.perf_counter() - started) * 1000.0, status, retries)
+
+    # Only GETs are retried: a replayed POST could create a second order,
+    # capture or refund. The refund path recovers POST timeouts by receipt.
+    retry = Retry(
+        total=_env_number("RAZORPAY_HTTP_MAX_RETRIES", 3),
+        backoff_factor=_env_number("RAZORPAY_HTTP_BACKOFF_SEC", 0.3, float),
+        status_forcelist=_RAZORPAY_RETRY_STATUSES,
+        allowed_methods=frozenset({"GET"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    pool_size = max(1, _env_number("RAZORPAY_HTTP_POOL_SIZE", 20))
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=False, max_retries=retry)
+    session = _InstrumentedSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _razorpay_http():
+    """Process-wide keep-alive session for api.razorpay.com."""
+    global _RAZORPAY_HTTP
+    session = _RAZORPAY_HTTP
+    if session is None:
+        with _RAZORPAY_HTTP_LOCK:
+            if _RAZORPAY_HTTP is None:
+                _RAZORPAY_HTTP = _build_razorpay_http()
+            session = _RAZORPAY_HTTP
+    return session
+
+
+def _reset_razorpay_http_after_fork():
+    # Pooled sockets inherited from the parent must not be shared.
+    global _RAZORPAY_HTTP, _RAZORPAY_HTTP_LOCK
+    _RAZORPAY_HTTP = None
+    _RAZORPAY_HTTP_LOCK = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_razorpay_http_after_fork)
+
 # ---------------------------
 # Razorpay (outline)
 # ---------------------------
@@ -268,7 +385,6 @@ def _rzp_create_order(amount: float, currency: str, metadata: Dict[str, Any]) ->
     """
     Creates a Razorpay order. Amount must be in the smallest unit (paise).
     """
-    import requests
     key_id = os.getenv("RAZORPAY_KEY_ID")
     key_secret = os.getenv("RAZORPAY_KEY_SECRET")
     if not key_id or not key_secret:
@@ -282,8 +398,8 @@ def _rzp_create_order(amount: float, currency: str, metadata: Dict[str, Any]) ->
         "payment_capture": 1,
         "notes": metadata
     }
-    resp = requests.post(
-        "https://api.razorpay.com/v1/orders",
+    resp = _razorpay_http().post(
+        _razorpay_url("/v1/orders"),
         auth=(key_id, key_secret),
         json=payload,
         timeout=10
@@ -370,11 +486,10 @@ def _rzp_verify_payment_success(data: Dict[str, Any]) -> Tuple[bool, str, str]:
         return False, None, "failed"
 
     try:
-        import requests
         key_id = os.getenv("RAZORPAY_KEY_ID")
         if key_id:
-            resp = requests.get(
-                f"https://api.razorpay.com/v1/orders/{order_id}",
+            resp = _razorpay_http().get(
+                _razorpay_url(f"/v1/orders/{order_id}"),
                 auth=(key_id, key_secret),
                 timeout=10,
             )
@@ -441,11 +556,9 @@ def _rzp_fetch_tournament_payment(
     expected_registration_id: str = None,
     expected_user_id: str = None,
 ) -> Dict[str, Any]:
-    import requests
-
     key_id, key_secret = _razorpay_credentials()
-    payment_response = requests.get(
-        f"https://api.razorpay.com/v1/payments/{payment_id}",
+    payment_response = _razorpay_http().get(
+        _razorpay_url(f"/v1/payments/{payment_id}"),
         auth=(key_id, key_secret),
         timeout=10,
     )
@@ -457,8 +570,8 @@ def _rzp_fetch_tournament_payment(
     if not actual_order_id:
         raise ValueError("Razorpay payment has no order")
 
-    order_response = requests.get(
-        f"https://api.razorpay.com/v1/orders/{actual_order_id}",
+    order_response = _razorpay_http().get(
+        _razorpay_url(f"/v1/orders/{actual_order_id}"),
         auth=(key_id, key_secret),
         timeout=10,
     )
@@ -479,8 +592,8 @@ def _rzp_fetch_tournament_payment(
     expected_paise = _amount_in_paise(expected_amount)
     expected_currency = str(expected_currency or "INR").upper()
     if payment.get("status") == "authorized" and os.getenv("RAZORPAY_AUTO_CAPTURE_AUTHORIZED", "true").lower() in {"1", "true", "yes"}:
-        capture_response = requests.post(
-            f"https://api.razorpay.com/v1/payments/{payment_id}/capture",
+        capture_response = _razorpay_http().post(
+            _razorpay_url(f"/v1/payments/{payment_id}/capture"),
             auth=(key_id, key_secret),
             json={"amount": expected_paise, "currency": expected_currency},
             timeout=10,
@@ -512,15 +625,13 @@ def _rzp_fetch_tournament_payment_for_order(
     expected_registration_id: str = None,
     expected_user_id: str = None,
 ) -> Dict[str, Any]:
-    import requests
-
     order_id = str(order_id or "").strip()
     if not order_id:
         raise ValueError("Razorpay order ID is required")
 
     key_id, key_secret = _razorpay_credentials()
-    response = requests.get(
-        f"https://api.razorpay.com/v1/orders/{order_id}/payments",
+    response = _razorpay_http().get(
+        _razorpay_url(f"/v1/orders/{order_id}/payments"),
         auth=(key_id, key_secret),
         timeout=10,
     )
@@ -575,11 +686,9 @@ def _validated_refund(refund, payment_id: str, expected_amount, expected_currenc
 
 
 def _rzp_fetch_tournament_refund(refund_id: str, payment_id: str, amount, currency: str) -> Dict[str, Any]:
-    import requests
-
     key_id, key_secret = _razorpay_credentials()
-    response = requests.get(
-        f"https://api.razorpay.com/v1/refunds/{refund_id}",
+    response = _razorpay_http().get(
+        _razorpay_url(f"/v1/refunds/{refund_id}"),
         auth=(key_id, key_secret),
         timeout=10,
     )
@@ -588,11 +697,9 @@ def _rzp_fetch_tournament_refund(refund_id: str, payment_id: str, amount, curren
 
 
 def _rzp_payment_refunds(payment_id: str):
-    import requests
-
     key_id, key_secret = _razorpay_credentials()
-    response = requests.get(
-        f"https://api.razorpay.com/v1/payments/{payment_id}/refunds",
+    response = _razorpay_http().get(
+        _razorpay_url(f"/v1/payments/{payment_id}/refunds"),
         auth=(key_id, key_secret),
         timeout=10,
     )
@@ -608,8 +715,6 @@ def _rzp_refund_tournament_payment(
     receipt: str,
     existing_refund_id: str = None,
 ) -> Dict[str, Any]:
-    import requests
-
     payment_id = str(payment_id or "").strip()
     receipt = str(receipt or "").strip()[:40]
     if not payment_id or not receipt:
@@ -639,8 +744,8 @@ def _rzp_refund_tournament_payment(
         "notes": {"source": "community_tournament_registration"},
     }
     try:
-        response = requests.post(
-            f"https://api.razorpay.com/v1/payments/{payment_id}/refund",
+        response = _razorpay_http().post(
+            _razorpay_url(f"/v1/payments/{payment_id}/refund"),
             auth=(key_id, key_secret),
             json=payload,
             timeout=10,
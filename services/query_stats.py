@@ -0,0 +1,135 @@
+"""Per-request SQL query counting and DB-time accounting.
+
+``init_query_stats(app)`` hooks SQLAlchemy's cursor events once per process.
+While a request is being handled, every statement adds to ``g``: the query
+count, total time spent in the driver and the slowest statement.
+``request_query_stats()`` returns those numbers for the current request;
+``create_app`` puts them in ``X-DB-Queries`` / ``X-DB-Time-Ms`` and the
+slow-request log.
+
+With ``DB_QUERY_STRICT_MODE`` on, statements are also counted by their SQL
+text. Any statement run at least ``DB_QUERY_REPEAT_THRESHOLD`` times in one
+request is logged with the request id, which is how N+1 loops show up: the
+same SELECT with different parameters, once per row.
+"""
+
+import time
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+_STATEMENT_LOG_CHARS = 300
+_INSTALLED = {"done": False}
+
+
+class _RequestQueryStats:
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_statement", "statements")
+
+    def __init__(self, strict):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement = None
+        self.statements = {} if strict else None
+
+    def add(self, statement, elapsed_ms):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+        if self.statements is not None:
+            self.statements[statement] = self.statements.get(statement, 0) + 1
+
+
+def _current_stats():
+    if not has_request_context():
+        return None
+    stats = g.get("_db_query_stats")
+    if stats is None:
+        stats = g._db_query_stats = _RequestQueryStats(
+            bool(current_app.config.get("DB_QUERY_STRICT_MODE", False))
+        )
+    return stats
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_ts", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("query_start_ts")
+    if not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000.0
+    stats = _current_stats()
+    if stats is not None:
+        stats.add(statement, elapsed_ms)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute; drop its start time.
+    connection = exception_context.connection
+    if connection is not None:
+        starts = connection.info.get("query_start_ts")
+        if starts:
+            starts.pop()
+
+
+def request_query_stats():
+    """Query count, DB time and slowest statement so far in this request, or None."""
+    if not has_request_context():
+        return None
+    stats = g.get("_db_query_stats")
+    if stats is None:
+        return {"count": 0, "total_ms": 0.0, "slowest_ms": 0.0, "slowest_statement": None}
+    return {
+        "count": stats.count,
+        "total_ms": stats.total_ms,
+        "slowest_ms": stats.slowest_ms,
+        "slowest_statement": stats.slowest_statement,
+    }
+
+
+def repeated_statements(threshold):
+    """Statements run at least ``threshold`` times in this request (strict mode only)."""
+    stats = g.get("_db_query_stats") if has_request_context() else None
+    if stats is None or stats.statements is None:
+        return []
+    return sorted(
+        ((count, statement) for statement, count in stats.statements.items() if count >= threshold),
+        reverse=True,
+    )
+
+
+def shorten_statement(statement):
+    text = " ".join(str(statement or "").split())
+    return text if len(text) <= _STATEMENT_LOG_CHARS else text[:_STATEMENT_LOG_CHARS] + "..."
+
+
+def init_query_stats(app):
+    """Count queries per request on every engine and log repeats in strict mode."""
+    if not _INSTALLED["done"]:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _INSTALLED["done"] = True
+
+    @app.after_request
+    def _log_repeated_statements(response):
+        if not app.config.get("DB_QUERY_STRICT_MODE", False):
+            return response
+        threshold = max(2, int(app.config.get("DB_QUERY_REPEAT_THRESHOLD", 5) or 5))
+        for count, statement in repeated_statements(threshold):
+            app.logger.warning(
+                "repeated_query request_id=%s method=%s path=%s count=%s statement=%s",
+                g.get("request_id", "-"),
+                request.method,
+                request.path,
+                count,
+                shorten_statement(statement),
+            )
+        return response
+
@@ -1,49 +1,149 @@
 from cryptography.hazmat.primitives import serialization, hashes
 from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 import base64
 import functools
+import os
 from flask import request, jsonify, g, current_app
 from db.extensions import db
-from sqlalchemy import text
+from sqlalchemy import DateTime, column, func, select, table
 import jwt
 import time
+from datetime import timedelta
 from threading import Lock
+from services.cache import get_cache
 
 _PRIVATE_KEY_CACHE = {}
 _PRIVATE_KEY_CACHE_LOCK = Lock()
 _PUBLIC_KEY_CACHE = {}
 _PUBLIC_KEY_CACHE_LOCK = Lock()
-_DECRYPTED_SUBJECT_CACHE = {}
-_DECRYPTED_SUBJECT_CACHE_LOCK = Lock()
-_USER_DELETION_STATUS_CACHE = {}
-_USER_DELETION_STATUS_CACHE_LOCK = Lock()
+# Token subject -> decrypted user id, so a hot token skips the decrypt. Each
+# entry expires with its token (capped by AUTH_DECRYPT_CACHE_TTL_SEC) and the
+# LRU bound keeps one-off tokens from piling up; hit ratio and size are in
+# cache_stats() under "auth-decrypted-subject".
+_DECRYPTED_SUBJECT_CACHE = get_cache("auth-decrypted-subject", 20000, shared=False)
+_SUBJECT_KEYRING_CACHE = {}
+_SUBJECT_KEYRING_CACHE_LOCK = Lock()
+# Symmetric subjects look like "v2.<key id>.<base64url(nonce + ciphertext)>".
+# RSA subjects are bare base64url, which never contains a dot.
+_SUBJECT_V2_PREFIX = "v2."
+_SUBJECT_NONCE_BYTES = 12
+# deletion_changed_at stays off the User model so ORM queries keep working
+# until sql/20261018_user_deletion_watermark.sql has run; only this set reads it.
+_USERS = table(
+    "users", column("id"), column("deleted_at"), column("deletion_changed_at", DateTime(timezone=True)),
+)
+
+
+class _DeletedUserIds:
+    """
+    Process-wide set of soft-deleted user ids, so the auth check is a set
+    lookup instead of a query per user.
+
+    The first check loads every id with deleted_at set. After that, at most
+    once per AUTH_DELETED_USERS_REFRESH_SEC, one request reads only the rows
+    whose deletion_changed_at moved past the watermark. That covers deletes
+    and restores made by other workers and by hand; the trigger in
+    sql/20261018_user_deletion_watermark.sql stamps the column. The window
+    re-reads the last _OVERLAP of changes because a transaction can commit
+    after a later one. A full reload every AUTH_DELETED_USERS_RELOAD_SEC
+    bounds any drift.
+    """
+
+    _OVERLAP = timedelta(seconds=60)
+
+    def __init__(self):
+        self.ids = frozenset()
+        self.watermark = None
+        self.loaded_at = None
+        self.refreshed_at = None
+        self._lock = Lock()
+
+    def contains(self, user_id):
+        refresh_sec = float(current_app.config.get("AUTH_DELETED_USERS_REFRESH_SEC", 5) or 5)
+        if self._due(time.monotonic(), refresh_sec):
+            # Only the first load makes callers wait; later refreshes are done
+            # by whichever request gets the lock while the rest read the old set.
+            if self._lock.acquire(blocking=self.refreshed_at is None):
+                try:
+                    now = time.monotonic()
+                    if self._due(now, refresh_sec):
+                        self._refresh(now)
+                finally:
+                    self._lock.release()
+        return int(user_id) in self.ids
+
+    def apply(self, user_id, deleted):
+        with self._lock:
+            if deleted:
+                self.ids = self.ids | {int(user_id)}
+            else:
+                self.ids = self.ids - {int(user_id)}
+
+    def reset(self):
+        with self._lock:
+            self.ids = frozenset()
+            self.watermark = None
+            self.loaded_at = None
+            self.refreshed_at = None
+
+    def _due(self, now, refresh_sec):
+        return self.refreshed_at is None or now - self.refreshed_at >= refresh_sec
+
+    def _refresh(self, now):
+        users = _USERS.c
+        reload_sec = float(current_app.config.get("AUTH_DELETED_USERS_RELOAD_SEC", 600) or 600)
+        full = self.loaded_at is None or now - self.loaded_at >= reload_sec
+        try:
+            if full:
+                ids = set(db.session.execute(select(users.id).where(users.deleted_at.isnot(None))).scalars())
+                watermark = db.session.execute(select(func.max(users.deletion_changed_at))).scalar()
+            else:
+                ids = set(self.ids)
+                watermark = self.watermark
+                changed_since = (
+                    users.deletion_changed_at.isnot(None) if watermark is None
+                    else users.deletion_changed_at > watermark - self._OVERLAP
+                )
+                changed = db.session.execute(
+                    select(users.id, users.deleted_at.isnot(None).label("deleted"), users.deletion_changed_at)
+                    .where(changed_since)
+                ).all()
+                for row in changed:
+                    if row.deleted:
+                        ids.add(int(row.id))
+                    else:
+                        ids.discard(int(row.id))
+                    if watermark is None or row.deletion_changed_at > watermark:
+                        watermark = row.deletion_changed_at
+        except Exception:
+            # The migration is deployed before this code. Failing open here avoids
+            # an auth outage on an accidentally out-of-order rollout.
+            db.session.rollback()
+            current_app.logger.warning("Could not refresh the deleted-user set", exc_info=True)
+            self.refreshed_at = now
+            return
+        self.ids = frozenset(ids)
+        self.watermark = watermark
+        self.refreshed_at = now
+        if full:
+            self.loaded_at = now
+
+
+_DELETED_USER_IDS = _DeletedUserIds()
 
 
 def invalidate_user_auth_status(user_id):
-    with _USER_DELETION_STATUS_CACHE_LOCK:
-        _USER_DELETION_STATUS_CACHE.pop(int(user_id), None)
+    """Apply a committed delete, restore or purge to this worker's set immediately."""
+    deleted = db.session.execute(
+        select(_USERS.c.deleted_at.isnot(None)).where(_USERS.c.id == int(user_id))
+    ).scalar()
+    _DELETED_USER_IDS.apply(user_id, bool(deleted))
 
 
 def _is_soft_deleted_user(user_id):
-    now_ts = time.time()
-    with _USER_DELETION_STATUS_CACHE_LOCK:
-        cached = _USER_DELETION_STATUS_CACHE.get(int(user_id))
-        if cached and cached["expires_at"] > now_ts:
-            return cached["deleted"]
-    try:
-        deleted = bool(db.session.execute(
-            text("SELECT deleted_at IS NOT NULL FROM users WHERE id = :user_id"),
-            {"user_id": int(user_id)},
-        ).scalar())
-    except Exception:
-        # The migration is deployed before this code. Failing open here avoids
-        # an auth outage on an accidentally out-of-order rollout.
-        db.session.rollback()
-        return False
-    ttl = max(1, int(current_app.config.get("AUTH_USER_STATUS_CACHE_TTL_SEC", 30) or 30))
-    with _USER_DELETION_STATUS_CACHE_LOCK:
-        _USER_DELETION_STATUS_CACHE[int(user_id)] = {"deleted": deleted, "expires_at": now_ts + ttl}
-    return deleted
+    return _DELETED_USER_IDS.contains(user_id)
+
 
 def encode_user(user_id: str, public_key_pem: str) -> str:
     """
@@ -95,6 +195,76 @@ def decode_user(encoded_user: str, private_key_pem: str) -> str:
 
     return decrypted.decode()
 
+def _subject_keyring(spec):
+    """
+    Parse SUBJECT_ENCRYPTION_KEYS ("kid:base64url-key,kid:base64url-key") into
+    {kid: AESGCM}. Keys must be 16, 24 or 32 bytes.
+    """
+    spec = str(spec or "").strip()
+    if not spec:
+        return {}
+    with _SUBJECT_KEYRING_CACHE_LOCK:
+        keyring = _SUBJECT_KEYRING_CACHE.get(spec)
+    if keyring is not None:
+        return keyring
+
+    keyring = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        key_id, sep, encoded_key = entry.partition(":")
+        key_id = key_id.strip()
+        if not sep or not key_id or "." in key_id:
+            raise ValueError("SUBJECT_ENCRYPTION_KEYS entries must look like kid:base64url-key")
+        raw_key = base64.urlsafe_b64decode(encoded_key.strip() + "=" * (-len(encoded_key.strip()) % 4))
+        keyring[key_id] = AESGCM(raw_key)
+    with _SUBJECT_KEYRING_CACHE_LOCK:
+        _SUBJECT_KEYRING_CACHE[spec] = keyring
+    return keyring
+
+
+def encode_subject(user_id, config=None) -> str:
+    """
+    Encrypt a user ID for the token subject.
+    Uses AES-GCM under SUBJECT_ENCRYPTION_KEY_ID when a keyring is configured,
+    otherwise the RSA format from encode_user.
+    """
+    config = current_app.config if config is None else config
+    key_id = str(config.get("SUBJECT_ENCRYPTION_KEY_ID") or "").strip()
+    keyring = _subject_keyring(config.get("SUBJECT_ENCRYPTION_KEYS"))
+    if not key_id or not keyring:
+        return encode_user(user_id, config["ENCRYPT_PUBLIC_KEY"])
+    if key_id not in keyring:
+        raise ValueError(f"Active subject key {key_id!r} is not in SUBJECT_ENCRYPTION_KEYS")
+
+    header = f"{_SUBJECT_V2_PREFIX}{key_id}"
+    nonce = os.urandom(_SUBJECT_NONCE_BYTES)
+    sealed = keyring[key_id].encrypt(nonce, str(user_id).encode(), header.encode())
+    return f"{header}.{base64.urlsafe_b64encode(nonce + sealed).decode().rstrip('=')}"
+
+
+def decode_subject(encoded_subject: str, config=None) -> str:
+    """
+    Decrypt a token subject in either format. Retired key ids are rejected;
+    RSA subjects are accepted while SUBJECT_ENCRYPTION_ACCEPT_RSA is on.
+    """
+    config = current_app.config if config is None else config
+    encoded_subject = str(encoded_subject or "")
+    if not encoded_subject.startswith(_SUBJECT_V2_PREFIX):
+        if not config.get("SUBJECT_ENCRYPTION_ACCEPT_RSA", True):
+            raise ValueError("RSA token subjects are no longer accepted")
+        return decode_user(encoded_subject, config["ENCRYPT_PRIVATE_KEY"])
+
+    header, sep, payload = encoded_subject.rpartition(".")
+    key_id = header[len(_SUBJECT_V2_PREFIX):]
+    aead = _subject_keyring(config.get("SUBJECT_ENCRYPTION_KEYS")).get(key_id) if sep else None
+    if aead is None:
+        raise ValueError("Unknown subject key id")
+    blob = base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4))
+    nonce, sealed = blob[:_SUBJECT_NONCE_BYTES], blob[_SUBJECT_NONCE_BYTES:]
+    return aead.decrypt(nonce, sealed, header.encode()).decode()
+
 def auth_required_self(decrypt_user=False, allow_deleted=False):
     return auth_required(match_route_user=False, decrypt_user=decrypt_user, allow_deleted=allow_deleted)
 
@@ -170,23 +340,11 @@ def auth_required(match_route_user=True, decrypt_user=False, allow_deleted=False
                 exp_ts = int(claims.get("exp") or 0)
                 cache_ttl_cap = int(current_app.config.get("AUTH_DECRYPT_CACHE_TTL_SEC", 300))
                 cache_ttl = max(1, min(cache_ttl_cap, max(exp_ts - int(now_ts), 1))) if exp_ts else cache_ttl_cap
-                with _DECRYPTED_SUBJECT_CACHE_LOCK:
-                    cached = _DECRYPTED_SUBJECT_CACHE.get(token_user_id_raw)
-                    if cached and float(cached.get("expires_at", 0)) > now_ts:
-                        token_user_id = cached.get("user_id")
-                    else:
-                        token_user_id = None
+                token_user_id = _DECRYPTED_SUBJECT_CACHE.get(token_user_id_raw)
                 try:
                     if token_user_id is None:
-                        token_user_id = decode_user(
-                            token_user_id_raw,
-                            current_app.config['ENCRYPT_PRIVATE_KEY']
-                        )
-                        with _DECRYPTED_SUBJECT_CACHE_LOCK:
-                            _DECRYPTED_SUBJECT_CACHE[token_user_id_raw] = {
-                                "user_id": token_user_id,
-                                "expires_at": now_ts + cache_ttl,
-                            }
+                        token_user_id = decode_subject(token_user_id_raw)
+                        _DECRYPTED_SUBJECT_CACHE.set(token_user_id_raw, token_user_id, cache_ttl)
                     if auth_debug:
                         current_app.logger.debug("Decrypted token subject successfully")
                 except Exception as e:
@@ -17,8 +17,11 @@ from sqlalchemy import text
 from sqlalchemy.orm import joinedload, selectinload, load_only
 from sqlalchemy.exc import IntegrityError
 from concurrent.futures import ThreadPoolExecutor
+from services.metrics import register_executor
 
-_USER_POST_CREATE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="user-post-create")
+_USER_POST_CREATE_EXECUTOR = register_executor(
+    "user-post-create", ThreadPoolExecutor(max_workers=4, thread_name_prefix="user-post-create")
+)
 
 
 class UserService:
@@ -0,0 +1,23 @@
+-- Persisted leaderboard projection for community tournaments.
+-- Rows are maintained in the same transaction that completes, re-records or
+-- restarts a match. Safe to run repeatedly in Neon SQL Editor.
+--
+-- After creating the table, backfill existing tournaments once with
+--   flask --app app:create_app community-standings-rebuild
+-- or POST /api/v1/community/admin/tournaments/<id>/standings/rebuild.
+
+CREATE TABLE IF NOT EXISTS community_tournament_standings (
+    tournament_id uuid NOT NULL REFERENCES community_tournaments(id) ON DELETE CASCADE,
+    team_id uuid NOT NULL REFERENCES community_tournament_teams(id) ON DELETE CASCADE,
+    played integer NOT NULL DEFAULT 0,
+    wins integer NOT NULL DEFAULT 0,
+    losses integer NOT NULL DEFAULT 0,
+    points integer NOT NULL DEFAULT 0,
+    score_for integer NOT NULL DEFAULT 0,
+    score_against integer NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (tournament_id, team_id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_community_standings_tournament_rank
+    ON community_tournament_standings(tournament_id, points DESC, (score_for - score_against) DESC);
@@ -0,0 +1,7 @@
+-- Resumable notification dispatch jobs.
+-- The job commits the highest fcm_tokens.id it has finished after every FCM
+-- batch; POST /api/cron/notifications/jobs/<id>/resume continues from there.
+-- Safe to run repeatedly in Neon SQL Editor.
+
+ALTER TABLE notification_dispatch_jobs
+    ADD COLUMN IF NOT EXISTS checkpoint_token_id integer;
@@ -0,0 +1,51 @@
+-- Version stamp for the in-process active-pass catalog snapshot.
+-- Workers compare catalog_versions.version with the one they loaded and
+-- reload the snapshot when it moved. The statement-level triggers bump it on
+-- every write that can change a pass listing: the passes themselves, pass
+-- type names, vendor images and vendor names.
+-- Safe to run repeatedly in Neon SQL Editor.
+
+CREATE TABLE IF NOT EXISTS catalog_versions (
+    name       varchar(64) PRIMARY KEY,
+    version    bigint      NOT NULL DEFAULT 1,
+    changed_at timestamptz NOT NULL DEFAULT now()
+);
+
+INSERT INTO catalog_versions (name)
+VALUES ('cafe_passes')
+ON CONFLICT (name) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_pass_catalog_version()
+RETURNS trigger AS $$
+BEGIN
+    UPDATE catalog_versions
+    SET version = version + 1,
+        changed_at = clock_timestamp()
+    WHERE name = 'cafe_passes';
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_cafe_passes_catalog_version ON cafe_passes;
+CREATE TRIGGER trg_cafe_passes_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cafe_passes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_pass_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_pass_types_catalog_version ON pass_types;
+CREATE TRIGGER trg_pass_types_catalog_version
+    AFTER UPDATE OR DELETE ON pass_types
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_pass_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_images_catalog_version ON images;
+CREATE TRIGGER trg_images_catalog_version
+    AFTER INSERT OR UPDATE OR DELETE ON images
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_pass_catalog_version();
+
+DROP TRIGGER IF EXISTS trg_vendors_catalog_version ON vendors;
+CREATE TRIGGER trg_vendors_catalog_version
+    AFTER UPDATE OF cafe_name OR DELETE ON vendors
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION bump_pass_catalog_version();
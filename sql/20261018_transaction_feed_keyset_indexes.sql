@@ -0,0 +1,17 @@
+-- Keyset indexes for the merged GET /api/users/transactions feed.
+-- Each side of the UNION ALL seeks to the page cursor with a row comparison
+-- on (booking_date, booking_time, id) or (timestamp, id) and reads at most
+-- limit + 1 rows. The id column breaks ties between rows stamped with the
+-- same second. These replace the 20260409 indexes on the same leading
+-- columns.
+-- Safe to run repeatedly in Neon SQL Editor.
+
+CREATE INDEX IF NOT EXISTS idx_transactions_user_booking_ts_id_desc
+    ON transactions (user_id, booking_date DESC, booking_time DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_hash_wallet_transactions_user_ts_id_desc
+    ON hash_wallet_transactions (user_id, timestamp DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_transactions_user_booking_date_time_desc;
+
+DROP INDEX IF EXISTS idx_hash_wallet_transactions_user_timestamp_desc;
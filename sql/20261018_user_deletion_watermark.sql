@@ -0,0 +1,33 @@
+-- Watermark for the in-process deleted-user set used by the auth decorator.
+-- Workers reread only users whose deletion_changed_at moved since their last
+-- refresh. The trigger stamps it on every deleted_at change, including
+-- restores and manual edits, with the database clock.
+-- Safe to run repeatedly in Neon SQL Editor.
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS deletion_changed_at timestamptz;
+
+UPDATE users
+SET deletion_changed_at = deleted_at
+WHERE deleted_at IS NOT NULL
+  AND deletion_changed_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_users_deletion_changed_at
+    ON users (deletion_changed_at)
+    WHERE deletion_changed_at IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION users_stamp_deletion_changed_at()
+RETURNS trigger AS $$
+BEGIN
+    IF NEW.deleted_at IS DISTINCT FROM OLD.deleted_at THEN
+        NEW.deletion_changed_at := clock_timestamp();
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_users_deletion_changed_at ON users;
+CREATE TRIGGER trg_users_deletion_changed_at
+    BEFORE UPDATE OF deleted_at ON users
+    FOR EACH ROW
+    EXECUTE FUNCTION users_stamp_deletion_changed_at();
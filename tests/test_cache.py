@@ -0,0 +1,150 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from services.cache import TTLCache, cache_stats, get_cache
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TTLCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        patcher = patch("services.cache.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_capacity_evicts_least_recently_used_key(self):
+        cache = TTLCache("test-lru", max_items=2)
+        cache.set("hot", 1, 60)
+        cache.set("cold", 2, 60)
+
+        self.assertEqual(cache.get("hot"), 1)
+        cache.set("new", 3, 60)
+
+        self.assertEqual(cache.get("hot"), 1)
+        self.assertIsNone(cache.get("cold"))
+        self.assertEqual(cache.get("new"), 3)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_expired_entries_are_swept_on_write_without_a_reader(self):
+        cache = TTLCache("test-sweep", max_items=10)
+        cache.set("short", "a", 5)
+        cache.set("long", "b", 60)
+
+        self.clock.now += 10
+        cache.set("other", "c", 60)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats()["expirations"], 1)
+        self.assertIsNone(cache.get("short"))
+
+    def test_overwrite_keeps_latest_expiry(self):
+        cache = TTLCache("test-overwrite", max_items=10)
+        cache.set("key", "old", 5)
+        cache.set("key", "new", 60)
+
+        self.clock.now += 10
+        self.assertEqual(cache.sweep(), 0)
+        self.assertEqual(cache.get("key"), "new")
+
+    def test_memory_budget_evicts_until_under_budget(self):
+        cache = TTLCache("test-bytes", max_items=100, max_bytes=250, sizeof=lambda value: 100)
+        cache.set("a", "x", 60)
+        cache.set("b", "x", 60)
+        cache.set("c", "x", 60)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["bytes"], 200)
+
+    def test_counters_track_hits_and_misses(self):
+        cache = TTLCache("test-counters", max_items=10)
+        cache.set("key", {"payload": True}, 60)
+        cache.get("key")
+        cache.get("missing")
+
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_invalidate_prefixes_drops_matching_keys(self):
+        cache = TTLCache("test-prefixes", max_items=10)
+        cache.set("members:1", 1, 60)
+        cache.set("members:2", 2, 60)
+        cache.set("teams:1", 3, 60)
+        cache.set(7, 4, 60)
+
+        self.assertEqual(cache.invalidate_prefixes("members:"), 2)
+        self.assertEqual(cache.get("teams:1"), 3)
+        self.assertEqual(cache.get(7), 4)
+
+    def test_invalidate_tags_drops_only_tagged_keys_and_cleans_index(self):
+        cache = TTLCache("test-tags", max_items=10)
+        cache.set("users-wallet|u:1|q:", 1, 60, tags=("users-wallet|u:1",))
+        cache.set("users-wallet|u:2|q:", 2, 60, tags=("users-wallet|u:2",))
+        cache.set("users-voucher|u:1|q:", 3, 60, tags=("users-voucher|u:1",))
+
+        self.assertEqual(cache.invalidate_tags("users-wallet|u:1", "unknown"), 1)
+        self.assertIsNone(cache.get("users-wallet|u:1|q:"))
+        self.assertEqual(cache.get("users-wallet|u:2|q:"), 2)
+        self.assertEqual(cache.get("users-voucher|u:1|q:"), 3)
+        self.assertNotIn("users-wallet|u:1", cache._tag_index)
+
+    def test_get_or_load_runs_loader_once_for_concurrent_misses(self):
+        cache = TTLCache("test-single-flight", max_items=10)
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"rows": 1}
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader, 60)))
+            for _ in range(8)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        while cache.stats()["coalesced"] < 7:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"rows": 1}] * 8)
+        self.assertEqual(cache.get("key"), {"rows": 1})
+
+    def test_get_or_load_shares_leader_error_and_skips_caching_none(self):
+        cache = TTLCache("test-single-flight-error", max_items=10)
+
+        with self.assertRaises(ValueError):
+            cache.get_or_load("key", lambda: (_ for _ in ()).throw(ValueError("boom")), 60)
+        self.assertIsNone(cache.get_or_load("key", lambda: None, 60))
+        self.assertNotIn("key", cache)
+
+    def test_registry_returns_one_cache_per_namespace(self):
+        with patch.dict("os.environ", {"CACHE_TEST_REGISTRY_MAX_ITEMS": "7"}):
+            cache = get_cache("test-registry", max_items=100)
+
+        self.assertIs(get_cache("test-registry", max_items=1), cache)
+        self.assertEqual(cache.max_items, 7)
+        self.assertIn("test-registry", cache_stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import time
+import unittest
+
+from services.cache import MISSING, InvalidationBus, RedisCache, TTLCache
+
+try:
+    import fakeredis
+except ImportError:  # pragma: no cover - optional test dependency
+    fakeredis = None
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class RedisCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.server = fakeredis.FakeServer()
+        self.worker_a = RedisCache("shared", fakeredis.FakeRedis(server=self.server), prefix="t:")
+        self.worker_b = RedisCache("shared", fakeredis.FakeRedis(server=self.server), prefix="t:")
+
+    def test_value_written_by_one_worker_is_read_by_another(self):
+        self.worker_a.set("user:1", {"name": "a", "ids": [1, 2]}, 60)
+
+        self.assertEqual(self.worker_b.get("user:1"), {"name": "a", "ids": [1, 2]})
+        self.assertEqual(self.worker_b.stats()["hits"], 1)
+
+    def test_tag_invalidation_is_visible_to_every_worker(self):
+        self.worker_a.set("teams:1|q:", 1, 60, tags=("teams:1",))
+        self.worker_a.set("teams:2|q:", 2, 60, tags=("teams:2",))
+
+        self.assertEqual(self.worker_b.invalidate_tags("teams:1"), 1)
+
+        self.assertIsNone(self.worker_a.get("teams:1|q:"))
+        self.assertEqual(self.worker_a.get("teams:2|q:"), 2)
+
+    def test_mark_stale_keeps_entries_with_a_stale_window(self):
+        self.worker_a.set("list", ["v1"], 60, tags=("tournaments",), stale_ttl_sec=60)
+        self.worker_a.set("detail", {"id": 1}, 60, tags=("tournaments",))
+
+        self.assertEqual(self.worker_b.mark_stale("tournaments"), 2)
+
+        self.assertEqual(self.worker_a.lookup("list"), (["v1"], False))
+        self.assertEqual(self.worker_a.lookup("detail"), (MISSING, False))
+
+    def test_prefix_and_clear_only_touch_this_namespace(self):
+        other = RedisCache("other", fakeredis.FakeRedis(server=self.server), prefix="t:")
+        self.worker_a.set("members:1:2", 1, 60)
+        self.worker_a.set("user-teams:9", 2, 60, tags=("t",))
+        other.set("members:1:2", 3, 60)
+
+        self.assertEqual(self.worker_b.invalidate_prefixes("members:"), 1)
+        self.assertEqual(other.get("members:1:2"), 3)
+        self.worker_b.clear()
+        self.assertEqual(len(self.worker_a), 0)
+        self.assertEqual(len(other), 1)
+
+    def test_redis_errors_degrade_to_misses(self):
+        self.server.connected = False
+
+        self.assertIsNone(self.worker_a.get("key"))
+        self.worker_a.set("key", 1, 60)
+        self.assertEqual(self.worker_a.get_or_load("key", lambda: 5, 60), 5)
+        self.assertGreaterEqual(self.worker_a.stats()["errors"], 3)
+
+    def test_undecodable_entry_is_a_miss(self):
+        self.worker_a._client.set(self.worker_a._key("key"), b"not a pickle")
+
+        self.assertEqual(self.worker_a.lookup("key"), (MISSING, False))
+        self.assertEqual(self.worker_a.stats()["errors"], 1)
+        self.assertEqual(self.worker_a.get_or_load("key", lambda: 5, 60), 5)
+        self.assertEqual(self.worker_b.get("key"), 5)
+
+
+@unittest.skipUnless(fakeredis, "fakeredis is not installed")
+class InvalidationBusTests(unittest.TestCase):
+    def setUp(self):
+        server = fakeredis.FakeServer()
+        self.caches = []
+        for _ in range(3):
+            cache = TTLCache("auth-user-status", max_items=10)
+            cache._bus = InvalidationBus(
+                lambda: fakeredis.FakeRedis(server=server),
+                "t:invalidate",
+                resolve=lambda namespace, cache=cache: cache if namespace == cache.namespace else None,
+            )
+            cache._bus.start()
+            self.caches.append(cache)
+
+    def test_pop_on_one_worker_evicts_the_key_everywhere(self):
+        for cache in self.caches:
+            cache.set(42, False, 60)
+            cache.set(43, False, 60)
+
+        self.caches[0].pop(42)
+
+        self.assertTrue(_wait_for(lambda: all(42 not in cache for cache in self.caches)))
+        self.assertTrue(all(cache.get(43) is False for cache in self.caches))
+
+    def test_tag_and_stale_invalidations_are_replayed(self):
+        for cache in self.caches:
+            cache.set("teams:1|q:", 1, 60, tags=("teams:1",))
+            cache.set("list", ["v1"], 60, tags=("tournaments",), stale_ttl_sec=60)
+
+        self.caches[1].invalidate_tags("teams:1")
+        self.caches[1].mark_stale("tournaments")
+
+        self.assertTrue(_wait_for(lambda: all("teams:1|q:" not in cache for cache in self.caches)))
+        self.assertTrue(_wait_for(lambda: all(cache.lookup("list") == (["v1"], False) for cache in self.caches)))
+        self.assertEqual(self.caches[1]._bus.received, 0)
+
+    def test_publish_uses_its_own_client_and_a_fork_resubscribes_lazily(self):
+        server = fakeredis.FakeServer()
+        made = []
+
+        def factory(kind):
+            made.append(kind)
+            return fakeredis.FakeRedis(server=server)
+
+        listener = TTLCache("auth-user-status", max_items=10)
+        listener._bus = InvalidationBus(lambda: factory("listen"), "t:lazy", resolve=lambda namespace: listener)
+        listener._bus.start()
+        publisher = TTLCache("auth-user-status", max_items=10)
+        publisher._bus = InvalidationBus(
+            lambda: factory("listen"), "t:lazy", resolve=lambda namespace: None,
+            publish_client_factory=lambda: factory("publish"),
+        )
+        publisher._bus.start()
+        self.assertEqual(made.count("publish"), 1)
+
+        listener.set(1, True, 60)
+        listener._bus.reset_after_fork()
+        self.assertIsNone(listener._bus._pid)
+        connections = len(made)
+
+        # Nothing connects in the fork handler; the first read subscribes again.
+        self.assertTrue(listener.get(1))
+        self.assertGreater(len(made), connections)
+        self.assertTrue(_wait_for(lambda: publisher.pop(1) is None and 1 not in listener))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -198,16 +198,16 @@ class CommunityEsportsOperationTests(unittest.TestCase):
 
     def test_community_public_cache_serves_repeated_anonymous_requests(self):
         from controllers.community_tournament_controller import (
-            _COMMUNITY_PUBLIC_CACHE,
+            _community_public_cache,
             _community_public_cache_response,
         )
 
         app = Flask(__name__)
         app.config["COMMUNITY_PUBLIC_CACHE_TTL_SEC"] = 5
         app.config["API_MICROCACHE_MAX_ITEMS"] = 10
-        _COMMUNITY_PUBLIC_CACHE.clear()
         calls = []
         with app.test_request_context("/api/v1/community/tournaments?page=1"):
+            _community_public_cache().clear()
             first = _community_public_cache_response("tournaments", lambda: calls.append(1) or {"items": []})
             second = _community_public_cache_response("tournaments", lambda: calls.append(1) or {"items": ["new"]})
 
@@ -0,0 +1,177 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import event
+
+from db.extensions import db
+from models.communityTournament import (
+    CommunityTournament,
+    CommunityTournamentRegistration,
+    CommunityTournamentRegistrationStatus,
+    CommunityTournamentStatus,
+)
+from models.communityTournamentOperations import (
+    CommunityDisputeStatus,
+    CommunityMatchStatus,
+    CommunityTeamStatus,
+    CommunityTournamentDispute,
+    CommunityTournamentMatch,
+    CommunityTournamentTeam,
+)
+from services.community_tournament_control_service import host_dashboard
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+import controllers.user_controller  # noqa: F401,E402
+
+
+HOST_ID = 7
+
+
+class HostDashboardQueryTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite://",
+            SQLALCHEMY_ENGINE_OPTIONS={},
+        )
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [
+            model.__table__ for model in (
+                CommunityTournament,
+                CommunityTournamentRegistration,
+                CommunityTournamentTeam,
+                CommunityTournamentMatch,
+                CommunityTournamentDispute,
+            )
+        ]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        # SQLite hands timestamps back without a zone.
+        now_patch = patch(
+            "services.community_tournament_service._now",
+            lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        now_patch.start()
+        self.addCleanup(now_patch.stop)
+
+    def seed(self, count, host_user_id=HOST_ID):
+        now = datetime.now(timezone.utc)
+        statuses = [CommunityTournamentStatus.LIVE, CommunityTournamentStatus.COMPLETED, CommunityTournamentStatus.DRAFT]
+        for index in range(count):
+            tournament = CommunityTournament(
+                host_user_id=host_user_id,
+                title=f"Cup {index}",
+                game="valorant",
+                max_players=16,
+                status=statuses[index % len(statuses)],
+                registration_start_at=now - timedelta(days=3),
+                registration_end_at=now - timedelta(days=2),
+                tournament_start_at=now - timedelta(days=1),
+                total_collection=100,
+                prize_pool=80,
+                created_at=now - timedelta(minutes=index),
+            )
+            db.session.add(tournament)
+            db.session.flush()
+            registration = CommunityTournamentRegistration(
+                tournament_id=tournament.id,
+                user_id=1000 + index,
+                status=CommunityTournamentRegistrationStatus.CONFIRMED,
+            )
+            db.session.add(registration)
+            db.session.flush()
+            db.session.add_all([
+                CommunityTournamentTeam(
+                    tournament_id=tournament.id,
+                    registration_id=registration.id,
+                    captain_user_id=1000 + index,
+                    name=f"Team {index}",
+                    status=CommunityTeamStatus.PENDING,
+                ),
+                CommunityTournamentMatch(
+                    tournament_id=tournament.id,
+                    round_number=1,
+                    match_number=1,
+                    status=CommunityMatchStatus.AWAITING_RESULTS,
+                ),
+                CommunityTournamentDispute(
+                    tournament_id=tournament.id,
+                    reason="score",
+                    description="wrong score",
+                    status=CommunityDisputeStatus.OPEN,
+                ),
+            ])
+        db.session.commit()
+
+    def count_queries(self, fn):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            result = fn()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return result, statements
+
+    def test_query_count_does_not_grow_with_tournament_count(self):
+        self.seed(3)
+        small, small_statements = self.count_queries(lambda: host_dashboard(HOST_ID))
+        self.seed(60)
+        large, large_statements = self.count_queries(lambda: host_dashboard(HOST_ID, {"per_page": 20}))
+
+        self.assertEqual(len(small_statements), 7)
+        self.assertEqual(len(large_statements), len(small_statements))
+        self.assertEqual(large["pagination"], {"page": 1, "per_page": 20, "total": 63, "pages": 4})
+        self.assertEqual(len(large["tournaments"]), 20)
+
+    def test_without_paging_params_every_tournament_is_listed(self):
+        self.seed(60)
+
+        result = host_dashboard(HOST_ID, {})
+
+        self.assertEqual(len(result["tournaments"]), 60)
+        self.assertNotIn("pagination", result)
+
+    def test_summary_and_attention_match_per_tournament_counts(self):
+        self.seed(6)
+        self.seed(2, host_user_id=HOST_ID + 1)
+
+        result = host_dashboard(HOST_ID, {"page": 2, "per_page": 4})
+
+        self.assertEqual(result["summary"], {
+            "active_tournaments": 2,
+            "total_registrations": 6,
+            "entry_fees_collected": 600.0,
+            "prize_pool": 480.0,
+            "pending_team_approvals": 6,
+            "matches_requiring_verification": 6,
+            "open_disputes": 6,
+        })
+        self.assertEqual([item["title"] for item in result["tournaments"]], ["Cup 4", "Cup 5"])
+        self.assertEqual(result["tournaments"][0]["attention"], {
+            "pending_team_approvals": 1,
+            "unchecked_in_teams": 0,
+            "matches_requiring_verification": 1,
+            "open_disputes": 1,
+        })
+
+    def test_host_without_tournaments_gets_empty_page(self):
+        result = host_dashboard(HOST_ID, {"page": 1})
+
+        self.assertEqual(result["tournaments"], [])
+        self.assertEqual(result["pagination"]["total"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,177 @@
+import threading
+import time
+import unittest
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from unittest.mock import patch
+
+from flask import Flask
+
+from db.extensions import db
+from models.communityTournament import (
+    CommunityTournament,
+    CommunityTournamentRegistration,
+    CommunityTournamentStatus,
+)
+from models.communityTournamentOperations import (
+    CommunityDuplicatePaymentRecovery,
+    CommunityPaymentSettlementJob,
+    CommunityPaymentSettlementStatus,
+    CommunityPaymentWebhookEvent,
+)
+from services.community_tournament_service import (
+    process_pending_community_payments,
+    process_pending_settlement_jobs,
+)
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+import controllers.user_controller  # noqa: F401,E402
+
+FETCH_SEC = 0.2
+
+
+def _naive_utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CommunityPaymentReconciliationTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}, COMMUNITY_PAYMENT_PASS_BUDGET_SEC=5,
+        )
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [
+            model.__table__ for model in (
+                CommunityTournament,
+                CommunityTournamentRegistration,
+                CommunityPaymentSettlementJob,
+                CommunityPaymentWebhookEvent,
+                CommunityDuplicatePaymentRecovery,
+            )
+        ]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        # SQLite hands timestamps back without a zone.
+        now_patch = patch("services.community_tournament_service._now", _naive_utc_now)
+        now_patch.start()
+        self.addCleanup(now_patch.stop)
+
+        now = _naive_utc_now()
+        tournament = CommunityTournament(
+            host_user_id=1,
+            title="Paid Cup",
+            game="bgmi",
+            max_players=50,
+            min_entries=2,
+            entry_fee=Decimal("49.00"),
+            status=CommunityTournamentStatus.REGISTRATION_OPEN,
+            registration_start_at=now - timedelta(hours=1),
+            registration_end_at=now + timedelta(days=1),
+            tournament_start_at=now + timedelta(days=2),
+        )
+        db.session.add(tournament)
+        db.session.flush()
+        for index in range(8):
+            registration = CommunityTournamentRegistration(id=uuid.uuid4(), tournament_id=tournament.id, user_id=index + 2)
+            db.session.add(registration)
+            db.session.add(CommunityPaymentSettlementJob(
+                registration_id=registration.id, tournament_id=tournament.id, payment_id=f"pay_{index}",
+                order_id=f"order_{index}", created_at=now - timedelta(minutes=8 - index),
+            ))
+        db.session.commit()
+
+        self.settled = []
+        self.settled_on = set()
+        settle_patch = patch(
+            "services.community_tournament_service.settle_community_registration_payment",
+            side_effect=lambda registration_id, details: (
+                self.settled.append((registration_id, details["payment_id"])),
+                self.settled_on.add(threading.current_thread().name),
+            ),
+        )
+        fetch_patches = [
+            patch("services.payment_service.fetch_tournament_payment", side_effect=self.slow_fetch),
+            patch(
+                "services.payment_service.fetch_tournament_payment_for_order",
+                side_effect=RuntimeError("order has no captured payment"),
+            ),
+        ]
+        for patcher in [settle_patch, *fetch_patches]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def slow_fetch(self, payment_id, *args, **kwargs):
+        time.sleep(FETCH_SEC)
+        if payment_id == "pay_3":
+            raise RuntimeError("Razorpay timed out")
+        return {"payment_id": payment_id, "status": "captured"}
+
+    def retried_jobs(self):
+        db.session.expire_all()
+        return CommunityPaymentSettlementJob.query.filter_by(status=CommunityPaymentSettlementStatus.RETRY).all()
+
+    def test_fetches_overlap_and_results_apply_on_the_calling_thread(self):
+        started = time.monotonic()
+        summary = process_pending_settlement_jobs(50)
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, FETCH_SEC * 8 / 2)
+        self.assertEqual((summary["processed"], summary["settled"], summary["retried"]), (8, 7, 1))
+        self.assertEqual(summary["deferred"], 0)
+        self.assertEqual(len(self.settled), 7)
+        self.assertEqual(self.settled_on, {threading.current_thread().name})
+        # pay_3 fails, falls back to its order and fails again, so it is rescheduled.
+        [retried] = self.retried_jobs()
+        self.assertEqual(retried.payment_id, "pay_3")
+        self.assertEqual(retried.attempts, 1)
+        self.assertIsNotNone(retried.next_attempt_at)
+
+    def test_jobs_left_at_the_deadline_go_back_without_spending_an_attempt(self):
+        provider_stalled = threading.Event()
+
+        def stalled_after_two(payment_id, *args, **kwargs):
+            if payment_id not in {"pay_0", "pay_1"}:
+                provider_stalled.wait(5)
+            return {"payment_id": payment_id, "status": "captured"}
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown, cancel_futures=True)
+        self.addCleanup(provider_stalled.set)
+        with patch("services.community_tournament_service._PAYMENT_FETCH_EXECUTOR", executor), \
+                patch("services.payment_service.fetch_tournament_payment", side_effect=stalled_after_two):
+            summary = process_pending_settlement_jobs(50, deadline=time.monotonic() + 0.5)
+
+        # One lookup at a time: two finish inside the budget, the rest are handed back.
+        self.assertEqual((summary["processed"], summary["settled"], summary["deferred"]), (2, 2, 6))
+        deferred = self.retried_jobs()
+        self.assertEqual(len(deferred), 6)
+        self.assertTrue(all(job.attempts == 0 and job.next_attempt_at is None for job in deferred))
+
+    def test_each_pass_is_timed_and_a_failing_pass_does_not_stop_the_rest(self):
+        with patch(
+            "services.community_tournament_service.process_pending_duplicate_payment_refunds",
+            side_effect=RuntimeError("refund table missing"),
+        ):
+            summary = process_pending_community_payments(50)
+
+        self.assertEqual(summary["settled"], 7)
+        self.assertEqual(summary["duplicate_payment_refunds"]["error"], "refund table missing")
+        self.assertEqual(summary["duplicate_payment_refunds"]["processed"], 0)
+        for section in (summary, summary["webhooks"], summary["duplicate_payment_refunds"], summary["refunds"]):
+            self.assertIn("elapsed_sec", section)
+            self.assertIn("per_sec", section)
+        self.assertGreater(summary["per_sec"], 0)
+        self.assertEqual(len(self.retried_jobs()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
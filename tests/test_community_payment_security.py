@@ -1,5 +1,4 @@
 import os
-import sys
 import unittest
 from unittest.mock import patch
 from types import SimpleNamespace
@@ -48,7 +47,7 @@ class CommunityPaymentSecurityTests(unittest.TestCase):
                 "currency": "INR",
             }),
         ])
-        with patch.dict(sys.modules, {"requests": SimpleNamespace(get=get)}):
+        with patch("services.payment_service._razorpay_http", return_value=SimpleNamespace(get=get)):
             with self.assertRaisesRegex(ValueError, "not bound to this registration"):
                 _rzp_fetch_tournament_payment(
                     "pay_123",
@@ -76,7 +75,7 @@ class CommunityPaymentSecurityTests(unittest.TestCase):
                 "currency": "INR",
             }),
         ])
-        with patch.dict(sys.modules, {"requests": SimpleNamespace(get=get)}):
+        with patch("services.payment_service._razorpay_http", return_value=SimpleNamespace(get=get)):
             result = _rzp_fetch_tournament_payment(
                 "pay_123",
                 1,
@@ -96,7 +95,7 @@ class CommunityPaymentSecurityTests(unittest.TestCase):
             "amount": 10000,
             "currency": "INR",
         }))
-        with patch.dict(sys.modules, {"requests": SimpleNamespace(post=post)}):
+        with patch("services.payment_service._razorpay_http", return_value=SimpleNamespace(post=post)):
             result = _rzp_create_order(
                 100,
                 "INR",
@@ -135,7 +134,7 @@ class CommunityPaymentSecurityTests(unittest.TestCase):
             "currency": "INR",
         }))
 
-        with patch.dict(sys.modules, {"requests": SimpleNamespace(get=get, post=post)}):
+        with patch("services.payment_service._razorpay_http", return_value=SimpleNamespace(get=get, post=post)):
             result = _rzp_fetch_tournament_payment(
                 "pay_123",
                 100,
@@ -181,7 +180,7 @@ class CommunityPaymentSecurityTests(unittest.TestCase):
             }),
         ])
 
-        with patch.dict(sys.modules, {"requests": SimpleNamespace(get=get)}):
+        with patch("services.payment_service._razorpay_http", return_value=SimpleNamespace(get=get)):
             result = fetch_tournament_payment_for_order(
                 "order_123",
                 1,
@@ -0,0 +1,126 @@
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from flask import Flask
+
+from controllers.event_participation_controller import event_participation_bp
+from db.extensions import db
+from job import community_payment_webhooks
+from models.communityTournament import CommunityTournamentRegistration
+from models.communityTournamentOperations import (
+    CommunityPaymentAttempt,
+    CommunityPaymentSettlementJob,
+    CommunityPaymentWebhookEvent,
+    CommunityPaymentWebhookStatus,
+)
+from services.community_tournament_service import community_payment_webhook_queue_metrics
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.user_controller  # noqa: F401,E402
+
+
+def _naive_utc_now():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class CommunityPaymentWebhookQueueTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        self.app.register_blueprint(event_participation_bp)
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [
+            model.__table__ for model in (
+                CommunityTournamentRegistration,
+                CommunityPaymentAttempt,
+                CommunityPaymentSettlementJob,
+                CommunityPaymentWebhookEvent,
+            )
+        ]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        # SQLite hands timestamps back without a zone.
+        now_patch = patch("services.community_tournament_service._now", _naive_utc_now)
+        now_patch.start()
+        self.addCleanup(now_patch.stop)
+
+    def post_webhook(self, event_id):
+        details = {
+            "event_type": "payment.captured",
+            "payment_id": f"pay_{event_id}",
+            "order_id": f"order_{event_id}",
+            "provider": "razorpay",
+        }
+        with patch("controllers.event_participation_controller.verify_webhook", return_value=(True, None, "paid")), \
+                patch("controllers.event_participation_controller.verified_webhook_payment_details", return_value=details):
+            return self.app.test_client().post(
+                "/api/payments/webhook",
+                data=b'{"event": "payment.captured"}',
+                headers={"X-Razorpay-Signature": "sig", "X-Razorpay-Event-Id": event_id},
+            )
+
+    def test_webhook_is_stored_and_acknowledged_without_provider_calls(self):
+        with patch("services.payment_service.fetch_tournament_payment") as fetch:
+            response = self.post_webhook("evt_1")
+            duplicate = self.post_webhook("evt_1")
+
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.get_json()["queued"])
+        self.assertEqual(duplicate.status_code, 202)
+        fetch.assert_not_called()
+        events = CommunityPaymentWebhookEvent.query.all()
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0].status, CommunityPaymentWebhookStatus.PENDING)
+
+    def test_worker_drains_ready_events_and_reports_queue_depth(self):
+        for index in range(5):
+            self.post_webhook(f"evt_{index}")
+        old = CommunityPaymentWebhookEvent.query.filter_by(provider_event_id="evt_0").one()
+        old.created_at = _naive_utc_now() - timedelta(seconds=90)
+        db.session.commit()
+
+        before = community_payment_webhook_queue_metrics()
+        self.assertEqual(before["ready"], 5)
+        self.assertEqual(before["pending"], 5)
+        self.assertGreaterEqual(before["oldest_ready_lag_sec"], 89)
+
+        totals = community_payment_webhooks.run_webhook_worker(
+            self.app, concurrency=1, batch_size=2, poll_interval_sec=0, once=True,
+        )
+
+        # Nothing maps to a registration yet, so every event is rescheduled.
+        self.assertEqual(totals, {"processed": 5, "settled": 0, "retried": 5, "failed": 0})
+        db.session.expire_all()
+        after = community_payment_webhook_queue_metrics()
+        self.assertEqual(after["ready"], 0)
+        self.assertEqual(after["retry"], 5)
+        self.assertEqual(after["oldest_ready_lag_sec"], 0)
+
+    def test_worker_threads_stop_when_signalled(self):
+        calls = []
+        stop_event = threading.Event()
+
+        def drain(app, batch_size):
+            calls.append(threading.current_thread().name)
+            if len(calls) >= 6:
+                stop_event.set()
+            return {"processed": 1, "settled": 1, "retried": 0, "failed": 0}
+
+        with patch.object(community_payment_webhooks, "drain_webhook_batch", side_effect=drain):
+            totals = community_payment_webhooks.run_webhook_worker(
+                self.app, concurrency=3, batch_size=10, stop_event=stop_event,
+            )
+
+        self.assertGreaterEqual(totals["settled"], 6)
+        self.assertEqual(totals["settled"], len(calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+import threading
+import time
+import unittest
+import uuid
+
+from flask import Flask
+
+import controllers.community_tournament_controller as controller
+
+
+class CommunityPublicCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            TESTING=True,
+            COMMUNITY_PUBLIC_CACHE_TTL_SEC=60,
+            COMMUNITY_PUBLIC_LIST_STALE_TTL_SEC=60,
+        )
+        self.tournament_id = uuid.uuid4()
+        self.other_tournament_id = uuid.uuid4()
+        context = self.app.app_context()
+        context.push()
+        self.addCleanup(context.pop)
+        self.cache = controller._community_public_cache()
+        self.cache.clear()
+        self.addCleanup(self.cache.clear)
+
+    def read(self, path, namespace, payload):
+        calls = []
+
+        def producer():
+            calls.append(namespace)
+            return payload
+
+        with self.app.test_request_context(path):
+            response = controller._community_public_cache_response(namespace, producer)
+            return response.get_json(), len(calls)
+
+    def warm(self):
+        tid, other = self.tournament_id, self.other_tournament_id
+        self.read("/api/v1/community/tournaments", "tournaments", {"items": ["v1"]})
+        self.read(f"/t/{tid}", f"tournament:{tid}", {"id": "t"})
+        self.read(f"/t/{tid}/teams", f"teams:{tid}", {"teams": 1})
+        self.read(f"/t/{tid}/leaderboard", f"leaderboard:{tid}", {"rows": 1})
+        self.read(f"/t/{other}/teams", f"teams:{other}", {"teams": 2})
+
+    def test_team_invite_only_evicts_that_tournaments_team_views(self):
+        self.warm()
+        tid, other = self.tournament_id, self.other_tournament_id
+
+        controller._invalidate_community_cache_for_write(
+            "community_tournaments.invite_community_team_member", tid
+        )
+
+        self.assertEqual(self.read(f"/t/{tid}/teams", f"teams:{tid}", {"teams": 9})[1], 1)
+        self.assertEqual(self.read(f"/t/{other}/teams", f"teams:{other}", {"teams": 9})[1], 0)
+        self.assertEqual(self.read(f"/t/{tid}/leaderboard", f"leaderboard:{tid}", {"rows": 9})[1], 0)
+        self.assertEqual(self.read(f"/t/{tid}", f"tournament:{tid}", {"id": "x"})[1], 0)
+        self.assertEqual(
+            self.read("/api/v1/community/tournaments", "tournaments", {"items": ["v2"]}),
+            ({"items": ["v1"]}, 0),
+        )
+
+    def test_registration_revalidates_list_instead_of_dropping_it(self):
+        self.warm()
+        tid = self.tournament_id
+        list_key = "public:tournaments:/api/v1/community/tournaments?"
+
+        controller._invalidate_community_cache_for_write(
+            "community_tournaments.register_community_tournament", tid
+        )
+
+        # While another request is revalidating, readers get the stale list.
+        release = threading.Event()
+        revalidator = threading.Thread(
+            target=self.cache.get_or_load,
+            args=(list_key, lambda: release.wait(5) and {"items": ["v2"]}, 60),
+        )
+        revalidator.start()
+        while list_key not in self.cache._flights:
+            time.sleep(0.001)
+        self.assertEqual(
+            self.read("/api/v1/community/tournaments", "tournaments", {"items": ["v3"]}),
+            ({"items": ["v1"]}, 0),
+        )
+        release.set()
+        revalidator.join()
+
+        self.assertEqual(
+            self.read("/api/v1/community/tournaments", "tournaments", {"items": ["v3"]}),
+            ({"items": ["v2"]}, 0),
+        )
+        self.assertEqual(self.read(f"/t/{tid}", f"tournament:{tid}", {"id": "x"})[1], 1)
+
+    def test_routes_without_tournament_id_evict_kind_across_tournaments(self):
+        self.warm()
+
+        controller._invalidate_community_cache_for_write(
+            "community_tournaments.process_pending_community_payment_queue"
+        )
+
+        tid, other = self.tournament_id, self.other_tournament_id
+        self.assertEqual(self.read(f"/t/{tid}/teams", f"teams:{tid}", {"teams": 9})[1], 1)
+        self.assertEqual(self.read(f"/t/{other}/teams", f"teams:{other}", {"teams": 9})[1], 1)
+        self.assertEqual(self.read(f"/t/{tid}/leaderboard", f"leaderboard:{tid}", {"rows": 9})[1], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
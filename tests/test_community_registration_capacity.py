@@ -0,0 +1,179 @@
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import event
+
+from db.extensions import db
+from models.communityTournament import (
+    CommunityTournament,
+    CommunityTournamentRegistration,
+    CommunityTournamentRegistrationStatus,
+    CommunityTournamentStatus,
+)
+from models.communityTournamentOperations import CommunityAuditLog
+from models.notification import Notification
+from models.user import User
+from services.community_tournament_service import (
+    CommunityConflictError,
+    _claim_tournament_seat,
+    register_for_tournament,
+)
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+import controllers.user_controller  # noqa: F401,E402
+
+
+HOST_ID = 1
+
+
+class CommunityRegistrationCapacityTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [
+            model.__table__ for model in (
+                User, CommunityTournament, CommunityTournamentRegistration, CommunityAuditLog, Notification,
+            )
+        ]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        now_patch = patch(
+            "services.community_tournament_service._now",
+            lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        now_patch.start()
+        self.addCleanup(now_patch.stop)
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        for user_id in range(1, 6):
+            db.session.add(User(
+                id=user_id, fid=f"fid-{user_id}", name=f"Player {user_id}", game_username=f"player{user_id}",
+                created_at=now, updated_at=now,
+            ))
+        self.tournament = CommunityTournament(
+            host_user_id=HOST_ID,
+            title="Open Cup",
+            game="bgmi",
+            max_players=2,
+            min_entries=2,
+            status=CommunityTournamentStatus.PUBLISHED,
+            registration_start_at=now - timedelta(hours=1),
+            registration_end_at=now + timedelta(days=1),
+            tournament_start_at=now + timedelta(days=2),
+        )
+        db.session.add(self.tournament)
+        db.session.commit()
+        self.tournament_id = self.tournament.id
+
+    def stored_tournament(self):
+        db.session.expire_all()
+        return db.session.get(CommunityTournament, self.tournament_id)
+
+    def test_free_registrations_claim_seats_until_the_cap_then_close(self):
+        register_for_tournament(2, self.tournament_id)
+        self.assertEqual(self.stored_tournament().status, CommunityTournamentStatus.REGISTRATION_OPEN)
+
+        register_for_tournament(3, self.tournament_id)
+        with self.assertRaisesRegex(CommunityConflictError, "registration is not open"):
+            register_for_tournament(4, self.tournament_id)
+
+        tournament = self.stored_tournament()
+        self.assertEqual(tournament.registered_players_count, 2)
+        self.assertEqual(tournament.status, CommunityTournamentStatus.REGISTRATION_CLOSED)
+        self.assertEqual(
+            {r.user_id for r in CommunityTournamentRegistration.query.all()}, {2, 3}
+        )
+        self.assertEqual(CommunityAuditLog.query.filter_by(action="registration_created").count(), 2)
+        self.assertEqual(Notification.query.filter_by(type="community_registration_success").count(), 2)
+
+    def test_seat_claim_is_one_conditional_update(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", listener)
+
+        self.assertEqual(_claim_tournament_seat(self.tournament_id), 1)
+        self.assertEqual(_claim_tournament_seat(self.tournament_id), 2)
+        self.assertIsNone(_claim_tournament_seat(self.tournament_id))
+        db.session.commit()
+
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(all(s.lstrip().startswith("UPDATE community_tournaments") for s in statements))
+        self.assertTrue(all("RETURNING" in s for s in statements))
+        self.assertEqual(self.stored_tournament().registered_players_count, 2)
+
+    def test_losing_the_last_seat_race_leaves_no_registration(self):
+        # Another worker takes the last seats after this request read the tournament.
+        def claim_after_read(tournament_id):
+            db.session.execute(
+                CommunityTournament.__table__.update()
+                .where(CommunityTournament.__table__.c.id == tournament_id)
+                .values(registered_players_count=2)
+            )
+            return _claim_tournament_seat(tournament_id)
+
+        with patch("services.community_tournament_service._claim_tournament_seat", claim_after_read):
+            with self.assertRaisesRegex(CommunityConflictError, "tournament is full"):
+                register_for_tournament(2, self.tournament_id)
+
+        self.assertEqual(CommunityTournamentRegistration.query.count(), 0)
+        self.assertEqual(CommunityAuditLog.query.count(), 0)
+        self.assertEqual(self.stored_tournament().registered_players_count, 0)
+
+    def test_host_closing_registration_after_the_read_blocks_the_claim(self):
+        # The host's close commits between this request's read and its seat claim.
+        def claim_after_close(tournament_id):
+            db.session.execute(
+                CommunityTournament.__table__.update()
+                .where(CommunityTournament.__table__.c.id == tournament_id)
+                .values(
+                    status=CommunityTournamentStatus.REGISTRATION_CLOSED,
+                    registration_end_at=datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(microseconds=1),
+                )
+            )
+            return _claim_tournament_seat(tournament_id)
+
+        with patch("services.community_tournament_service._claim_tournament_seat", claim_after_close):
+            with self.assertRaisesRegex(CommunityConflictError, "tournament is full"):
+                register_for_tournament(2, self.tournament_id)
+
+        self.assertEqual(CommunityTournamentRegistration.query.count(), 0)
+        tournament = self.stored_tournament()
+        self.assertEqual(tournament.registered_players_count, 0)
+        self.assertEqual(tournament.status, CommunityTournamentStatus.PUBLISHED)
+
+    def test_seat_claim_never_reopens_a_closed_or_live_tournament(self):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        table = CommunityTournament.__table__
+        for status, end_at in (
+            (CommunityTournamentStatus.REGISTRATION_CLOSED, now + timedelta(hours=1)),
+            (CommunityTournamentStatus.LIVE, now - timedelta(hours=1)),
+        ):
+            db.session.execute(
+                table.update().where(table.c.id == self.tournament_id).values(status=status, registration_end_at=end_at)
+            )
+            self.assertIsNone(_claim_tournament_seat(self.tournament_id))
+            db.session.commit()
+            tournament = self.stored_tournament()
+            self.assertEqual((tournament.status, tournament.registered_players_count), (status, 0))
+
+    def test_audit_failure_after_commit_keeps_the_registration(self):
+        with patch("services.community_tournament_service._notify", side_effect=RuntimeError("boom")):
+            registration = register_for_tournament(2, self.tournament_id)
+
+        self.assertEqual(registration.status, CommunityTournamentRegistrationStatus.CONFIRMED)
+        self.assertEqual(self.stored_tournament().registered_players_count, 1)
+        self.assertEqual(CommunityAuditLog.query.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
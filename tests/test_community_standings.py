@@ -0,0 +1,195 @@
+import unittest
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from flask import Flask
+
+from db.extensions import db
+from models.communityTournament import CommunityTournament, CommunityTournamentStatus
+from models.communityTournamentOperations import (
+    CommunityAuditLog,
+    CommunityMatchResultSubmission,
+    CommunityMatchStatus,
+    CommunityTournamentMatch,
+    CommunityTournamentStanding,
+    CommunityTournamentTeam,
+)
+from services.community_tournament_control_service import (
+    _finalize_result_proposal,
+    leaderboard,
+    manage_match,
+    rebuild_tournament_standings,
+)
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+import controllers.user_controller  # noqa: F401,E402
+
+
+HOST_ID = 7
+
+
+class CommunityStandingsTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [
+            model.__table__ for model in (
+                CommunityTournament,
+                CommunityTournamentTeam,
+                CommunityTournamentMatch,
+                CommunityTournamentStanding,
+                CommunityMatchResultSubmission,
+                CommunityAuditLog,
+            )
+        ]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        now_patch = patch(
+            "services.community_tournament_service._now",
+            lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        )
+        now_patch.start()
+        self.addCleanup(now_patch.stop)
+        self.seed()
+
+    def seed(self):
+        now = datetime.now(timezone.utc)
+        self.tournament = CommunityTournament(
+            host_user_id=HOST_ID,
+            title="Cup",
+            game="bgmi",
+            max_players=4,
+            status=CommunityTournamentStatus.LIVE,
+            registration_start_at=now - timedelta(days=3),
+            registration_end_at=now - timedelta(days=2),
+            tournament_start_at=now - timedelta(days=1),
+            schedule_config={"placement_points": {"1": 10, "2": 6, "3": 4, "4": 2}},
+        )
+        db.session.add(self.tournament)
+        db.session.flush()
+        self.teams = [
+            CommunityTournamentTeam(
+                tournament_id=self.tournament.id,
+                registration_id=uuid.uuid4(),
+                captain_user_id=100 + index,
+                name=name,
+            )
+            for index, name in enumerate(("Alpha", "bravo", "Charlie", "Delta"))
+        ]
+        db.session.add_all(self.teams)
+        db.session.flush()
+        alpha, bravo = self.teams[0].id, self.teams[1].id
+        self.duel = CommunityTournamentMatch(
+            tournament_id=self.tournament.id, round_number=1, match_number=1,
+            status=CommunityMatchStatus.AWAITING_RESULTS, team_a_id=alpha, team_b_id=bravo,
+        )
+        self.royale = CommunityTournamentMatch(
+            tournament_id=self.tournament.id, round_number=1, match_number=2, stage="royale",
+            status=CommunityMatchStatus.IN_PROGRESS,
+            participant_team_ids=[str(team.id) for team in self.teams],
+        )
+        db.session.add_all([self.duel, self.royale])
+        db.session.commit()
+
+    def record_royale(self, order):
+        manage_match(HOST_ID, self.tournament.id, self.royale.id, {
+            "action": "record_standings",
+            "standings": [
+                {"team_id": str(self.teams[index].id), "placement": placement, "kills": 1}
+                for placement, index in enumerate(order, start=1)
+            ],
+        })
+
+    def rows(self):
+        return [
+            (item["team_name"], item["played"], item["wins"], item["losses"], item["points"], item["score_for"] - item["score_against"])
+            for item in leaderboard(self.tournament.id)["items"]
+        ]
+
+    def test_finalized_matches_update_the_projection(self):
+        proposal = SimpleNamespace(team_a_score=13, team_b_score=7, winner_team_id=self.teams[0].id, status="pending", finalized_at=None)
+        _finalize_result_proposal(proposal, self.duel)
+        db.session.commit()
+        self.record_royale([2, 0, 1, 3])
+
+        self.assertEqual(self.rows(), [
+            ("Charlie", 1, 1, 0, 11, 0),
+            ("Alpha", 2, 1, 0, 10, 6),
+            ("bravo", 2, 0, 1, 5, -6),
+            ("Delta", 1, 0, 0, 3, 0),
+        ])
+
+    def test_re_recording_and_restarting_replace_previous_contribution(self):
+        proposal = SimpleNamespace(team_a_score=2, team_b_score=1, winner_team_id=self.teams[1].id, status="pending", finalized_at=None)
+        _finalize_result_proposal(proposal, self.duel)
+        db.session.commit()
+        self.record_royale([0, 1, 2, 3])
+        self.record_royale([3, 2, 1, 0])
+        manage_match(HOST_ID, self.tournament.id, self.duel.id, {"action": "restart", "reason": "wrong lobby"})
+
+        self.assertEqual(self.rows(), [
+            ("Delta", 1, 1, 0, 11, 0),
+            ("Charlie", 1, 0, 0, 7, 0),
+            ("bravo", 1, 0, 0, 5, 0),
+            ("Alpha", 1, 0, 0, 3, 0),
+        ])
+
+    def test_rebuild_matches_incremental_projection(self):
+        proposal = SimpleNamespace(team_a_score=5, team_b_score=9, winner_team_id=self.teams[1].id, status="pending", finalized_at=None)
+        _finalize_result_proposal(proposal, self.duel)
+        db.session.commit()
+        self.record_royale([1, 3, 0, 2])
+        incremental = self.rows()
+
+        CommunityTournamentStanding.query.delete()
+        db.session.commit()
+        self.assertEqual(self.rows()[0][1:], (0, 0, 0, 0, 0))
+
+        self.assertEqual(rebuild_tournament_standings(), 1)
+        self.assertEqual(self.rows(), incremental)
+
+    def test_teams_from_other_tournaments_are_never_counted(self):
+        stray = CommunityTournamentTeam(
+            tournament_id=uuid.uuid4(), registration_id=uuid.uuid4(), captain_user_id=999, name="Stray",
+        )
+        db.session.add(stray)
+        db.session.flush()
+        # A duel whose bracket slot points at another tournament's team.
+        self.duel.team_b_id = stray.id
+        db.session.commit()
+        proposal = SimpleNamespace(team_a_score=13, team_b_score=7, winner_team_id=self.teams[0].id, status="pending", finalized_at=None)
+        _finalize_result_proposal(proposal, self.duel)
+        db.session.commit()
+
+        stored = {row.team_id for row in CommunityTournamentStanding.query.all()}
+        self.assertEqual(stored, {self.teams[0].id})
+        self.assertEqual(rebuild_tournament_standings(self.tournament.id), 1)
+        self.assertEqual({row.team_id for row in CommunityTournamentStanding.query.all()}, stored)
+
+    def test_rebuild_all_clears_tournaments_without_completed_matches(self):
+        self.record_royale([0, 1, 2, 3])
+        manage_match(HOST_ID, self.tournament.id, self.royale.id, {"action": "restart", "reason": "wrong lobby"})
+        # A projection left behind without the matching completed match.
+        self.record_royale([0, 1, 2, 3])
+        db.session.execute(
+            CommunityTournamentMatch.__table__.update()
+            .where(CommunityTournamentMatch.__table__.c.id == self.royale.id)
+            .values(status=CommunityMatchStatus.IN_PROGRESS)
+        )
+        db.session.commit()
+
+        self.assertEqual(rebuild_tournament_standings(), 1)
+        self.assertEqual(CommunityTournamentStanding.query.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
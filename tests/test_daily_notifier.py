@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+
+from job import daily_notifier
+
+NOTIFICATION = {"title": "GG", "message": "Book now"}
+
+
+class _StandInApi(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+        after_id, limit = int(query["after_id"][0]), int(query["limit"][0])
+        self.server.pages.append(after_id)
+        if after_id in self.server.broken_pages:
+            self.server.broken_pages.discard(after_id)
+            return self._json(503, {"success": False})
+        rows = [row for row in self.server.tokens if row["id"] > after_id][:limit + 1]
+        page = rows[:limit]
+        self._json(200, {
+            "success": True,
+            "data": page,
+            "next_after_id": page[-1]["id"] if len(rows) > limit else None,
+        })
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with self.server.lock:
+            self.server.sent.append(body["token"])
+        self._json(500 if body["token"].startswith("bad") else 200, {"status": "ok"})
+
+
+class DailyNotifierTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInApi)
+        self.server.tokens = [{"id": index, "token": f"tok-{index}"} for index in range(1, 24)]
+        self.server.tokens.append({"id": 30, "token": "bad-30"})
+        self.server.sent = []
+        self.server.pages = []
+        self.server.broken_pages = set()
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.checkpoint = os.path.join(directory.name, "checkpoint.json")
+        generate = patch.object(daily_notifier, "generate_notification", return_value=NOTIFICATION)
+        generate.start()
+        self.addCleanup(generate.stop)
+
+    def run_cycle(self):
+        return daily_notifier.run_notification_cycle(
+            force=True,
+            api_base=f"http://127.0.0.1:{self.server.server_address[1]}/api",
+            concurrency=4,
+            page_size=10,
+            checkpoint_path=self.checkpoint,
+        )
+
+    def test_cycle_sends_every_page_concurrently(self):
+        result = self.run_cycle()
+
+        self.assertEqual(self.server.pages, [0, 10, 20])
+        self.assertEqual(sorted(self.server.sent), sorted(row["token"] for row in self.server.tokens))
+        self.assertEqual(
+            (result["success"], result["resumed"], result["tokens_found"], result["sent"], result["failed"]),
+            (True, False, 24, 23, 1),
+        )
+        self.assertGreater(result["tokens_per_sec"], 0)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_interrupted_cycle_resumes_from_checkpoint(self):
+        self.server.broken_pages = {20}
+
+        first = self.run_cycle()
+
+        self.assertFalse(first["success"])
+        with open(self.checkpoint) as handle:
+            saved = json.load(handle)
+        self.assertEqual((saved["after_id"], saved["sent"], saved["notification"]), (20, 20, NOTIFICATION))
+
+        self.server.sent.clear()
+        second = self.run_cycle()
+
+        self.assertEqual(sorted(self.server.sent), ["bad-30", "tok-21", "tok-22", "tok-23"])
+        self.assertEqual(
+            (second["resumed"], second["tokens_found"], second["sent"], second["failed"]),
+            (True, 24, 23, 1),
+        )
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_stale_checkpoint_starts_a_new_cycle(self):
+        with open(self.checkpoint, "w") as handle:
+            json.dump({"started_at": 0, "after_id": 20, "notification": NOTIFICATION,
+                       "tokens_found": 20, "sent": 20, "failed": 0}, handle)
+
+        result = self.run_cycle()
+
+        self.assertEqual((result["resumed"], result["tokens_found"]), (False, 24))
+
+
+if __name__ == "__main__":
+    unittest.main()
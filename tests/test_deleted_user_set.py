@@ -0,0 +1,131 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import event, text
+
+import services.security as security
+from db.extensions import db
+from models.user import User
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+import controllers.user_controller  # noqa: F401,E402
+
+
+class DeletedUserSetTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            SQLALCHEMY_DATABASE_URI="sqlite://",
+            SQLALCHEMY_ENGINE_OPTIONS={},
+            AUTH_DELETED_USERS_REFRESH_SEC=5,
+            AUTH_DELETED_USERS_RELOAD_SEC=600,
+        )
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        db.metadata.create_all(db.engine, tables=[User.__table__])
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=[User.__table__])
+        # Added by sql/20261018_user_deletion_watermark.sql, not by the model.
+        with db.engine.begin() as connection:
+            connection.execute(text("ALTER TABLE users ADD COLUMN deletion_changed_at TIMESTAMP"))
+        self.addCleanup(db.session.remove)
+
+        self.now = datetime(2026, 10, 18, 12, 0, 0)
+        for user_id in (1, 2, 3):
+            db.session.add(User(
+                id=user_id, fid=f"fid-{user_id}", name=f"Player {user_id}", game_username=f"player{user_id}",
+                created_at=self.now, updated_at=self.now,
+            ))
+        db.session.commit()
+        self.delete(2, self.now)
+
+        self.clock = [1000.0]
+        for target, value in (
+            ("services.security._DELETED_USER_IDS", security._DeletedUserIds()),
+            ("services.security.time.monotonic", lambda: self.clock[0]),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.statements = []
+        listener = lambda *args: self.statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", listener)
+
+    # The writes DELETE /api/users and POST /api/users/restore commit, with the
+    # stamp the PostgreSQL trigger would set passed in explicitly.
+    def delete(self, user_id, at):
+        db.session.execute(text(
+            "UPDATE users SET deleted_at = :at, deletion_status = 'pending_purge', deletion_changed_at = :at "
+            "WHERE id = :user_id"
+        ), {"user_id": user_id, "at": at})
+        db.session.commit()
+
+    def restore(self, user_id, at):
+        db.session.execute(text(
+            "UPDATE users SET deleted_at = NULL, deletion_status = NULL, deletion_changed_at = :at "
+            "WHERE id = :user_id"
+        ), {"user_id": user_id, "at": at})
+        db.session.commit()
+
+    def test_checks_between_refreshes_do_not_query(self):
+        self.assertTrue(security._is_soft_deleted_user(2))
+        self.statements.clear()
+
+        for _ in range(100):
+            self.assertFalse(security._is_soft_deleted_user(1))
+            self.assertTrue(security._is_soft_deleted_user(2))
+
+        self.assertEqual(self.statements, [])
+
+    def test_delete_and_restore_in_this_worker_apply_immediately(self):
+        self.assertFalse(security._is_soft_deleted_user(1))
+
+        self.delete(1, self.now + timedelta(minutes=1))
+        security.invalidate_user_auth_status(1)
+        self.assertTrue(security._is_soft_deleted_user(1))
+
+        self.restore(2, self.now + timedelta(minutes=2))
+        security.invalidate_user_auth_status(2)
+        self.assertFalse(security._is_soft_deleted_user(2))
+
+    def test_other_workers_changes_arrive_on_the_next_refresh(self):
+        self.assertTrue(security._is_soft_deleted_user(2))
+
+        self.delete(3, self.now + timedelta(minutes=1))
+        self.restore(2, self.now + timedelta(minutes=1))
+        self.assertFalse(security._is_soft_deleted_user(3))
+
+        self.clock[0] += 5
+        self.statements.clear()
+        self.assertTrue(security._is_soft_deleted_user(3))
+        self.assertFalse(security._is_soft_deleted_user(2))
+        self.assertEqual(len(self.statements), 1)
+        self.assertIn("deletion_changed_at >", self.statements[0])
+
+    def test_late_commit_behind_the_watermark_is_still_seen(self):
+        self.delete(3, self.now + timedelta(minutes=5))
+        self.assertTrue(security._is_soft_deleted_user(3))
+
+        # Stamped before the watermark but committed after the last refresh.
+        self.delete(1, self.now + timedelta(minutes=4, seconds=30))
+        self.clock[0] += 5
+
+        self.assertTrue(security._is_soft_deleted_user(1))
+
+    def test_refresh_failure_fails_open_and_retries(self):
+        with patch.object(security.db.session, "execute", side_effect=RuntimeError("db down")):
+            self.assertFalse(security._is_soft_deleted_user(2))
+
+        self.clock[0] += 5
+        self.assertTrue(security._is_soft_deleted_user(2))
+
+
+if __name__ == "__main__":
+    unittest.main()
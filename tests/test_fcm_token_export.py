@@ -0,0 +1,80 @@
+import json
+import unittest
+from datetime import datetime
+
+from flask import Flask
+
+from controllers.user_controller import user_blueprint
+from db.extensions import db
+from models.fcmToken import FCMToken
+from models.user import User
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+
+
+class FcmTokenExportTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        self.app.register_blueprint(user_blueprint, url_prefix="/api")
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [User.__table__, FCMToken.__table__]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+
+        now = datetime(2026, 10, 1, 12, 0, 0)
+        for index in range(5):
+            user = User(
+                fid=f"fid-{index}", name=f"Player {index}", gender="f", game_username=f"player{index}",
+                created_at=now, updated_at=now,
+            )
+            db.session.add(user)
+            db.session.flush()
+            db.session.add(FCMToken(user_id=user.id, token=f"tok-{index}", platform="android", created_at=now))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def test_without_parameters_returns_every_token(self):
+        body = self.client.get("/api/getAllFCMToken").get_json()
+
+        self.assertEqual([item["token"] for item in body["data"]], [f"tok-{index}" for index in range(5)])
+        self.assertEqual(body["data"][0]["user"], {"name": "Player 0", "gender": "f"})
+        self.assertEqual(body["data"][0]["created_at"], "2026-10-01 12:00:00")
+        self.assertNotIn("next_after_id", body)
+
+    def test_keyset_pages_cover_every_token_once(self):
+        tokens = []
+        after_id = 0
+        pages = 0
+        while after_id is not None:
+            body = self.client.get(f"/api/getAllFCMToken?after_id={after_id}&limit=2").get_json()
+            tokens.extend(item["token"] for item in body["data"])
+            after_id = body["next_after_id"]
+            pages += 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(tokens, [f"tok-{index}" for index in range(5)])
+
+    def test_ndjson_streams_one_object_per_line(self):
+        first_id = FCMToken.query.filter_by(token="tok-1").one().id
+        response = self.client.get(f"/api/getAllFCMToken?format=ndjson&after_id={first_id}")
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertTrue(response.is_streamed)
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual([line["token"] for line in lines], ["tok-2", "tok-3", "tok-4"])
+
+    def test_rejects_non_integer_cursor(self):
+        response = self.client.get("/api/getAllFCMToken?after_id=abc")
+
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
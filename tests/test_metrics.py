@@ -0,0 +1,143 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from flask import Flask, g
+
+import services.metrics as metrics
+from services.cache import get_cache
+
+
+def _dead_pid():
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    return child.pid
+
+
+class MetricsTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(TESTING=True, METRICS_AUTH_TOKEN="scrape-token")
+
+        @self.app.before_request
+        def _start_request_timer():
+            g.request_start_ts = time.perf_counter()
+
+        metrics.init_metrics(self.app)
+
+        @self.app.route("/items/<int:item_id>")
+        def item(item_id):
+            if item_id == 500:
+                return {"error": "boom"}, 500
+            time.sleep(0.03)
+            return {"id": item_id}
+
+        for name, value in (("_REQUESTS", metrics._RequestMetrics()), ("_EXECUTORS", {})):
+            patcher = patch.object(metrics, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = self.app.test_client()
+
+    def scrape(self):
+        response = self.client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.mimetype.startswith("text/plain"))
+        return response.get_data(as_text=True).splitlines()
+
+    def test_route_latency_histogram_and_status_counters(self):
+        for item_id in (1, 2, 500):
+            self.client.get(f"/items/{item_id}")
+
+        lines = self.scrape()
+
+        labels = 'endpoint="/items/<int:item_id>",method="GET"'
+        self.assertIn("# TYPE hfg_http_request_duration_seconds histogram", lines)
+        self.assertIn(f'hfg_http_request_duration_seconds_bucket{{{labels},le="0.025"}} 1', lines)
+        self.assertIn(f'hfg_http_request_duration_seconds_bucket{{{labels},le="0.05"}} 3', lines)
+        self.assertIn(f'hfg_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f"hfg_http_request_duration_seconds_count{{{labels}}} 3", lines)
+        self.assertIn(f'hfg_http_requests_total{{{labels},status="200"}} 2', lines)
+        self.assertIn(f'hfg_http_requests_total{{{labels},status="500"}} 1', lines)
+
+    def test_endpoint_requires_the_token_and_is_off_without_one(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(
+            self.client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code, 401
+        )
+        self.app.config["METRICS_AUTH_TOKEN"] = ""
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+
+    def test_cache_and_executor_numbers_are_read_at_scrape_time(self):
+        cache = get_cache("test-metrics", max_items=1)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("missing")
+        cache.set("b", 2)
+
+        release = threading.Event()
+        executor = metrics.register_executor("test", ThreadPoolExecutor(max_workers=1))
+        self.addCleanup(executor.shutdown)
+        self.addCleanup(release.set)
+        for _ in range(3):
+            executor.submit(release.wait)
+
+        lines = self.scrape()
+
+        labels = 'backend="memory",namespace="test-metrics"'
+        self.assertIn(f"hfg_cache_hits_total{{{labels}}} 1", lines)
+        self.assertIn(f"hfg_cache_misses_total{{{labels}}} 1", lines)
+        self.assertIn(f"hfg_cache_evictions_total{{{labels}}} 1", lines)
+        self.assertIn(f"hfg_cache_items{{{labels}}} 1", lines)
+        self.assertIn('hfg_executor_queue_depth{executor="test"} 2', lines)
+        self.assertIn('hfg_executor_threads{executor="test"} 1', lines)
+
+    def test_multiprocess_mode_merges_worker_snapshots(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        env = patch.dict(os.environ, {"METRICS_MULTIPROC_DIR": directory.name})
+        env.start()
+        self.addCleanup(env.stop)
+
+        self.client.get("/items/1")
+        buckets = [0] * len(metrics.LATENCY_BUCKETS)
+        buckets[0] = 4
+        exited = {
+            "pid": _dead_pid(),
+            "buckets": list(metrics.LATENCY_BUCKETS),
+            "counters": [["hfg_http_requests_total",
+                          {"endpoint": "/items/<int:item_id>", "method": "GET", "status": "200"}, 4]],
+            "histograms": [["hfg_http_request_duration_seconds",
+                            {"endpoint": "/items/<int:item_id>", "method": "GET"}, buckets, 0.004, 4]],
+            "gauges": [["hfg_executor_queue_depth", {"executor": "gone"}, 7]],
+        }
+        with open(os.path.join(directory.name, f"metrics-{exited['pid']}.json"), "w") as handle:
+            json.dump(exited, handle)
+
+        lines = self.scrape()
+
+        labels = 'endpoint="/items/<int:item_id>",method="GET"'
+        self.assertIn(f'hfg_http_requests_total{{{labels},status="200"}} 5', lines)
+        self.assertIn(f'hfg_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 4', lines)
+        self.assertIn(f"hfg_http_request_duration_seconds_count{{{labels}}} 5", lines)
+        self.assertFalse(any('executor="gone"' in line for line in lines))
+        self.assertTrue(os.path.exists(os.path.join(directory.name, f"metrics-{os.getpid()}.json")))
+
+        # The gunicorn master folds exited workers into one archive file.
+        metrics.fold_exited_worker(exited["pid"])
+        metrics.fold_exited_worker(exited["pid"])
+
+        self.assertEqual(
+            sorted(os.listdir(directory.name)), sorted(["metrics-archive.json", f"metrics-{os.getpid()}.json"])
+        )
+        self.assertIn(f'hfg_http_requests_total{{{labels},status="200"}} 5', self.scrape())
+
+
+if __name__ == "__main__":
+    unittest.main()
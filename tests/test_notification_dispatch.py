@@ -0,0 +1,205 @@
+import unittest
+from functools import partial
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from firebase_admin import exceptions as firebase_exceptions, messaging
+from flask import Flask
+from sqlalchemy import event
+
+from controllers.user_controller import _flush_notification_failures, _run_notification_dispatch_job
+from db.extensions import db
+from models.fcmToken import FCMToken
+from models.notificationDispatch import NotificationDispatchFailure, NotificationDispatchJob
+from services.firebase_service import send_multicast_with_results
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+
+
+class StandInMessaging:
+    """
+    Answers send_each_for_multicast like FCM: tokens starting with "bad" are
+    unregistered, tokens starting with "busy" hit a transient error.
+    """
+
+    def __init__(self):
+        self.batches = []
+
+    def send_each_for_multicast(self, message):
+        self.batches.append(list(message.tokens))
+        return SimpleNamespace(responses=[
+            SimpleNamespace(success=self.error_for(token) is None, exception=self.error_for(token))
+            for token in message.tokens
+        ])
+
+    @staticmethod
+    def error_for(token):
+        if token.startswith("bad"):
+            return messaging.UnregisteredError("Requested entity was not found.")
+        if token.startswith("busy"):
+            return firebase_exceptions.UnavailableError("The service is currently unavailable.")
+        return None
+
+
+class NotificationDispatchJobTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [FCMToken.__table__, NotificationDispatchJob.__table__, NotificationDispatchFailure.__table__]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        for name, value in (
+            ("_NOTIF_TABLES_READY", True),
+            ("_NOTIFICATION_FCM_BATCH_SIZE", 3),
+            ("_NOTIFICATION_FCM_BATCH_CONCURRENCY", 2),
+        ):
+            patcher = patch(f"controllers.user_controller.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.messaging = StandInMessaging()
+        self.tokens = [f"tok-{index}" for index in range(10)] + ["bad-1", "bad-2"]
+        db.session.add_all(FCMToken(user_id=1, token=token) for token in self.tokens)
+        db.session.add(NotificationDispatchFailure(token="tok-4", error_type="X", is_blocked=True))
+        self.job = NotificationDispatchJob(force=True, notification_title="Hi", notification_message="Book now")
+        db.session.add(self.job)
+        db.session.commit()
+        self.job_id = self.job.id
+
+    def run_job(self, sender=None):
+        sender = sender or partial(send_multicast_with_results, client=self.messaging)
+        with patch("controllers.user_controller.send_multicast_with_results", sender):
+            _run_notification_dispatch_job(self.app, self.job_id)
+        db.session.expire_all()
+        return db.session.get(NotificationDispatchJob, self.job_id)
+
+    def test_tokens_are_sent_in_multicast_batches(self):
+        job = self.run_job()
+
+        self.assertEqual([len(batch) for batch in self.messaging.batches], [3, 3, 3, 2])
+        self.assertNotIn("tok-4", sum(self.messaging.batches, []))
+        self.assertEqual(
+            (job.status, job.tokens_found, job.tokens_blocked, job.tokens_attempted, job.sent, job.failed),
+            ("completed", 12, 1, 11, 9, 2),
+        )
+        self.assertEqual(job.checkpoint_token_id, FCMToken.query.filter_by(token="bad-2").one().id)
+        failures = {row.token: row.error_type for row in NotificationDispatchFailure.query.all()}
+        self.assertEqual(failures, {"tok-4": "X", "bad-1": "UnregisteredError", "bad-2": "UnregisteredError"})
+
+    def test_tokens_are_read_in_keyset_pages_without_blocked_tokens(self):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            if "FROM fcm_tokens" in statement and "count(" not in statement:
+                statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            self.run_job()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+        # Four pages of at most three sendable tokens, then an empty page.
+        self.assertEqual(len(statements), 5)
+        for statement in statements:
+            self.assertIn("NOT (EXISTS", statement)
+            self.assertIn("LIMIT", statement)
+
+    def test_retry_failed_includes_blocked_tokens(self):
+        job = db.session.get(NotificationDispatchJob, self.job_id)
+        job.retry_failed = True
+        db.session.commit()
+
+        job = self.run_job()
+
+        self.assertIn("tok-4", sum(self.messaging.batches, []))
+        self.assertEqual((job.tokens_blocked, job.tokens_attempted, job.sent), (1, 12, 10))
+
+    def test_failures_are_upserted_by_token(self):
+        db.session.add(NotificationDispatchFailure(
+            token="bad-1", error_type="OldError", failure_count=2, is_blocked=False, last_job_id=0,
+        ))
+        db.session.commit()
+
+        self.run_job()
+
+        row = NotificationDispatchFailure.query.filter_by(token="bad-1").one()
+        self.assertEqual(
+            (row.failure_count, row.is_blocked, row.error_type, row.last_job_id),
+            (3, True, "UnregisteredError", self.job_id),
+        )
+        self.assertEqual(NotificationDispatchFailure.query.filter_by(token="bad-2").one().failure_count, 1)
+
+    def test_transient_token_errors_are_counted_but_not_blocked(self):
+        db.session.add(FCMToken(user_id=1, token="busy-1"))
+        db.session.add(NotificationDispatchFailure(token="bad-2", error_type="OldError", is_blocked=True))
+        db.session.commit()
+
+        job = self.run_job()
+
+        self.assertEqual((job.sent, job.failed), (9, 2))
+        busy = NotificationDispatchFailure.query.filter_by(token="busy-1").one()
+        self.assertEqual((busy.error_type, busy.is_blocked), ("UnavailableError", False))
+
+        _flush_notification_failures([("bad-2", firebase_exceptions.UnavailableError("later"))], self.job_id)
+        db.session.commit()
+        # A later transient error does not unblock a rejected token.
+        self.assertTrue(NotificationDispatchFailure.query.filter_by(token="bad-2").one().is_blocked)
+
+    def test_failed_batch_call_stops_the_job_without_blocking_its_tokens(self):
+        calls = []
+
+        def outage(message):
+            calls.append(list(message.tokens))
+            if len(calls) == 2:
+                raise firebase_exceptions.UnavailableError("FCM is down")
+            return StandInMessaging.send_each_for_multicast(self.messaging, message)
+
+        self.messaging.send_each_for_multicast = outage
+        job = self.run_job()
+
+        self.assertEqual(job.status, "failed")
+        self.assertEqual(job.checkpoint_token_id, FCMToken.query.filter_by(token="tok-2").one().id)
+        self.assertFalse(NotificationDispatchFailure.query.filter(
+            NotificationDispatchFailure.token.in_(calls[1])
+        ).count())
+
+    def test_flush_collapses_repeated_tokens(self):
+        _flush_notification_failures([("dup", ValueError("a")), ("dup", KeyError("b"))], self.job_id)
+        db.session.commit()
+
+        row = NotificationDispatchFailure.query.filter_by(token="dup").one()
+        self.assertEqual((row.failure_count, row.error_type), (1, "KeyError"))
+
+    def test_failed_job_resumes_after_its_checkpoint(self):
+        calls = []
+
+        def flaky(tokens, title, body):
+            calls.append(tokens)
+            if len(calls) == 3:
+                raise RuntimeError("connection reset")
+            return send_multicast_with_results(tokens, title, body, client=self.messaging)
+
+        job = self.run_job(flaky)
+        self.assertEqual(job.status, "failed")
+        self.assertEqual((job.sent, job.failed), (6, 0))
+        checkpoint = job.checkpoint_token_id
+        self.assertEqual(checkpoint, FCMToken.query.filter_by(token="tok-6").one().id)
+
+        self.messaging.batches.clear()
+        job = self.run_job()
+
+        resent = sum(self.messaging.batches, [])
+        self.assertEqual(resent, ["tok-7", "tok-8", "tok-9", "bad-1", "bad-2"])
+        self.assertEqual((job.status, job.tokens_attempted, job.sent, job.failed), ("completed", 11, 9, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
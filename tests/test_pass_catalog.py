@@ -0,0 +1,131 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from flask import Flask
+from sqlalchemy import event, text
+
+import services.pass_catalog as pass_catalog
+from controllers.user_controller import user_blueprint
+from db.extensions import db
+from models.cafePass import CafePass
+from models.passType import PassType
+from models.uploadedImage import Image
+from models.user import User
+from models.userPass import UserPass
+from models.vendor import Vendor
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+
+
+class PassCatalogTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={}, PASS_CATALOG_CHECK_SEC=5,
+        )
+        self.app.register_blueprint(user_blueprint, url_prefix="/api")
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [
+            User.__table__, Vendor.__table__, Image.__table__, PassType.__table__,
+            CafePass.__table__, UserPass.__table__,
+        ]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        db.session.execute(text("CREATE TABLE catalog_versions (name VARCHAR(64) PRIMARY KEY, version BIGINT NOT NULL)"))
+        db.session.execute(text("INSERT INTO catalog_versions (name, version) VALUES ('cafe_passes', 1)"))
+
+        monthly = PassType(name="monthly")
+        db.session.add(monthly)
+        for vendor_id in (1, 2, 3):
+            db.session.add(Vendor(id=vendor_id, cafe_name=f"Cafe {vendor_id}", owner_name="Owner"))
+            for image_index in range(2):
+                db.session.add(Image(
+                    vendor_id=vendor_id, public_id="p", url=f"https://img/{vendor_id}/{image_index}", image_id="i", path="x",
+                ))
+        db.session.flush()
+        for index in range(9):
+            db.session.add(CafePass(
+                id=index + 1, vendor_id=(index % 3) + 1, pass_type_id=monthly.id, name=f"Pass {index + 1}",
+                price=100.0, days_valid=30,
+            ))
+        db.session.add(CafePass(id=10, vendor_id=None, pass_type_id=monthly.id, name="Hash Pass", price=50.0))
+        db.session.add(CafePass(id=11, vendor_id=1, name="Retired", price=1.0, is_active=False))
+        now = datetime(2026, 10, 18, 12, 0, 0)
+        today = now.date()
+        for user_id in (1, 2):
+            db.session.add(User(
+                id=user_id, fid=f"fid-{user_id}", name=f"Player {user_id}", game_username=f"player{user_id}",
+                created_at=now, updated_at=now,
+            ))
+        db.session.add(UserPass(user_id=1, cafe_pass_id=2, valid_from=today, valid_to=today + timedelta(days=30)))
+        db.session.add(UserPass(user_id=1, cafe_pass_id=10, valid_from=today, valid_to=today - timedelta(days=1)))
+        db.session.commit()
+
+        self.clock = [1000.0]
+        for target, value in (
+            ("services.pass_catalog._PASS_CATALOG", pass_catalog._PassCatalog()),
+            ("services.pass_catalog.time.monotonic", lambda: self.clock[0]),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.statements = []
+        listener = lambda *args: self.statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", listener)
+        self.client = self.app.test_client()
+
+    def get_passes(self, user_id, query=""):
+        self.statements.clear()
+        response = self.client.get(f"/api/user/{user_id}/available_passes{query}")
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_catalog_is_shared_and_only_ownership_is_read_per_user(self):
+        first = self.get_passes(1)
+        # User lookup, version, passes with vendor and type, vendor images, ownership.
+        self.assertEqual(len(self.statements), 5)
+
+        second = self.get_passes(2)
+        self.assertEqual(len(self.statements), 2)
+        self.assertIn("user_passes", self.statements[1])
+
+        self.assertEqual([p["id"] for p in first], list(range(1, 11)))
+        self.assertEqual({p["id"] for p in first if p["is_bought"]}, {2, 10})
+        self.assertFalse(any(p["is_bought"] for p in second))
+        self.assertEqual(first[0]["pass_type"], "monthly")
+        self.assertEqual(first[0]["vendor_name"], "Cafe 1")
+        self.assertEqual([img["url"] for img in first[0]["vendor_images"]], ["https://img/1/0", "https://img/1/1"])
+        self.assertEqual((first[9]["vendor_name"], first[9]["vendor_images"]), ("Hash Pass", []))
+
+    def test_type_filter(self):
+        self.assertEqual([p["id"] for p in self.get_passes(1, "?type=hash")], [10])
+        self.assertEqual([p["id"] for p in self.get_passes(1, "?type=vendor")], list(range(1, 10)))
+
+    def test_reloads_only_when_the_version_moves(self):
+        self.get_passes(1)
+        db.session.execute(text("UPDATE cafe_passes SET price = 120.0 WHERE id = 1"))
+        db.session.commit()
+
+        self.clock[0] += 5
+        self.assertEqual(self.get_passes(1)[0]["price"], 100.0)
+        self.assertEqual(len(self.statements), 3)
+
+        db.session.execute(text("UPDATE catalog_versions SET version = version + 1"))
+        db.session.commit()
+        self.assertEqual(self.get_passes(1)[0]["price"], 100.0)
+
+        self.clock[0] += 5
+        self.assertEqual(self.get_passes(1)[0]["price"], 120.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import unittest
+
+from flask import Flask, g, jsonify
+from sqlalchemy import text
+
+from db.extensions import db
+from services.query_stats import init_query_stats, request_query_stats
+
+
+class QueryStatsTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(
+            TESTING=True,
+            SQLALCHEMY_DATABASE_URI="sqlite://",
+            SQLALCHEMY_ENGINE_OPTIONS={},
+            DB_QUERY_STRICT_MODE=False,
+            DB_QUERY_REPEAT_THRESHOLD=3,
+        )
+        db.init_app(self.app)
+
+        @self.app.before_request
+        def _request_id():
+            g.request_id = "req-1"
+
+        init_query_stats(self.app)
+
+        @self.app.route("/loop/<int:rows>")
+        def loop(rows):
+            db.session.execute(text("SELECT 1"))
+            for row in range(rows):
+                db.session.execute(text("SELECT :row"), {"row": row})
+            return jsonify(request_query_stats())
+
+        self.client = self.app.test_client()
+        self.addCleanup(self._remove_session)
+
+    def _remove_session(self):
+        with self.app.app_context():
+            db.session.remove()
+
+    def test_counts_queries_and_db_time_per_request(self):
+        first = self.client.get("/loop/4").get_json()
+        second = self.client.get("/loop/1").get_json()
+
+        self.assertEqual(first["count"], 5)
+        self.assertEqual(second["count"], 2)
+        self.assertGreater(first["total_ms"], 0)
+        self.assertGreaterEqual(first["total_ms"], first["slowest_ms"])
+        self.assertIn("SELECT", first["slowest_statement"])
+
+    def test_queries_outside_a_request_are_not_counted(self):
+        with self.app.app_context():
+            db.session.execute(text("SELECT 1"))
+            self.assertIsNone(request_query_stats())
+
+        self.assertEqual(self.client.get("/loop/0").get_json()["count"], 1)
+
+    def test_strict_mode_logs_repeated_statements_with_the_request_id(self):
+        self.app.config["DB_QUERY_STRICT_MODE"] = True
+
+        with self.assertLogs(self.app.logger, level="WARNING") as logs:
+            self.client.get("/loop/3")
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("repeated_query request_id=req-1", logs.output[0])
+        self.assertIn("count=3 statement=SELECT ?", logs.output[0])
+
+    def test_strict_mode_is_quiet_below_the_threshold(self):
+        self.app.config["DB_QUERY_STRICT_MODE"] = True
+
+        with self.assertNoLogs(self.app.logger, level="WARNING"):
+            self.client.get("/loop/2")
+
+
+if __name__ == "__main__":
+    unittest.main()
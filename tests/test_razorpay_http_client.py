@@ -0,0 +1,131 @@
+import json
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import requests
+
+import services.payment_service as payment_service
+
+
+class _StandInRazorpay(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        self.server.seen.append((self.command, self.path, self.client_address[1]))
+        script = self.server.script.get((self.command, self.path)) or []
+        status, body, *headers = script.pop(0) if len(script) > 1 else script[0]
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers[0] if headers else {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = _reply
+    do_POST = _reply
+
+
+REFUND = {
+    "id": "rfnd_1",
+    "payment_id": "pay_1",
+    "amount": 25000,
+    "currency": "INR",
+    "status": "processed",
+    "receipt": "ctr_registration",
+}
+
+
+class RazorpayHttpClientTests(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInRazorpay)
+        self.server.seen = []
+        self.server.script = {}
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        env = patch.dict(os.environ, {
+            "RAZORPAY_API_BASE": f"http://127.0.0.1:{self.server.server_address[1]}",
+            "RAZORPAY_KEY_ID": "key",
+            "RAZORPAY_KEY_SECRET": "secret",
+            "RAZORPAY_HTTP_BACKOFF_SEC": "0",
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        for name, value in (("_RAZORPAY_HTTP", None), ("_RAZORPAY_CALL_STATS", {}), ("PROVIDER", "razorpay")):
+            patcher = patch.object(payment_service, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(lambda: payment_service._RAZORPAY_HTTP and payment_service._RAZORPAY_HTTP.close())
+
+    def script(self, method, path, *responses):
+        self.server.script[(method, path)] = list(responses)
+
+    def test_calls_reuse_one_keep_alive_connection(self):
+        self.script("GET", "/v1/payments/pay_1/refunds", (200, {"items": [REFUND]}))
+
+        for _ in range(5):
+            self.assertEqual(payment_service._rzp_payment_refunds("pay_1"), [REFUND])
+
+        self.assertEqual(len(self.server.seen), 5)
+        self.assertEqual(len({port for _, _, port in self.server.seen}), 1)
+        stats = payment_service.razorpay_http_stats()["GET /v1/payments/{id}/refunds"]
+        self.assertEqual(stats["calls"], 5)
+        self.assertEqual(stats["errors"], 0)
+        self.assertGreater(stats["avg_ms"], 0)
+
+    def test_get_is_retried_on_rate_limit_and_server_errors(self):
+        self.script(
+            "GET", "/v1/refunds/rfnd_1",
+            (503, {"error": "unavailable"}),
+            (429, {"error": "slow down"}, {"Retry-After": "0"}),
+            (200, REFUND),
+        )
+
+        result = payment_service.fetch_tournament_refund("rfnd_1", "pay_1", "250.00", "INR", provider="razorpay")
+
+        self.assertEqual(result["status"], "processed")
+        self.assertEqual(len(self.server.seen), 3)
+        stats = payment_service.razorpay_http_stats()["GET /v1/refunds/{id}"]
+        self.assertEqual((stats["calls"], stats["retries"], stats["errors"]), (1, 2, 0))
+
+    def test_get_raises_once_retries_are_exhausted(self):
+        self.script("GET", "/v1/refunds/rfnd_1", (502, {"error": "bad gateway"}))
+
+        with self.assertRaises(requests.HTTPError):
+            payment_service.fetch_tournament_refund("rfnd_1", "pay_1", "250.00", "INR", provider="razorpay")
+
+        self.assertEqual(len(self.server.seen), 4)
+        self.assertEqual(payment_service.razorpay_http_stats()["GET /v1/refunds/{id}"]["errors"], 1)
+
+    def test_refund_post_is_not_replayed(self):
+        self.script(
+            "GET", "/v1/payments/pay_1/refunds",
+            (200, {"items": []}),
+            (200, {"items": [REFUND]}),
+        )
+        self.script("POST", "/v1/payments/pay_1/refund", (503, {"error": "unavailable"}))
+
+        result = payment_service.refund_tournament_payment(
+            "pay_1", "250.00", "INR", "ctr_registration", provider="razorpay",
+        )
+
+        self.assertEqual(result["refund_id"], "rfnd_1")
+        posts = [path for method, path, _ in self.server.seen if method == "POST"]
+        self.assertEqual(posts, ["/v1/payments/pay_1/refund"])
+
+
+if __name__ == "__main__":
+    unittest.main()
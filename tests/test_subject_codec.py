@@ -0,0 +1,136 @@
+import base64
+import os
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import jwt
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from flask import Flask, g, jsonify
+
+import services.security as security
+from services.cache import TTLCache
+from services.security import decode_subject, encode_subject
+
+JWT_SECRET = "test-jwt-secret-that-is-at-least-32-bytes"
+
+
+def _key():
+    return base64.urlsafe_b64encode(os.urandom(32)).decode()
+
+
+class SubjectCodecTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.private_pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode()
+        cls.public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM,
+            serialization.PublicFormat.SubjectPublicKeyInfo,
+        ).decode()
+        cls.old_key, cls.new_key = _key(), _key()
+
+    def config(self, **overrides):
+        config = {
+            "ENCRYPT_PRIVATE_KEY": self.private_pem,
+            "ENCRYPT_PUBLIC_KEY": self.public_pem,
+            "SUBJECT_ENCRYPTION_KEYS": f"k2:{self.new_key},k1:{self.old_key}",
+            "SUBJECT_ENCRYPTION_KEY_ID": "k2",
+            "SUBJECT_ENCRYPTION_ACCEPT_RSA": True,
+        }
+        config.update(overrides)
+        return config
+
+    def test_symmetric_subject_round_trips_under_the_active_key(self):
+        config = self.config()
+        subject = encode_subject(42, config)
+
+        self.assertTrue(subject.startswith("v2.k2."))
+        self.assertNotEqual(subject, encode_subject(42, config))
+        self.assertEqual(decode_subject(subject, config), "42")
+
+    def test_rotated_key_still_decodes_until_it_is_removed(self):
+        old_subject = encode_subject(7, self.config(SUBJECT_ENCRYPTION_KEY_ID="k1"))
+
+        self.assertEqual(decode_subject(old_subject, self.config()), "7")
+        with self.assertRaises(ValueError):
+            decode_subject(old_subject, self.config(SUBJECT_ENCRYPTION_KEYS=f"k2:{self.new_key}"))
+
+    def test_tampered_key_id_or_ciphertext_is_rejected(self):
+        config = self.config(SUBJECT_ENCRYPTION_KEYS=f"k2:{self.new_key},k3:{self.new_key}")
+        subject = encode_subject(7, config)
+
+        with self.assertRaises(InvalidTag):
+            decode_subject(subject.replace("v2.k2.", "v2.k3."), config)
+        flipped = subject[:-2] + ("A" if subject[-2] != "A" else "B") + subject[-1]
+        with self.assertRaises(InvalidTag):
+            decode_subject(flipped, config)
+
+    def test_rsa_subjects_decode_during_migration(self):
+        rsa_subject = encode_subject(9, self.config(SUBJECT_ENCRYPTION_KEY_ID=""))
+
+        self.assertFalse(rsa_subject.startswith("v2."))
+        self.assertEqual(decode_subject(rsa_subject, self.config()), "9")
+        with self.assertRaises(ValueError):
+            decode_subject(rsa_subject, self.config(SUBJECT_ENCRYPTION_ACCEPT_RSA=False))
+
+    def test_active_key_must_be_in_the_keyring(self):
+        with self.assertRaises(ValueError):
+            encode_subject(1, self.config(SUBJECT_ENCRYPTION_KEY_ID="k9"))
+
+    def auth_app(self):
+        app = Flask(__name__)
+        app.config.update(TESTING=True, JWT_SECRET_KEY=JWT_SECRET, **self.config())
+
+        @app.route("/whoami")
+        @security.auth_required_self(decrypt_user=True, allow_deleted=True)
+        def whoami():
+            return jsonify({"user_id": g.auth_user_id})
+
+        return app
+
+    def token(self, app, user_id, ttl=timedelta(hours=1)):
+        now = datetime.utcnow()
+        return jwt.encode(
+            {"uuid": encode_subject(user_id, app.config), "iat": now, "exp": now + ttl},
+            JWT_SECRET,
+            algorithm="HS256",
+        )
+
+    def test_auth_decorator_accepts_symmetric_subjects(self):
+        app = self.auth_app()
+        token = self.token(app, 31)
+
+        response = app.test_client().get("/whoami", headers={"Authorization": f"Bearer {token}"})
+
+        self.assertEqual(response.get_json(), {"user_id": 31})
+
+    def test_decrypted_subjects_are_cached_in_a_bounded_expiring_lru(self):
+        app = self.auth_app()
+        cache = TTLCache("auth-decrypted-subject", max_items=2)
+        tokens = [self.token(app, user_id, ttl=timedelta(minutes=user_id)) for user_id in (1, 2, 3)]
+
+        with patch.object(security, "_DECRYPTED_SUBJECT_CACHE", cache), \
+                patch.object(security, "decode_subject", wraps=decode_subject) as decode:
+            client = app.test_client()
+            for token in tokens + tokens[-1:]:
+                client.get("/whoami", headers={"Authorization": f"Bearer {token}"})
+
+            self.assertEqual(decode.call_count, 3)
+            stats = cache.stats()
+            self.assertEqual((stats["items"], stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 3, 1))
+            self.assertEqual(stats["hit_ratio"], 0.25)
+            # The three-minute token is cached for three minutes, not the 300s cap.
+            newest = cache._entries[next(reversed(cache._entries))]
+            self.assertLessEqual(newest.expires_at, time.monotonic() + 180)
+
+
+if __name__ == "__main__":
+    unittest.main()
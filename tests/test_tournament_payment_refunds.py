@@ -12,14 +12,13 @@ def response(payload):
 class TournamentPaymentRefundTests(unittest.TestCase):
     @patch("services.payment_service.PROVIDER", "razorpay")
     @patch("services.payment_service._razorpay_credentials", return_value=("key", "secret"))
-    @patch("requests.post")
-    @patch("requests.get")
+    @patch("services.payment_service._razorpay_http")
     def test_existing_pending_receipt_prevents_duplicate_refund(
         self,
-        get,
-        post,
+        http,
         _credentials,
     ):
+        get, post = http.return_value.get, http.return_value.post
         get.return_value = response({
             "items": [{
                 "id": "rfnd_existing",
@@ -45,14 +44,13 @@ class TournamentPaymentRefundTests(unittest.TestCase):
 
     @patch("services.payment_service.PROVIDER", "razorpay")
     @patch("services.payment_service._razorpay_credentials", return_value=("key", "secret"))
-    @patch("requests.post")
-    @patch("requests.get")
+    @patch("services.payment_service._razorpay_http")
     def test_creates_normal_refund_in_paise_with_stable_receipt(
         self,
-        get,
-        post,
+        http,
         _credentials,
     ):
+        get, post = http.return_value.get, http.return_value.post
         get.return_value = response({"items": []})
         post.return_value = response({
             "id": "rfnd_new",
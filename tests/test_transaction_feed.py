@@ -0,0 +1,124 @@
+import unittest
+from datetime import datetime, timedelta
+
+from flask import Flask, g
+from sqlalchemy import event
+
+from controllers.user_controller import (
+    _decode_transaction_cursor,
+    _transaction_feed_page,
+    user_transaction_history,
+)
+from db.extensions import db
+from models.hashWalletTransaction import HashWalletTransaction
+from models.transaction import Transaction
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+
+USER_ID = 5
+
+
+class TransactionFeedTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [Transaction.__table__, HashWalletTransaction.__table__]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+
+        start = datetime(2026, 10, 1, 9, 0, 0)
+        for index in range(30):
+            # Every third booking lands on the same second as a wallet movement.
+            at = start + timedelta(minutes=index * 7)
+            for user_id in (USER_ID, USER_ID + 1):
+                db.session.add(Transaction(
+                    user_id=user_id, booked_date=at.date(), booking_date=at.date(), booking_time=at.time(),
+                    user_name="Player", amount=100.0 + index, original_amount=100.0 + index,
+                    booking_type="booking", settlement_status="completed", reference_id=f"b{index}",
+                ))
+        for index in range(40):
+            at = start + timedelta(minutes=index * 5 + (0 if index % 3 else 1))
+            if index % 3 == 0:
+                at = start + timedelta(minutes=(index // 3) * 21)
+            db.session.add(HashWalletTransaction(
+                user_id=USER_ID, amount=(-10 if index % 2 else 25), type="booking", reference_id=f"w{index}",
+                timestamp=at,
+            ))
+        db.session.commit()
+
+    def expected_feed(self):
+        rows = [
+            ((datetime.combine(t.booking_date, t.booking_time), "txn", t.id), f"txn_{t.id}")
+            for t in Transaction.query.filter_by(user_id=USER_ID)
+        ] + [
+            ((w.timestamp, "wallet", w.id), f"wallet_{w.id}")
+            for w in HashWalletTransaction.query.filter_by(user_id=USER_ID)
+        ]
+        return [feed_id for _, feed_id in sorted(rows, reverse=True)]
+
+    def test_pages_walk_the_merged_feed_in_order_with_one_query_each(self):
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        self.addCleanup(event.remove, db.engine, "before_cursor_execute", listener)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            statements.clear()
+            page, next_cursor = _transaction_feed_page(USER_ID, 7, cursor and _decode_transaction_cursor(cursor))
+            self.assertEqual(len(statements), 1)
+            self.assertIn("UNION ALL", statements[0])
+            seen.extend(row["id"] for row in page)
+            pages += 1
+            if next_cursor is None:
+                break
+            cursor = next_cursor
+
+        self.assertEqual(seen, self.expected_feed())
+        self.assertEqual(pages, 10)
+        self.assertEqual(len(page), 70 - 9 * 7)
+
+    def test_row_shapes_match_the_previous_payload(self):
+        page, _ = _transaction_feed_page(USER_ID, 70)
+        booking = next(row for row in page if row["id"].startswith("txn_"))
+        wallet = next(row for row in page if row["id"].startswith("wallet_"))
+
+        self.assertEqual(
+            set(booking), {"id", "date", "time", "amount", "type", "mode", "status", "reference_id"}
+        )
+        self.assertEqual(booking["type"], "booking")
+        self.assertEqual(set(wallet), {"id", "date", "time", "amount", "type", "reference_id"})
+        self.assertIsInstance(wallet["amount"], int)
+        self.assertEqual(wallet["type"], "wallet_credit" if wallet["amount"] > 0 else "wallet_debit")
+
+    def get_feed(self, query=""):
+        with self.app.test_request_context(f"/users/transactions{query}"):
+            g.auth_user_id = USER_ID
+            response, status = user_transaction_history.__wrapped__()
+        self.assertEqual(status, 200)
+        return response.get_json()
+
+    def test_requests_without_paging_params_keep_the_full_history(self):
+        full = self.get_feed()
+        self.assertEqual(set(full), {"transactions"})
+        self.assertEqual([row["id"] for row in full["transactions"]], self.expected_feed())
+
+        page = self.get_feed("?limit=10")
+        self.assertEqual(len(page["transactions"]), 10)
+        self.assertIsNotNone(page["next_cursor"])
+
+    def test_rejects_tampered_cursors(self):
+        for cursor in ("not-a-cursor", "WyIyMDI2IiwibWUiLDFd", ""):
+            with self.assertRaises(ValueError):
+                _decode_transaction_cursor(cursor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+
+from flask import Flask
+from sqlalchemy import event
+
+from controllers.user_controller import _API_MICROCACHE, user_blueprint
+from db.extensions import db
+from models.extraServiceCategory import ExtraServiceCategory
+from models.extraServiceMenu import ExtraServiceMenu
+from models.extraServiceMenuImage import ExtraServiceMenuImage
+
+# Relationships are resolved by class name when the mappers configure; load
+# the same models the app registers through its blueprints.
+import controllers.event_participation_controller  # noqa: F401,E402
+
+VENDOR_ID = 7
+
+
+class VendorExtraServiceTests(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(TESTING=True, SQLALCHEMY_DATABASE_URI="sqlite://", SQLALCHEMY_ENGINE_OPTIONS={})
+        self.app.register_blueprint(user_blueprint, url_prefix="/api")
+        db.init_app(self.app)
+        self.context = self.app.app_context()
+        self.context.push()
+        self.addCleanup(self.context.pop)
+        tables = [ExtraServiceCategory.__table__, ExtraServiceMenu.__table__, ExtraServiceMenuImage.__table__]
+        db.metadata.create_all(db.engine, tables=tables)
+        self.addCleanup(db.metadata.drop_all, db.engine, tables=tables)
+        self.addCleanup(db.session.remove)
+        _API_MICROCACHE.clear()
+        self.addCleanup(_API_MICROCACHE.clear)
+
+        # 8 categories x 8 menus, two images per menu, plus rows that must be hidden.
+        for category_index in range(8):
+            category = ExtraServiceCategory(vendor_id=VENDOR_ID, name=f"Category {category_index}")
+            db.session.add(category)
+            db.session.flush()
+            for menu_index in range(8):
+                menu = ExtraServiceMenu(category_id=category.id, name=f"Item {category_index}.{menu_index}", price=10.0)
+                db.session.add(menu)
+                db.session.flush()
+                db.session.add_all([
+                    ExtraServiceMenuImage(menu_id=menu.id, image_url=f"https://img/{menu.id}/side", public_id="s"),
+                    ExtraServiceMenuImage(
+                        menu_id=menu.id, image_url=f"https://img/{menu.id}/main", public_id="m", is_primary=True,
+                    ),
+                ])
+        self.first_category = ExtraServiceCategory.query.order_by(ExtraServiceCategory.id).first()
+        db.session.add(ExtraServiceMenu(category_id=self.first_category.id, name="Retired", price=1.0, is_active=False))
+        db.session.add(ExtraServiceCategory(vendor_id=VENDOR_ID, name="Hidden", is_active=False))
+        db.session.add(ExtraServiceCategory(vendor_id=VENDOR_ID + 1, name="Other vendor"))
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def count_queries(self, path):
+        statements = []
+
+        def before_cursor_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = self.client.get(path)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+        return response, len(statements)
+
+    def test_full_tree_is_loaded_in_two_queries(self):
+        response, queries = self.count_queries(f"/api/vendor/{VENDOR_ID}/extraService")
+
+        self.assertEqual(queries, 2)
+        categories = response.get_json()["categories"]
+        self.assertEqual([category["name"] for category in categories], [f"Category {index}" for index in range(8)])
+        self.assertEqual(sum(len(category["menus"]) for category in categories), 64)
+        first_menu = categories[0]["menus"][0]
+        self.assertEqual(first_menu["name"], "Item 0.0")
+        self.assertEqual(first_menu["image_url"], f"https://img/{first_menu['id']}/main")
+
+    def test_menus_for_one_category_take_one_query(self):
+        response, queries = self.count_queries(
+            f"/api/vendor/{VENDOR_ID}/extras/category/{self.first_category.id}/menus"
+        )
+
+        self.assertEqual(queries, 1)
+        menus = response.get_json()
+        self.assertEqual([menu["name"] for menu in menus], [f"Item 0.{index}" for index in range(8)])
+        self.assertEqual(set(menus[0]), {"id", "name", "price", "description"})
+
+    def test_menu_item_takes_one_query_and_checks_ownership(self):
+        menu = ExtraServiceMenu.query.filter_by(name="Item 0.3").one()
+
+        response, queries = self.count_queries(
+            f"/api/vendor/{VENDOR_ID}/extras/category/{self.first_category.id}/menu/{menu.id}"
+        )
+
+        self.assertEqual(queries, 1)
+        self.assertEqual(response.get_json()["name"], "Item 0.3")
+        retired = ExtraServiceMenu.query.filter_by(name="Retired").one()
+        for path in (
+            f"/api/vendor/{VENDOR_ID + 1}/extras/category/{self.first_category.id}/menu/{menu.id}",
+            f"/api/vendor/{VENDOR_ID}/extras/category/{self.first_category.id}/menu/{retired.id}",
+            f"/api/vendor/{VENDOR_ID + 1}/extras/category/{self.first_category.id}/menus",
+        ):
+            self.assertEqual(self.client.get(path).status_code, 404, path)
+
+
+if __name__ == "__main__":
+    unittest.main()